@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+from pathlib import Path
+# Get the directory containing this file (benchmark directory)
+BENCHMARK_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = BENCHMARK_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common import registry
+from common.config_parser import DIFF_TYPE_INCREMENT, DIFF_TYPE_FULL, DIFF_TYPE_WORKSPACE, SERIALIZED_FILE_NAME
+from synthetic_repo import SyntheticRepo, add_params_arguments, get_params
+
+# bump it when the layout of the result file changes
+RESULT_VERSION = 1
+MODES = [DIFF_TYPE_INCREMENT, DIFF_TYPE_FULL, DIFF_TYPE_WORKSPACE]
+
+
+def run_once(repo_path, run_args):
+    '''
+    Run run.py once in repo_path under probe.py
+    return:
+    {
+        "wall_ms":523.1,
+        "max_rss_kb":40212,
+        "subprocesses":12,
+        "spawns":{"git show":2, "python3 cpplint.py":8},
+        "exit_code":1
+    }
+    '''
+    # every run starts cold, without the run context and findings of the previous one
+    cache_file = os.path.join(repo_path, ".git", SERIALIZED_FILE_NAME)
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    fd, spawn_log = tempfile.mkstemp(prefix="sast_bench_spawns")
+    os.close(fd)
+    output_file = tempfile.TemporaryFile()
+    env = dict(os.environ)
+    env.update({"NO_COLOR": "true", "SAST_FINDINGS_CACHE_SIZE": "0"})
+    command = [sys.executable, str(BENCHMARK_DIR / "probe.py"), spawn_log, str(REPO_DIR / "run.py")] + run_args
+    try:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=repo_path, env=env, stdout=output_file, stderr=subprocess.STDOUT)
+        # wait4 gives the peak RSS of this run only, RUSAGE_CHILDREN would keep the peak of all runs
+        _pid, status, rusage = os.wait4(process.pid, 0)
+        wall_ms = (time.perf_counter() - start) * 1000
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        with open(spawn_log, encoding="utf-8") as f:
+            spawns = Counter(x.strip() for x in f if x.strip())
+        output_file.seek(0)
+        output = output_file.read().decode("utf-8", errors="ignore")
+    finally:
+        output_file.close()
+        os.remove(spawn_log)
+    # a failed check exits with 1 too, only a traceback tells that the run itself broke
+    if "Traceback (most recent call last)" in output:
+        print("warning: run.py {} crashed:\n{}".format(" ".join(run_args), output[-2000:]))
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "max_rss_kb": rusage.ru_maxrss,
+        "subprocesses": sum(spawns.values()),
+        "spawns": dict(sorted(spawns.items())),
+        "exit_code": process.returncode,
+    }
+
+def measure(repo_path, run_args, repeat):
+    '''
+    Run it repeat times, keep the median wall time and the highest peak RSS
+    '''
+    runs = [run_once(repo_path, run_args) for _ in range(repeat)]
+    wall_ms_runs = sorted(x["wall_ms"] for x in runs)
+    result = dict(runs[-1])
+    result["wall_ms"] = wall_ms_runs[len(wall_ms_runs) // 2]
+    result["wall_ms_runs"] = [x["wall_ms"] for x in runs]
+    result["max_rss_kb"] = max(x["max_rss_kb"] for x in runs)
+    return result
+
+def get_mode_checkers(mode, selected_checkers):
+    enable_attr = "local_workspace_check" if mode == DIFF_TYPE_WORKSPACE else "local_ci_check"
+    checkers = [x["module"] for x in registry.get_checkers(enable_attr)]
+    if selected_checkers:
+        checkers = [x for x in checkers if x in selected_checkers]
+    return checkers
+
+def run_benchmark(args):
+    '''
+    return the results of all modes, every checker alone with --jobs 1 and then the whole run
+    '''
+    work_dir = None
+    synthetic_repo = None
+    if args.repo:
+        repo_path = os.path.abspath(args.repo)
+        params = {"repo": repo_path}
+    else:
+        work_dir = tempfile.mkdtemp(prefix="sast_bench")
+        repo_path = os.path.join(work_dir, "repo")
+        synthetic_repo = SyntheticRepo(repo_path, get_params(args))
+        params = synthetic_repo.generate()
+    results = {}
+    try:
+        # the workspace mode changes the working tree, run it last
+        for mode in [x for x in MODES if x in args.modes]:
+            if mode == DIFF_TYPE_WORKSPACE and synthetic_repo:
+                synthetic_repo.make_workspace_changes()
+            results[mode] = {}
+            for checker in get_mode_checkers(mode, args.checkers):
+                results[mode][checker] = measure(repo_path, ["--diff-type", mode, "--{}".format(checker), "--jobs", "1"], args.repeat)
+                print("{:<10} {:<28} {:>10.1f} ms".format(mode, checker, results[mode][checker]["wall_ms"]), flush=True)
+            if not args.checkers:
+                all_check = "all_workspace_check" if mode == DIFF_TYPE_WORKSPACE else "all_ci_check"
+                results[mode][all_check] = measure(repo_path, ["--diff-type", mode, "--{}".format(all_check)], args.repeat)
+                print("{:<10} {:<28} {:>10.1f} ms".format(mode, all_check, results[mode][all_check]["wall_ms"]), flush=True)
+    finally:
+        if work_dir and args.keep:
+            print("synthetic repository is kept in {}".format(repo_path))
+        elif work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+def compare(baseline, current, threshold, min_ms, min_rss_kb):
+    '''
+    Print the differences per mode and checker
+    return the regressions, a slower wall time or a higher peak RSS beyond threshold percent and the
+    absolute noise floor, or more subprocesses than the baseline
+    '''
+    if baseline.get("params") != current.get("params"):
+        print("warning: the baseline was measured with other params, {}".format(json.dumps(baseline.get("params"))))
+    regressions = []
+    print("{:<10} {:<28} {:>10} {:>10} {:>8} {:>7} {:>7} {:>9} {:>9}  {}".format(
+        "mode", "checker", "base ms", "cur ms", "delta", "base sp", "cur sp", "base MB", "cur MB", "status"))
+    for mode, checkers in current.get("results", {}).items():
+        for checker, result in checkers.items():
+            base = baseline.get("results", {}).get(mode, {}).get(checker)
+            if not base:
+                print("{:<10} {:<28} {:>10} {:>10.1f}  new".format(mode, checker, "-", result["wall_ms"]))
+                continue
+            problems = []
+            delta = (result["wall_ms"] - base["wall_ms"]) / base["wall_ms"] * 100 if base["wall_ms"] else 0
+            if delta > threshold and result["wall_ms"] - base["wall_ms"] > min_ms:
+                problems.append("slower")
+            if result["max_rss_kb"] > base["max_rss_kb"] * (1 + threshold / 100) and result["max_rss_kb"] - base["max_rss_kb"] > min_rss_kb:
+                problems.append("memory")
+            if result["subprocesses"] > base["subprocesses"]:
+                problems.append("subprocesses")
+            if problems:
+                regressions.append((mode, checker, problems))
+            print("{:<10} {:<28} {:>10.1f} {:>10.1f} {:>7.1f}% {:>7} {:>7} {:>9.1f} {:>9.1f}  {}".format(
+                mode, checker, base["wall_ms"], result["wall_ms"], delta, base["subprocesses"], result["subprocesses"],
+                base["max_rss_kb"] / 1024, result["max_rss_kb"] / 1024, ",".join(problems) or "ok"))
+    return regressions
+
+def load_result(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        result = json.load(f)
+    if result.get("version") != RESULT_VERSION:
+        print("{} is a result of version {}, expect {}".format(file_path, result.get("version"), RESULT_VERSION))
+        sys.exit(2)
+    return result
+
+def add_compare_arguments(parser):
+    parser.add_argument("--threshold", type=float, default=10, help="percent of slowdown or memory growth reported as a regression")
+    parser.add_argument("--min-ms", type=float, dest="min_ms", default=20, help="ignore slowdowns smaller than this, in ms")
+    parser.add_argument("--min-rss-kb", type=int, dest="min_rss_kb", default=5120, help="ignore memory growth smaller than this, in KB")
+
+def script_parse_args():
+    parser = argparse.ArgumentParser(description="sast end-to-end benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="generate a synthetic repository, or use --repo, and measure every checker")
+    run_parser.add_argument("--repo", type=str, help="measure this repository instead of a synthetic one, as it is")
+    run_parser.add_argument("--modes", type=lambda x: x.split(","), default=MODES, help="comma separated diff types, default all")
+    run_parser.add_argument("--checkers", type=lambda x: x.split(","), default=None, help="comma separated checker modules, default all")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs of each measurement, the median wall time is kept")
+    run_parser.add_argument("-o", "--output", type=str, help="write the result json to this file")
+    run_parser.add_argument("--baseline", type=str, help="compare the result with this result json")
+    run_parser.add_argument("--keep", action="store_true", help="keep the synthetic repository")
+    add_params_arguments(run_parser)
+    add_compare_arguments(run_parser)
+    compare_parser = subparsers.add_parser("compare", help="compare two result json files")
+    compare_parser.add_argument("baseline", help="result json of the baseline")
+    compare_parser.add_argument("current", help="result json to check")
+    add_compare_arguments(compare_parser)
+    return parser.parse_args()
+
+def main():
+    args = script_parse_args()
+    if args.command == "run":
+        result = run_benchmark(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=4)
+        if not args.baseline:
+            return 0
+        baseline = load_result(args.baseline)
+    else:
+        baseline = load_result(args.baseline)
+        result = load_result(args.current)
+    regressions = compare(baseline, result, args.threshold, args.min_ms, args.min_rss_kb)
+    for mode, checker, problems in regressions:
+        print("regression: {} {} {}".format(mode, checker, ",".join(problems)))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
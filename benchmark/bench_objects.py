@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+# Get the directory containing this file (benchmark directory)
+BENCHMARK_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = BENCHMARK_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.gitobjects import ObjectStore
+from common.localgit import CatFile, Local
+
+
+def list_blobs(repo_path, revision):
+    output = subprocess.run(["git", "ls-tree", "-r", "-z", revision], cwd=repo_path, stdout=subprocess.PIPE, check=True).stdout
+    return [x.split(b"\t", 1)[1].decode("utf-8", errors="surrogateescape") for x in output.split(b"\0")
+            if b"\t" in x and x.split()[1] == b"blob"]
+
+def read_python(repo_path, names):
+    store = ObjectStore(Local(repo_path).get_git_dir())
+    try:
+        return [store.query(x) for x in names]
+    finally:
+        store.close()
+
+def read_cat_file(repo_path, names):
+    cat_file = CatFile(repo_path)
+    try:
+        return [cat_file.query(x) for x in names]
+    finally:
+        cat_file.close()
+
+def read_git_show(repo_path, names):
+    return [subprocess.run(["git", "show", x], cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout for x in names]
+
+def measure(reader, repo_path, names, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = reader(repo_path, names)
+        runs.append((time.perf_counter() - start) * 1000)
+    return sorted(runs)[len(runs) // 2], result
+
+def run_benchmark(args):
+    '''
+    Read every blob of the revision by name, such as "HEAD:a.cc", through the python reader, one git cat-file --batch
+    and one git show per blob, and check that the readers give the same content
+    '''
+    repo_path = os.path.abspath(args.repo)
+    names = ["{}:{}".format(args.revision, x) for x in list_blobs(repo_path, args.revision)]
+    python_ms, python_result = measure(read_python, repo_path, names, args.repeat)
+    cat_file_ms, cat_file_result = measure(read_cat_file, repo_path, names, args.repeat)
+    mismatches = [names[x] for x in range(len(names)) if python_result[x] is not None and python_result[x] != cat_file_result[x]]
+    fallbacks = sum(1 for x in python_result if x is None)
+    # one process per blob is slow, a sample of it is enough
+    sample = names[:args.show_sample]
+    show_ms = measure(read_git_show, repo_path, sample, 1)[0] * len(names) / len(sample) if sample else 0
+    return {
+        "repo": repo_path,
+        "revision": args.revision,
+        "blobs": len(names),
+        "bytes": sum(x[2] for x in cat_file_result if x),
+        "python_ms": round(python_ms, 1),
+        "cat_file_ms": round(cat_file_ms, 1),
+        "git_show_ms_estimated": round(show_ms, 1),
+        "python_fallbacks": fallbacks,
+        "mismatches": mismatches,
+    }
+
+def script_parse_args():
+    parser = argparse.ArgumentParser(description="read the blobs of a revision with the python git object reader and with git")
+    parser.add_argument("repo", help="git repository to read")
+    parser.add_argument("--revision", type=str, default="HEAD", help="revision whose blobs are read, default HEAD")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each reader, the median time is kept")
+    parser.add_argument("--show-sample", type=int, dest="show_sample", default=200,
+                        help="blobs read with one git show each, the time is scaled to all blobs")
+    parser.add_argument("-o", "--output", type=str, help="write the result json to this file")
+    return parser.parse_args()
+
+def main():
+    args = script_parse_args()
+    result = run_benchmark(args)
+    print("{} blobs, {:.1f} MB of {}".format(result["blobs"], result["bytes"] / 1024 / 1024, result["revision"]))
+    print("{:<28} {:>10.1f} ms".format("python object reader", result["python_ms"]))
+    print("{:<28} {:>10.1f} ms".format("git cat-file --batch", result["cat_file_ms"]))
+    print("{:<28} {:>10.1f} ms".format("git show per blob (est.)", result["git_show_ms_estimated"]))
+    if result["python_fallbacks"]:
+        print("{} blobs fell back to git".format(result["python_fallbacks"]))
+    for name in result["mismatches"]:
+        print("mismatch: {}".format(name))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+    return 1 if result["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+'''
+Run run.py in this process and record every subprocess it starts, used by bench.py
+usage: probe.py <spawn_log> <run.py> [run.py arguments]
+Each spawn appends the command name as one line to spawn_log, forked checker workers append to the same file.
+'''
+import os
+import sys
+import runpy
+import subprocess
+
+_popen_init = subprocess.Popen.__init__
+
+
+def _command_kind(args):
+    if isinstance(args, (str, bytes)):
+        args = args.decode("utf-8", errors="ignore") if isinstance(args, bytes) else args
+        words = args.split()
+    else:
+        words = [str(x) for x in args]
+    if not words:
+        return "unknown"
+    # "git diff", "python3 cpplint.py" are more useful than "git", "python3"
+    kind = os.path.basename(words[0])
+    if kind == "git" and len(words) > 1:
+        kind += " " + words[1]
+    elif kind.startswith("python"):
+        scripts = [x for x in words[1:] if x.endswith(".py")]
+        if scripts:
+            kind += " " + os.path.basename(scripts[0])
+    return kind
+
+
+def main():
+    spawn_log, run_script = sys.argv[1], sys.argv[2]
+
+    def counting_init(self, args, *popen_args, **popen_kwargs):
+        line = "{}\n".format(_command_kind(args)).encode("utf-8")
+        # O_APPEND writes of one short line are atomic, so processes of the pool can share the log
+        fd = os.open(spawn_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        _popen_init(self, args, *popen_args, **popen_kwargs)
+
+    subprocess.Popen.__init__ = counting_init
+    sys.argv = sys.argv[2:]
+    # as if run.py was started directly
+    sys.path[0] = os.path.dirname(os.path.abspath(run_script))
+    runpy.run_path(run_script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
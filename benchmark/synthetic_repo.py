@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import json
+import random
+import argparse
+import subprocess
+
+# language name: (weight in the default mix, file suffixes)
+LANGUAGES = {
+    "cpp": (40, [".cc", ".h"]),
+    "python": (30, [".py"]),
+    "shell": (10, [".sh"]),
+    "json": (15, [".json"]),
+    "requirements": (5, ["requirements.txt"]),
+}
+
+DEFAULT_PARAMS = {
+    "seed": 1,
+    "files": 200,
+    "min_lines": 20,
+    "max_lines": 400,
+    "mix": {x: LANGUAGES[x][0] for x in LANGUAGES},
+    "diff_files": 20,
+    "diff_lines": 30,
+    "new_files": 5,
+    "workspace_files": 5,
+}
+
+# the same date for every commit, so the commit ids only depend on the params
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "sast benchmark",
+    "GIT_AUTHOR_EMAIL": "sast-benchmark@example.com",
+    "GIT_COMMITTER_NAME": "sast benchmark",
+    "GIT_COMMITTER_EMAIL": "sast-benchmark@example.com",
+    "GIT_AUTHOR_DATE": "2025-01-01T00:00:00+0000",
+    "GIT_COMMITTER_DATE": "2025-01-01T00:00:00+0000",
+}
+
+WORDS = ["buffer", "device", "kernel", "tensor", "stream", "queue", "config", "result", "handle", "context",
+         "memory", "launch", "module", "status", "layout", "offset", "length", "index", "value", "count"]
+# a few misspellings so codespell has something to report
+TYPOS = ["teh", "recieve", "seperate", "occured", "untill"]
+PACKAGES = ["numpy", "requests", "pyyaml", "protobuf", "jinja2", "pytest", "click", "tqdm", "six", "attrs"]
+
+
+def parse_mix(mix):
+    '''
+    "cpp=4,python=3" to {"cpp": 4, "python": 3}
+    '''
+    result = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in LANGUAGES:
+            raise argparse.ArgumentTypeError("unknown language {}, choose from {}".format(name, ",".join(LANGUAGES)))
+        result[name] = int(weight or 1)
+    return result
+
+
+class SyntheticRepo():
+    '''
+    Generate a reproducible git repository for benchmarking: one base commit with params["files"] files,
+    then a HEAD commit that adds lines to params["diff_files"] files and adds params["new_files"] files.
+    The same params always give the same content and the same commit ids.
+    '''
+    def __init__(self, path, params = None):
+        self.path = os.path.abspath(path)
+        self.params = dict(DEFAULT_PARAMS)
+        self.params.update(params or {})
+        self.random = random.Random(self.params["seed"])
+        self.files = []
+
+    def git(self, *args):
+        env = dict(os.environ)
+        env.update(GIT_ENV)
+        subprocess.run(["git"] + list(args), cwd=self.path, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _word(self):
+        if self.random.random() < 0.02:
+            return self.random.choice(TYPOS)
+        return self.random.choice(WORDS)
+
+    def _name(self):
+        return "{}_{}".format(self.random.choice(WORDS), self.random.choice(WORDS))
+
+    def cpp_lines(self, count):
+        lines = []
+        while len(lines) < count:
+            name = self._name()
+            lines.append("// {} the {} {}".format(self._word(), self._word(), self._word()))
+            lines.append("int {}(int {}, int {}) {{".format(name, self._word(), self._word() + "_b"))
+            for _ in range(self.random.randint(2, 8)):
+                if self.random.random() < 0.1:
+                    # lint findings: missing spaces, long line
+                    lines.append("  int {}=1;   ".format(self._name()))
+                elif self.random.random() < 0.05:
+                    lines.append("  int {} = 0;  // {}".format(self._name(), " ".join(self._word() for _ in range(20))))
+                else:
+                    lines.append("  int {} = {};".format(self._name(), self.random.randint(0, 1000)))
+            lines.append("  return 0;")
+            lines.append("}")
+            lines.append("")
+        return lines[:count]
+
+    def python_lines(self, count):
+        lines = []
+        while len(lines) < count:
+            if self.random.random() < 0.05:
+                lines.append("import {}".format(self.random.choice(["os", "sys", "json", "re"])))
+            lines.append("def {}({}, {}):".format(self._name(), self._word(), self._word() + "_b"))
+            lines.append("    '''{} the {}'''".format(self._word(), self._word()))
+            for _ in range(self.random.randint(2, 8)):
+                lines.append("    {} = {}".format(self._name(), self.random.randint(0, 1000)))
+            lines.append("    return None")
+            lines.append("")
+            lines.append("")
+        return lines[:count]
+
+    def shell_lines(self, count, head = True):
+        lines = []
+        if head:
+            lines.append("#!/bin/bash")
+            if self.random.random() < 0.7:
+                lines.append("set -eu -o pipefail")
+        while len(lines) < count:
+            variable = self._name().upper()
+            lines.append("{}=\"{}\"".format(variable, self._word()))
+            lines.append("echo \"${{{}}}\" # {}".format(variable, self._word()))
+        return lines[:count]
+
+    def json_lines(self, count):
+        data = {}
+        while len(data) < max(1, count - 2):
+            data["{}_{}".format(self._name(), len(data))] = self.random.randint(0, 1000)
+        return json.dumps(data, indent=4).split("\n")
+
+    def requirements_lines(self, count):
+        packages = self.random.sample(PACKAGES, min(len(PACKAGES), max(1, count)))
+        return ["{}=={}.{}".format(x, self.random.randint(0, 9), self.random.randint(0, 20)) for x in packages]
+
+    def lines_for(self, language, count, head = True):
+        if language == "shell":
+            return self.shell_lines(count, head)
+        return getattr(self, "{}_lines".format(language))(count)
+
+    def _pick_language(self):
+        mix = self.params["mix"]
+        names = sorted(mix)
+        return self.random.choices(names, weights=[mix[x] for x in names])[0]
+
+    def _new_file(self, index):
+        language = self._pick_language()
+        suffix = self.random.choice(LANGUAGES[language][1])
+        directory = "src/mod{}".format(index % max(1, self.params["files"] // 20))
+        if language == "requirements":
+            file_path = "{}/{}/requirements.txt".format(directory, "pkg{}".format(index))
+        else:
+            file_path = "{}/{}_{}{}".format(directory, self._name(), index, suffix)
+        line_count = self.random.randint(self.params["min_lines"], self.params["max_lines"])
+        self.write(file_path, self.lines_for(language, line_count))
+        self.files.append((file_path, language))
+
+    def write(self, file_path, lines, mode = "w"):
+        full_path = os.path.join(self.path, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, mode, encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _append_lines(self, file_path, language):
+        if language == "json":
+            # keep it valid json, rewrite it with more keys
+            with open(os.path.join(self.path, file_path), encoding="utf-8") as f:
+                data = json.load(f)
+            for index in range(self.params["diff_lines"]):
+                data["{}_added_{}".format(self._name(), index)] = index
+            self.write(file_path, json.dumps(data, indent=4).split("\n"))
+        else:
+            self.write(file_path, self.lines_for(language, self.params["diff_lines"], head=False), mode="a")
+
+    def generate(self):
+        '''
+        create the repository, return the params used
+        '''
+        os.makedirs(self.path, exist_ok=True)
+        self.git("init", "-q")
+        self.git("config", "user.name", GIT_ENV["GIT_AUTHOR_NAME"])
+        self.git("config", "user.email", GIT_ENV["GIT_AUTHOR_EMAIL"])
+        for index in range(self.params["files"]):
+            self._new_file(index)
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", "base")
+        base_files = list(self.files)
+        for file_path, language in self.random.sample(base_files, min(len(base_files), self.params["diff_files"])):
+            self._append_lines(file_path, language)
+        for index in range(self.params["new_files"]):
+            self._new_file(self.params["files"] + index)
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", "change")
+        with open(os.path.join(self.path, ".git", "sast_benchmark.json"), "w", encoding="utf-8") as f:
+            json.dump(self.params, f, indent=4)
+        return self.params
+
+    def make_workspace_changes(self):
+        '''
+        modify params["workspace_files"] tracked files and add as many untracked ones, for the workspace mode
+        '''
+        tracked = list(self.files)
+        for file_path, language in self.random.sample(tracked, min(len(tracked), self.params["workspace_files"])):
+            self._append_lines(file_path, language)
+        for index in range(self.params["workspace_files"]):
+            self._new_file(self.params["files"] + self.params["new_files"] + index)
+
+
+def add_params_arguments(parser):
+    parser.add_argument("--seed", type=int, default=DEFAULT_PARAMS["seed"], help="random seed, the same params give the same repository")
+    parser.add_argument("--files", type=int, default=DEFAULT_PARAMS["files"], help="files in the base commit")
+    parser.add_argument("--min-lines", type=int, dest="min_lines", default=DEFAULT_PARAMS["min_lines"], help="minimal lines of a file")
+    parser.add_argument("--max-lines", type=int, dest="max_lines", default=DEFAULT_PARAMS["max_lines"], help="maximal lines of a file")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_PARAMS["mix"],
+                        help="language weights such as cpp=4,python=3,shell=1,json=1,requirements=1")
+    parser.add_argument("--diff-files", type=int, dest="diff_files", default=DEFAULT_PARAMS["diff_files"], help="files changed by the HEAD commit")
+    parser.add_argument("--diff-lines", type=int, dest="diff_lines", default=DEFAULT_PARAMS["diff_lines"], help="lines added to each changed file")
+    parser.add_argument("--new-files", type=int, dest="new_files", default=DEFAULT_PARAMS["new_files"], help="files added by the HEAD commit")
+    parser.add_argument("--workspace-files", type=int, dest="workspace_files", default=DEFAULT_PARAMS["workspace_files"],
+                        help="files modified and added in the working tree for the workspace mode")
+
+def get_params(args):
+    return {x: getattr(args, x) for x in DEFAULT_PARAMS}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic git repository for the sast benchmark")
+    parser.add_argument("path", help="directory of the new repository")
+    add_params_arguments(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.path) and os.listdir(args.path):
+        print("{} is not empty".format(args.path))
+        sys.exit(1)
+    params = SyntheticRepo(args.path, get_params(args)).generate()
+    print(json.dumps(params, indent=4))
@@ -4,22 +4,23 @@
 #
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
+from io import StringIO
+from contextlib import redirect_stdout, redirect_stderr
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
-from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck,import_tool
+from common.diff_index import get_diff_lines
+from common import trace
 from common.config_parser import *
+from common.findings_cache import get_file_version
 
 import sys
 
@@ -46,32 +47,49 @@ class CIChecker(CICheckerCommon):
                 return True
         return False
 
+    def run_codespell(self, config_path, file_path):
+        '''
+        Run tools/codespell.py in this process, so its dictionaries are parsed once per process
+        return the output of the command line
+        '''
+        codespell = import_tool("codespell")
+        captured_output = StringIO()
+        with redirect_stdout(captured_output), redirect_stderr(captured_output), trace.span("codespell", "tool", file=file_path):
+            try:
+                codespell.main("--config", config_path, file_path)
+            except SystemExit:
+                pass
+        return captured_output.getvalue()
+
     def codespell_check(self):
         if self.add_or_changed_files:
             self.diff_info = self.get_diff_info()
+        if os.path.isfile(self.default_config):
+            config_path = self.default_config
+        else:
+            config_path = self.remote_config
+        # codespell reads setup.cfg and .codespellrc of the current directory besides --config
+        findings_cache = self.get_findings_cache(get_file_version("{}/codespell.py".format(self.tools_path), config_path, "setup.cfg", ".codespellrc"))
         for unchecked_file in self.add_or_changed_files:
             if not self.filter_files(unchecked_file):
                 continue
             self.files_static_check_status[unchecked_file]= {"check_status":True}
-            if os.path.isfile(self.default_config):
-                config_path = self.default_config
-            else:
-                config_path = self.remote_config
-            command = "python3 {}/codespell.py --config {} {}".format(self.tools_path,config_path,unchecked_file)
-            pipe = subprocess.Popen(command,
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-            stdout, _stderr = pipe.communicate()
+            stdout = findings_cache.get(unchecked_file)
+            if stdout is None:
+                stdout = self.run_codespell(config_path, unchecked_file)
+                findings_cache.put(unchecked_file, stdout)
             self.command_output[unchecked_file] = "\n"
-            add_lines_number = [x[0] for x in self.diff_info.get(unchecked_file,{}).get("add",[])]
-            for line in stdout.decode('utf-8',errors="ignore").split("\n"):
+            add_lines = get_diff_lines(self.diff_info, unchecked_file)
+            for line in stdout.split("\n"):
                 #print(line)
                 rets = re.findall(":(\d+):",line)
                 if rets:
                     line_number = int(rets[0])
-                    if  line_number in add_lines_number:
+                    if add_lines.has_line(line_number):
                         self.files_static_check_status[unchecked_file]["check_status"] = False
                         self.pass_flag = False
                         self.command_output[unchecked_file] +=  line + " (codespell error)\n"
+        findings_cache.evict()
         return self.check_report()
 
     def check_func(self):
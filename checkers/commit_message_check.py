@@ -4,15 +4,11 @@
 #
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
@@ -40,11 +36,27 @@ class CIChecker(CICheckerCommon):
         self.fail_message = []
 
     def check_func(self):
-        if any(x in self.commit_author for x in self.bypass_commit_author):
-            return self.check_report()
-        if re.findall("This reverts commit", self.commit_message):
-            return self.check_report()
-        #subject = self.commit_message.split("\n")[0]
+        if self.diff_type == DIFF_TYPE_RANGE:
+            # every commit of the range is pushed, so every message is checked
+            for commit in self.range_commits:
+                for message in self.check_commit_message(commit["message"], commit["author"]):
+                    self.fail_message.append("commit {}: {}".format(commit["commit"][:12], message))
+        else:
+            self.fail_message.extend(self.check_commit_message(self.commit_message, self.commit_author))
+        if self.fail_message:
+            self.pass_flag = False
+        return self.check_report()
+
+    def check_commit_message(self, commit_message, commit_author):
+        '''
+        return the fail messages of one commit message
+        '''
+        fail_message = []
+        if any(x in commit_author for x in self.bypass_commit_author):
+            return fail_message
+        if re.findall("This reverts commit", commit_message):
+            return fail_message
+        #subject = commit_message.split("\n")[0]
         #ret=re.findall("\[.*?\]\(.*?\)(.*)",subject)
         # if ret:
         #     check_title = ret[0].strip()
@@ -52,16 +64,15 @@ class CIChecker(CICheckerCommon):
         #         self.pass_flag = False
         #         self.fail_message.append("After removing '[type](jira id)' in the title, the remaining content must have at least 10 valid characters.")
         for template_field in self.template_fields:
-            template_field_reg_find = re.findall(template_field + ":\s*\n(.*?)",self.commit_message)
+            template_field_reg_find = re.findall(template_field + ":\s*\n(.*?)",commit_message)
             if not template_field_reg_find:
-                self.pass_flag = False
-                self.fail_message.append("There must be {},please fill in it".format(template_field))
+                fail_message.append("There must be {},please fill in it".format(template_field))
             # else:
             #     template_field_content = template_field_reg_find[0]
             #     if any([ template_field_content.lower().strip() == x for x in self.forbidden_single_string ]):
             #         self.pass_flag = False
             #         self.fail_message.append("{} cannot be {},please update it ".format(template_field, self.forbidden_single_string))
-        return self.check_report()
+        return fail_message
     
 
     def check_report(self):
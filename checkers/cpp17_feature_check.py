@@ -6,14 +6,11 @@
 import subprocess
 import os
 import copy
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
 from pathlib import Path
 from typing import List, Tuple, Dict
 CHECKERS_DIR = Path(__file__).resolve().parent
@@ -21,6 +18,7 @@ REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.diff_index import get_diff_lines
 from common.config_parser import *
 
 def excepthook(exctype, value, traceback):
@@ -531,10 +529,9 @@ class CIChecker(CICheckerCommon):
             self.diff_info = self.get_diff_info()
             for check_file in self.files_static_check_status:
                 ret = self.check_file(check_file)
-                add_line_info = [ x for x in self.diff_info.get(check_file, {}).get("add",[])]
-                add_line_numbers = [x[0] for x in add_line_info]
+                add_lines = get_diff_lines(self.diff_info, check_file)
                 for item in ret:
-                    if item.line in add_line_numbers:
+                    if add_lines.has_line(item.line):
                         if not item.in_cpp14_guard:
                             self.pass_flag = False
                             self.files_static_check_status[check_file]["check_status"] = False
@@ -5,22 +5,21 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.diff_index import get_diff_lines
 from common.config_parser import *
+from common.findings_cache import get_command_version, get_file_version
+from common.command import run_command
 
 def excepthook(exctype, value, traceback):
     if exctype == AssertionError:
@@ -57,22 +56,47 @@ class CIChecker(CICheckerCommon):
             self.diff_info = self.get_diff_info()
         else:
             return self.check_report()
-        add_file_list = ''
-        modify_file_list = ''
-        file_list = ''
-        this_flag = True
+        # only this checker parses xml, import it when needed to keep startup of the other checkers fast
+        import xml.dom.minidom
+        cppcheck_version = get_command_version(["cppcheck", "--version"])
+        findings_cache = self.get_findings_cache(cppcheck_version and cppcheck_version + get_file_version(self.cppcheck_suppressions_list_file))
+        # findings of a file are the <error> elements that have a location in it, as xml text
+        error_xml_list = []
+        unchecked_files = []
         for file_path in self.files_static_check_status.keys():
-            # if file_path in self.add_files:
-            #     add_file_list += ' ./{}'.format(file_path)
-            # else:
-            #     modify_file_list += ' ./{}'.format(file_path)
-            file_list += ' ./{}'.format(file_path)
-        cppcheck_cmd = 'cppcheck --xml --xml-version=2 --suppressions-list={} --output-file={} --file-list={}'.format(self.cppcheck_suppressions_list_file, self.cppcheck_result_file, file_list)
-        pipe = subprocess.Popen(cppcheck_cmd,stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        stdout, _stderr = pipe.communicate()
-        DOMTree = xml.dom.minidom.parse(self.cppcheck_result_file)
-        results = DOMTree.documentElement
-        errors = results.getElementsByTagName("errors")[0]
+            findings = findings_cache.get(file_path)
+            if findings is None:
+                unchecked_files.append(file_path)
+            else:
+                error_xml_list.extend(findings)
+        this_flag = True
+        if unchecked_files:
+            file_list = ['./{}'.format(file_path) for file_path in unchecked_files]
+            # the files are arguments, --file-list= stays empty
+            run_command(['cppcheck', '--xml', '--xml-version=2', '--suppressions-list={}'.format(self.cppcheck_suppressions_list_file),
+                         '--output-file={}'.format(self.cppcheck_result_file), '--file-list='] + file_list)
+            DOMTree = xml.dom.minidom.parse(self.cppcheck_result_file)
+            errors = DOMTree.documentElement.getElementsByTagName("errors")[0]
+            findings = {file_path: [] for file_path in unchecked_files}
+            for error in errors.getElementsByTagName("error"):
+                error_xml = error.toxml()
+                error_files = [x.getAttribute("file") for x in error.getElementsByTagName("location")]
+                if not any(x in findings for x in error_files):
+                    error_xml_list.append(error_xml)
+                for file_path in findings:
+                    if file_path in error_files:
+                        findings[file_path].append(error_xml)
+            for file_path in unchecked_files:
+                findings_cache.put(file_path, findings[file_path])
+                error_xml_list.extend(findings[file_path])
+            findings_cache.evict()
+        # an error with locations in several files is in the findings of each of them
+        error_xml_list = list(dict.fromkeys(error_xml_list))
+        DOMTree = xml.dom.minidom.parseString('<?xml version="1.0" encoding="UTF-8"?><results version="2"><cppcheck version="{}"/><errors/></results>'.format(
+            (cppcheck_version or "").replace("Cppcheck", "").strip()))
+        errors = DOMTree.documentElement.getElementsByTagName("errors")[0]
+        for error_xml in error_xml_list:
+            errors.appendChild(xml.dom.minidom.parseString(error_xml).documentElement)
         error_list = errors.getElementsByTagName("error")
         for error in error_list:
             remove_flag = True
@@ -80,8 +104,7 @@ class CIChecker(CICheckerCommon):
             for error_file_location in error_file_locations:
                 error_file_path = error_file_location.getAttribute("file")
                 error_file_line_number = error_file_location.getAttribute("line")
-                add_lines_number = [x[0] for x in self.diff_info.get(error_file_path,{}).get("add",[])]
-                if int(error_file_line_number) in add_lines_number:
+                if get_diff_lines(self.diff_info, error_file_path).has_line(int(error_file_line_number)):
                     remove_flag = False
                     this_flag = False
             if remove_flag:
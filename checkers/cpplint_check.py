@@ -5,22 +5,22 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
+import warnings
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
-from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck,import_tool
+from common.diff_index import get_diff_lines
 from common.config_parser import *
+from common.findings_cache import get_file_version
+from common import trace
 
 def excepthook(exctype, value, traceback):
     if exctype == AssertionError:
@@ -30,6 +30,18 @@ def excepthook(exctype, value, traceback):
 
 sys.excepthook = excepthook
 
+def run_cpplint(file_path, cpplint_filter, changed_lines = None):
+    '''
+    Lint the file with tools/cpplint.py in this process, cpplint and its regular expressions are loaded once per process
+    changed_lines: check only these lines and the few around them, the findings of the other lines may be missing
+    return [[file, line, category, confidence, message]] in the order cpplint found them
+    '''
+    cpplint = import_tool("cpplint")
+    with warnings.catch_warnings(), trace.span("cpplint", "tool", file=file_path, diff_scoped=changed_lines is not None):
+        # like python3 -W ignore
+        warnings.simplefilter("ignore")
+        return [list(x) for x in cpplint.LintFile(file_path, cpplint_filter, changed_lines=changed_lines)]
+
 class CIChecker(CICheckerCommon):
 
     def __init__(self, api_init = None, args = None, check_api_type = None):
@@ -38,6 +50,8 @@ class CIChecker(CICheckerCommon):
         self.files_static_check_status = {}
         self.local_workspace_check = True
         self.command_output = {}
+        # processes cpplint lints the files in, run.py --jobs
+        self.jobs = getattr(args, "jobs", None) or os.cpu_count() or 1
     
     def is_skipped_files(self, file_path, check_file_regx):
         skip_flag = False
@@ -56,6 +70,46 @@ class CIChecker(CICheckerCommon):
                     break
         return skip_flag
 
+    def get_cpplint_cfg_version(self, file_path):
+        '''
+        cpplint also reads CPPLINT.cfg of the file directory and all parent directories
+        '''
+        cfg_files = []
+        directory = os.path.dirname(os.path.abspath(file_path))
+        while True:
+            cfg_file = os.path.join(directory, "CPPLINT.cfg")
+            if os.path.isfile(cfg_file):
+                cfg_files.append(cfg_file)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        return get_file_version(*cfg_files) if cfg_files else None
+
+    def run_cpplint_files(self, lint_files, cpplint_filter):
+        '''
+        lint_files: [(file, changed lines or None)]
+        return the errors of run_cpplint of each file, in the order of lint_files.
+        The files are spread over a pool of --jobs processes, each cpplint.LintFile has its own cpplint state.
+        A checker that already runs in a worker of the checker scheduler lints them one after another.
+        '''
+        jobs = min(self.jobs, len(lint_files))
+        # run.py --jobs, 1 when the checker runs in a worker of the checker pool
+        if jobs <= 1:
+            return [run_cpplint(file_path, cpplint_filter, changed_lines) for file_path, changed_lines in lint_files]
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(run_cpplint, [x[0] for x in lint_files], [cpplint_filter] * len(lint_files),
+                                     [x[1] for x in lint_files]))
+
+    def is_diff_scoped(self, file_path):
+        '''
+        A large changed file is checked around its added lines only, see SAST_CPPLINT_DIFF_SCOPE_SIZE.
+        All lines of an added file are added lines.
+        '''
+        return bool(CPPLINT_DIFF_SCOPE_SIZE) and file_path not in self.add_files and os.path.isfile(file_path) \
+            and os.path.getsize(file_path) >= CPPLINT_DIFF_SCOPE_SIZE
+
     def check_func(self):
         check_file_regx = []
         if os.path.isfile(self.repo_config_file):
@@ -67,20 +121,33 @@ class CIChecker(CICheckerCommon):
             self.files_static_check_status[file_path] = {"check_status":True}
         if self.files_static_check_status:
             self.diff_info = self.get_diff_info()
+        cpplint_filter = "-whitespace/indent,-whitespace/comments"
+        # the findings are the error records of cpplint.LintFile
+        findings_cache = self.get_findings_cache("{}:LintFile:{}".format(get_file_version("{}/cpplint.py".format(self.tools_path)), cpplint_filter))
+        file_errors = {}
+        lint_files = []
         for unchecked_file in self.files_static_check_status.keys():
-            cmd = "python3 -W ignore {}/cpplint.py --filter=-whitespace/indent,-whitespace/comments {}".format(self.tools_path, unchecked_file)
-            pipe = subprocess.Popen(cmd,stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-            stdout, _stderr = pipe.communicate()
+            cpplint_cfg_version = self.get_cpplint_cfg_version(unchecked_file)
+            file_errors[unchecked_file] = findings_cache.get(unchecked_file, cpplint_cfg_version)
+            if file_errors[unchecked_file] is None:
+                # the findings of a diff scoped file depend on the diff, they are not cached
+                changed_lines = get_diff_lines(self.diff_info, unchecked_file).numbers if self.is_diff_scoped(unchecked_file) else None
+                lint_files.append((unchecked_file, changed_lines, cpplint_cfg_version))
+        lint_results = self.run_cpplint_files([x[:2] for x in lint_files], cpplint_filter)
+        for (unchecked_file, changed_lines, cpplint_cfg_version), errors in zip(lint_files, lint_results):
+            file_errors[unchecked_file] = errors
+            if changed_lines is None:
+                findings_cache.put(unchecked_file, errors, cpplint_cfg_version)
+        for unchecked_file, errors in file_errors.items():
+            add_lines = get_diff_lines(self.diff_info, unchecked_file)
             self.command_output[unchecked_file] = "\n"
-            add_lines_number = [x[0] for x in self.diff_info.get(unchecked_file,{}).get("add",[])]
-            for line in stdout.decode('utf-8',errors="ignore").split("\n"):
-                rets = re.findall(":(\d+):",line)
-                if rets:
-                    line_number = int(rets[0])
-                    if (line_number == 0 and unchecked_file in self.add_files ) or line_number in add_lines_number:
-                        self.files_static_check_status[unchecked_file]["check_status"] = False
-                        self.pass_flag = False
-                        self.command_output[unchecked_file] +=  line + "\n"
+            for file_path, line_number, category, confidence, message in errors:
+                if (line_number == 0 and unchecked_file in self.add_files ) or add_lines.has_line(line_number):
+                    self.files_static_check_status[unchecked_file]["check_status"] = False
+                    self.pass_flag = False
+                    # the line cpplint prints
+                    self.command_output[unchecked_file] += "{}:{}:  {}  [{}] [{}]\n".format(file_path, line_number, message, category, confidence)
+        findings_cache.evict()
 
         return self.check_report()
     
@@ -5,15 +5,11 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
@@ -98,8 +94,9 @@ class CIChecker(CICheckerCommon):
         if self.check_files:
             self.diff_info = self.get_diff_info()
             total_lfs_size = 0
+            lfs_statuses = self.get_lfs_statuses(self.check_files)
             for check_file in self.check_files:
-                if not self.get_lfs_status(check_file) and not os.path.islink(check_file):
+                if not lfs_statuses[check_file] and not os.path.islink(check_file):
                     self.pass_flag = False
                     self.files_static_check_status[check_file] = {"check_status":False,"check_msg":"Those types of file are not allowed push to this repo. Please push these files to lfs"}
                 else:
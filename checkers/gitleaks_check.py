@@ -5,22 +5,20 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.diff_index import get_diff_lines
 from common.config_parser import *
+from common.command import run_command
 
 def excepthook(exctype, value, traceback):
     if exctype == AssertionError:
@@ -47,16 +45,13 @@ class CIChecker(CICheckerCommon):
             self.diff_info = self.get_diff_info()
             for check_file in self.add_or_changed_files:
                 self.files_static_check_status[check_file] = {"check_status": True}
-                pipe = subprocess.Popen("gitleaks detect --no-git --source {} --report-format json --report-path leaks.json".format(self.tools_path, check_file),
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                stdout, _stderr = pipe.communicate()
+                run_command(["gitleaks", "detect", "--no-git", "--source", self.tools_path, "--report-format", "json", "--report-path", "leaks.json"])
                 if os.path.isfile("leaks.json"):
                     with open("leaks.json", "r") as f:
                         leaks_data = json.load(f)
                     for leak in leaks_data:
                         if leak["File"] in self.add_or_changed_files:
-                            add_lines_number = [x[0] for x in self.diff_info.get(leak["File"],{}).get("add",[])]
-                            if leak["StartLine"] in add_lines_number:
+                            if get_diff_lines(self.diff_info, leak["File"]).has_line(leak["StartLine"]):
                                 self.files_static_check_status[leak["File"]]["check_status"] = False
                                 self.pass_flag = False
                                 if leak["File"] not in self.command_output:
@@ -5,15 +5,11 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
@@ -21,6 +17,7 @@ REPO_DIR = CHECKERS_DIR.parent
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
 from common.config_parser import *
+from common.command import run_command
 
 def excepthook(exctype, value, traceback):
     if exctype == AssertionError:
@@ -41,7 +38,7 @@ class CIChecker(CICheckerCommon):
         for filetype in self.lineTerminatorsCheckFileType:
             for file_path in self.add_or_changed_files:
                 if file_path.endswith(filetype):
-                    out = subprocess.Popen("file {}".format(file_path), shell=True, stdout=subprocess.PIPE).communicate()[0].decode('utf-8',errors="ignore")
+                    out = run_command(["file", file_path], merge_stderr=False).output
                     self.files_static_check_status[file_path]={"check_status":True}
                     self.files_static_check_status[file_path]['file_info']=out
                     if "with CRLF line terminators" in out or "No such file or directory"  in out:
@@ -5,22 +5,20 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.diff_index import get_diff_lines
 from common.config_parser import *
+from common.command import run_command
 
 def excepthook(exctype, value, traceback):
     '''
@@ -64,20 +62,18 @@ class CIChecker(CICheckerCommon):
             for file_path in self.check_files:
                 self.files_static_check_status[file_path] = {"check_status":True}
                 if file_path in self.diff_info:
-                    with subprocess.Popen("ruff check --config {} {}".format(self.tools_path,config_path ,file_path),stdout=subprocess.PIPE,
-                             stderr=subprocess.STDOUT, shell=True, executable="/bin/bash") as pipe:
-                        stdout, _stderr = pipe.communicate()
-                        self.command_output[file_path] = "\n"
-                        add_lines_number = [x[0] for x in self.diff_info.get(file_path,{}).get("add",[])]
-                        for line in stdout.decode('utf-8',errors="ignore").split("\n"):
-                            rets = re.findall(r":(\d+):",line)
-                            if rets:
-                                line_number = int(rets[0])
-                                if (line_number == 0 and file_path in self.add_files ) or \
-                                        line_number in add_lines_number:
-                                    self.files_static_check_status[file_path]["check_status"] = False
-                                    self.pass_flag = False
-                                    self.command_output[file_path] +=  line + "\n"
+                    stdout = run_command(["ruff", "check", "--config", self.tools_path, config_path]).output
+                    self.command_output[file_path] = "\n"
+                    add_lines = get_diff_lines(self.diff_info, file_path)
+                    for line in stdout.split("\n"):
+                        rets = re.findall(r":(\d+):",line)
+                        if rets:
+                            line_number = int(rets[0])
+                            if (line_number == 0 and file_path in self.add_files ) or \
+                                    add_lines.has_line(line_number):
+                                self.files_static_check_status[file_path]["check_status"] = False
+                                self.pass_flag = False
+                                self.command_output[file_path] +=  line + "\n"
 
         return self.check_report()
 
@@ -5,22 +5,21 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
 # Add the workspace root to Python path
 sys.path.append(str(REPO_DIR))
 from common.static_check_common import QualityCodexCommitee,CICheckerCommon,StaticCheck
+from common.diff_index import get_diff_lines
 from common.config_parser import *
+from common.findings_cache import get_command_version
+from common.command import run_command
 
 def excepthook(exctype, value, traceback):
     if exctype == AssertionError:
@@ -30,6 +29,13 @@ def excepthook(exctype, value, traceback):
 
 sys.excepthook = excepthook
 
+# set -e, set -u and set -o pipefail, in the shebang or a set line
+SHELL_STRICT_MODE_PATTERNS = [
+    r'^((#!((\/usr\/bin\/env\s)|(\/bin\/))bash)|\s*set)\s(\s?\-?[abfhkmnptuvxBCEHPT]*e[abfhkmnptuvxBCEHPT]*)',
+    r'^((#!((\/usr\/bin\/env\s)|(\/bin\/))bash)|\s*set)\s(\s?\-?[abefhkmnptvxBCEHPT]*u[abefhkmnptvxBCEHPT]*)',
+    r'^\s*set.*o pipefail',
+]
+
 class CIChecker(CICheckerCommon):
 
     def __init__(self, api_init =None, args = None , check_api_type = None , static_check = StaticCheck):
@@ -58,12 +64,17 @@ class CIChecker(CICheckerCommon):
         if self.add_or_changed_files:
             self._shell_file_filter()
             self.diff_info = self.get_diff_info()
+        shellcheck_version = get_command_version(["shellcheck", "--version"]) if self.files_static_check_status else None
+        findings_cache = self.get_findings_cache(shellcheck_version and shellcheck_version + "--severity=error")
         for unchecked_file in self.files_static_check_status:
-            pipe_shell_check = subprocess.Popen("shellcheck --severity=error {}".format(unchecked_file),stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-            stdout, _stderr = pipe_shell_check.communicate()
-            out=stdout.decode('utf-8', errors="ignore").rsplit('\n')
-            if pipe_shell_check.returncode:
-                add_lines_number = [x[0] for x in self.diff_info.get(unchecked_file,{}).get("add",[])]
+            findings = findings_cache.get(unchecked_file)
+            if findings is None:
+                command_result = run_command(["shellcheck", "--severity=error", unchecked_file])
+                findings = {"returncode":command_result.returncode, "output":command_result.output}
+                findings_cache.put(unchecked_file, findings)
+            out=findings["output"].rsplit('\n')
+            if findings["returncode"]:
+                add_lines = get_diff_lines(self.diff_info, unchecked_file)
                 new_line=False
                 for line in out:
                     # returncode not zero which means code have lint errors
@@ -72,7 +83,7 @@ class CIChecker(CICheckerCommon):
                     if rets:
                         new_line=False
                         line_number = int(rets[0])
-                        if line_number and line_number in add_lines_number:
+                        if line_number and add_lines.has_line(line_number):
                             new_line=True
                             self.pass_flag = False
                             self.files_static_check_status[unchecked_file]["check_status"] = False
@@ -81,6 +92,15 @@ class CIChecker(CICheckerCommon):
                         self.files_static_check_status[unchecked_file]['command_output'] +="\n"+line
                     else:
                         continue
+        findings_cache.evict()
+
+    def _match_strict_mode(self, file_path):
+        try:
+            with open(file_path, mode='r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return False
+        return all(any(re.search(pattern, line) for line in lines) for pattern in SHELL_STRICT_MODE_PATTERNS)
 
     def shell_strict_check(self):
         for unchecked_file in self.files_static_check_status:
@@ -89,15 +109,12 @@ class CIChecker(CICheckerCommon):
                 self.files_static_check_status[unchecked_file]['need_shell_strict_check'] = True
                 self.files_static_check_status[unchecked_file]['shell_strict_check_status'] = True
                 if 'need_shell_strict_check' in self.files_static_check_status[unchecked_file].keys() and self.files_static_check_status[unchecked_file]['need_shell_strict_check']:
-                    command  = "echo {} | xargs egrep -l '^((#!((\/usr\/bin\/env\s)|(\/bin\/))bash)|\s*set)\s(\s?\-?[abfhkmnptuvxBCEHPT]*e[abfhkmnptuvxBCEHPT]*)' \
-                                | xargs egrep -l  '^((#!((\/usr\/bin\/env\s)|(\/bin\/))bash)|\s*set)\s(\s?\-?[abefhkmnptvxBCEHPT]*u[abefhkmnptvxBCEHPT]*)' \
-                                | xargs egrep -l '^\s*set.*o pipefail'".format(unchecked_file)
-
-                    pipe_shell_strict_check = subprocess.run(command,shell=True,stdout=subprocess.PIPE,stderr=subprocess.PIPE,encoding="utf-8")
+                    # the three egrep of the old shell pipeline, every pattern must match a line of the file
+                    strict_mode_flag = self._match_strict_mode(unchecked_file)
                     # current code function well
                     # True means pass which code is clean
                     self.files_static_check_status[unchecked_file]["shell_strict_check_status"] = True
-                    if pipe_shell_strict_check.returncode != 0:
+                    if not strict_mode_flag:
                         # Any bash or shell script that does not use 'set-eu-o pipefail' will fail
                         self.files_static_check_status[unchecked_file]["shell_strict_check_status"] = False
                         self.pass_flag_strict = False
@@ -5,15 +5,11 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
@@ -47,8 +43,12 @@ class CIChecker(CICheckerCommon):
         check_files = [x for x in  self.add_or_changed_files if not any([re.match(y,x) for y in self.skip_files])]
         if check_files:
             changed_file_size = self.get_file_size()
+            lfs_statuses = self.get_lfs_statuses(check_files)
             for check_file in check_files:
-                if self.get_lfs_status(check_file):
+                if lfs_statuses[check_file]:
+                    continue
+                # submodules and files whose size can not be read have no size to check
+                if changed_file_size.get(check_file, {}).get('size') is None:
                     continue
                 if self.is_binary(check_file):
                     if changed_file_size[check_file]['size'] > self.binary_size_in_bytes:
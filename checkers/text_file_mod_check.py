@@ -5,15 +5,11 @@
 
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 CHECKERS_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
 REPO_DIR = CHECKERS_DIR.parent
@@ -44,9 +40,12 @@ class CIChecker(CICheckerCommon):
     def check_func(self):
         self.check_files = self.filter_file()
         if self.check_files:
+            files_meta = self.get_files_meta()
             for file_path in self.check_files:
                 self.files_static_check_status[file_path] = {"check_status":True}
-                if os.access(file_path,os.X_OK):
+                # the mode git records, the file system may not keep the executable bit
+                mode = files_meta[file_path]["mode"] if file_path in files_meta else None
+                if mode == "100755" or (mode is None and os.access(file_path,os.X_OK)):
                     self.pass_flag = False
                     self.files_static_check_status[file_path]["check_status"] = False
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import math
+import time
+import selectors
+import subprocess
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.config_parser import COMMAND_TIMEOUT, COMMAND_MAX_OUTPUT
+from common import trace
+
+# (kind, elapsed ms, returncode, timed out) of every command run by this process
+_stats = []
+# long-lived commands started by this process and not finished yet
+_running = []
+_READ_SIZE = 65536
+
+
+class CommandResult():
+    '''
+    stdout and stderr are bytes, stderr is empty when it was merged into stdout
+    '''
+    def __init__(self, argv, returncode, stdout, stderr = b"", timed_out = False, truncated = False):
+        self.argv = argv
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.truncated = truncated
+
+    @property
+    def output(self):
+        '''
+        stdout decoded the way the checkers always did
+        '''
+        return self.stdout.decode("utf-8", errors="ignore")
+
+
+def command_kind(argv):
+    '''
+    the name a command is accounted under, "git show", "python3 cpplint.py", "shellcheck"
+    '''
+    kind = os.path.basename(argv[0])
+    if kind == "git":
+        index = 1
+        # skip the global options, -C and -c take a value
+        while index < len(argv) and argv[index].startswith("-"):
+            index += 2 if argv[index] in ["-C", "-c"] else 1
+        if index < len(argv):
+            kind += " " + argv[index]
+    elif kind.startswith("python"):
+        scripts = [x for x in argv[1:] if x.endswith(".py")]
+        if scripts:
+            kind += " " + os.path.basename(scripts[0])
+    return kind
+
+def run_command(argv, cwd = None, timeout = None, merge_stderr = True, input = None, max_output = None, kind = None):
+    '''
+    Run argv directly, without a shell, and capture its output.
+    timeout: seconds, the command is killed when it runs longer, default COMMAND_TIMEOUT, 0 means no limit
+    merge_stderr: True like stderr=subprocess.STDOUT, False to capture stderr separately
+    input: bytes written to stdin, stdin is /dev/null otherwise
+    max_output: bytes kept of each stream, the rest is read and dropped, default COMMAND_MAX_OUTPUT
+    A command that can not be started returns 127 and the error as output, like bash does.
+    Every call is accounted under kind for --stats and traced with --trace.
+    '''
+    argv = [str(x) for x in argv]
+    kind = kind or command_kind(argv)
+    timeout = COMMAND_TIMEOUT if timeout is None else timeout
+    max_output = COMMAND_MAX_OUTPUT if max_output is None else max_output
+    start = time.time()
+    try:
+        process = subprocess.Popen(argv, cwd=cwd, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE)
+    except OSError as e:
+        message = "{}: {}\n".format(argv[0], e.strerror or e).encode("utf-8")
+        result = CommandResult(argv, 127, message if merge_stderr else b"", b"" if merge_stderr else message)
+        _account(kind, argv, start, result)
+        return result
+    captured = {}
+    captured_size = {}
+    truncated = False
+    timed_out = False
+    selector = selectors.DefaultSelector()
+    for stream in [process.stdout, process.stderr]:
+        if stream:
+            selector.register(stream, selectors.EVENT_READ)
+            captured[stream] = []
+            captured_size[stream] = 0
+    input_view = memoryview(input) if input is not None else None
+    input_offset = 0
+    if input is not None:
+        if input:
+            selector.register(process.stdin, selectors.EVENT_WRITE)
+        else:
+            process.stdin.close()
+    deadline = start + timeout if timeout else None
+    try:
+        while selector.get_map():
+            remaining = deadline - time.time() if deadline else None
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                process.kill()
+                break
+            for key, _events in selector.select(remaining):
+                if key.fileobj is process.stdin:
+                    try:
+                        input_offset += os.write(key.fd, input_view[input_offset:input_offset + _READ_SIZE])
+                    except BrokenPipeError:
+                        input_offset = len(input_view)
+                    if input_offset >= len(input_view):
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                    continue
+                data = os.read(key.fd, _READ_SIZE)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                kept = captured_size[key.fileobj]
+                if kept + len(data) > max_output:
+                    truncated = True
+                    data = data[:max(0, max_output - kept)]
+                if data:
+                    captured[key.fileobj].append(data)
+                    captured_size[key.fileobj] += len(data)
+    except BaseException:
+        # interrupted, by ctrl-c or --max-rss, do not wait for the command to finish on its own
+        process.kill()
+        raise
+    finally:
+        selector.close()
+        for stream in [process.stdin, process.stdout, process.stderr]:
+            if stream and not stream.closed:
+                stream.close()
+        process.wait()
+    if timed_out:
+        sys.stderr.write("{} timed out after {} seconds and was killed\n".format(" ".join(argv), timeout))
+    result = CommandResult(argv, process.returncode, b"".join(captured[process.stdout]),
+                           b"".join(captured[process.stderr]) if process.stderr else b"", timed_out, truncated)
+    _account(kind, argv, start, result)
+    return result
+
+def start_command(argv, cwd = None, kind = None, stdin_pipe = True, stderr = None):
+    '''
+    Start a long-lived command, such as git cat-file --batch, the caller writes to its stdin and reads its stdout
+    as it comes, such as a large git diff.
+    stdin_pipe: False for a command that reads nothing, its stdin is /dev/null
+    stderr: a file to write stderr to, default the stderr of sast
+    It is accounted as one call when finish_command ends it, or
+    finish_running_commands at the end of the run or of a pool task.
+    OSError is raised if it can not be started, the caller falls back to run_command.
+    '''
+    argv = [str(x) for x in argv]
+    process = subprocess.Popen(argv, cwd=cwd, stdin=subprocess.PIPE if stdin_pipe else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=stderr)
+    process.sast_kind = kind or command_kind(argv)
+    process.sast_start = time.time()
+    _running.append(process)
+    return process
+
+def finish_command(process):
+    '''
+    close the pipes of a command of start_command, so it exits, and account it
+    return its returncode
+    '''
+    if process not in _running:
+        return process.returncode
+    _running.remove(process)
+    for stream in [process.stdin, process.stdout]:
+        try:
+            if stream:
+                stream.close()
+        except OSError:
+            pass
+    try:
+        process.wait(timeout=COMMAND_TIMEOUT or None)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    _account(process.sast_kind, process.args, process.sast_start, CommandResult(process.args, process.returncode, b""))
+    return process.returncode
+
+def finish_running_commands():
+    for process in list(_running):
+        finish_command(process)
+
+def forget_running_commands():
+    '''
+    A forked pool worker inherits the long-lived commands of the main process, they belong to the main process.
+    The worker closes its copies of their pipes, or they would not see the end of their input when the main process closes it.
+    '''
+    for process in _running:
+        for stream in [process.stdin, process.stdout]:
+            try:
+                if stream:
+                    stream.close()
+            except OSError:
+                pass
+    del _running[:]
+
+def _account(kind, argv, start, result):
+    end = time.time()
+    _stats.append((kind, (end - start) * 1000, result.returncode, result.timed_out))
+    trace.add_span(kind, "subprocess", start, end, cmd=" ".join(argv)[:500], returncode=result.returncode)
+
+def take_stats():
+    '''
+    return the accounting records of this process and clear them, pool workers hand them to the main process
+    '''
+    records = list(_stats)
+    del _stats[:]
+    return records
+
+def merge_stats(records):
+    _stats.extend(records)
+
+def format_stats(records = None):
+    '''
+    return the summary table of the commands run, per kind: calls, total ms, p95 ms, max ms, timeouts
+    '''
+    records = _stats if records is None else records
+    kinds = {}
+    for kind, elapsed_ms, _returncode, timed_out in records:
+        kinds.setdefault(kind, []).append((elapsed_ms, timed_out))
+    lines = ["{:<32} {:>7} {:>11} {:>9} {:>9} {:>9}".format("command", "calls", "total ms", "p95 ms", "max ms", "timeouts")]
+    total_calls = 0
+    total_ms = 0
+    for kind, calls in sorted(kinds.items(), key=lambda x: -sum(y[0] for y in x[1])):
+        durations = sorted(x[0] for x in calls)
+        p95 = durations[max(0, math.ceil(len(durations) * 0.95) - 1)]
+        lines.append("{:<32} {:>7} {:>11.1f} {:>9.1f} {:>9.1f} {:>9}".format(
+            kind[:32], len(calls), sum(durations), p95, durations[-1], sum(1 for x in calls if x[1])))
+        total_calls += len(calls)
+        total_ms += sum(durations)
+    lines.append("{:<32} {:>7} {:>11.1f}".format("total", total_calls, total_ms))
+    return "\n".join(lines)
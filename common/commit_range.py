@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.diff_index import DiffLines
+
+
+def parse_commit_range(commit_range):
+    '''
+    return (A, B) of "A..B", a missing side is HEAD like git log does
+    '''
+    if "..." in commit_range or ".." not in commit_range:
+        raise Exception("--range must be like A..B, not {}".format(commit_range))
+    left, right = commit_range.split("..", 1)
+    return left or "HEAD", right or "HEAD"
+
+def map_line(number, removed, inserted):
+    '''
+    return the number after a change of a line the change kept, removed are the sorted numbers of the
+    lines it removed before the change and inserted the sorted numbers of the lines it inserted after it.
+    Swap removed and inserted to map a line back.
+    '''
+    # the rank of the line among the kept lines is the same on both sides
+    rank = number - bisect_left(removed, number)
+    result = rank
+    while True:
+        shifted = rank + bisect_right(inserted, result)
+        if shifted == result:
+            return result
+        result = shifted
+
+
+class _FileState(object):
+    '''
+    One file through the commits of the range, it moves with renames
+    '''
+    def __init__(self, origin_path):
+        # the path at A, None if a commit of the range created the file
+        self.origin_path = origin_path
+        self.deleted = False
+        # a copy of origin_path, which is still there
+        self.copied = False
+        # {line number now: (commit, text)} of the lines added in the range and still there
+        self.lines = {}
+        # (removed, inserted) line numbers of every commit that changed the file, oldest first
+        self.changes = []
+        # (line number at A, text) of the lines of A deleted in the range
+        self.deleted_lines = []
+
+    def apply(self, commit, record):
+        removed = record["del"].numbers
+        inserted = record["add"].numbers
+        for number, text in record["del"]:
+            if number not in self.lines:
+                self.deleted_lines.append((self._origin_number(number), text))
+        lines = {}
+        for number, value in self.lines.items():
+            if not record["del"].has_line(number):
+                lines[map_line(number, removed, inserted)] = value
+        for number, text in record["add"]:
+            lines[number] = (commit, text)
+        self.lines = lines
+        self.changes.append((removed, inserted))
+
+    def copy(self):
+        state = _FileState(self.origin_path)
+        state.lines = dict(self.lines)
+        state.changes = list(self.changes)
+        state.deleted_lines = list(self.deleted_lines)
+        return state
+
+    def _origin_number(self, number):
+        # a line of A that is still there, map it back through the commits before
+        for removed, inserted in reversed(self.changes):
+            number = map_line(number, inserted, removed)
+        return number
+
+
+class CommitRange(object):
+    '''
+    Fold the commits of git log -p --reverse A..B, one after another, into the diff of A..B.
+    Every added line that is still in B knows the commit that added it, for per-commit reports.
+    '''
+    def __init__(self):
+        # [{"commit":..., "author":..., "message":..., "files":[...]}], oldest first
+        self.commits = []
+        self.states = {}
+        # files deleted in the range, their paths may be used again
+        self.removed_states = []
+        self.order = []
+
+    def add_commit(self, commit_info, records):
+        '''
+        commit_info: {"commit":..., "author":..., "message":...}
+        records: {file path: record} of the diff of the commit, like Local.get_diff
+        '''
+        commit_info = dict(commit_info)
+        commit_info["files"] = list(records)
+        self.commits.append(commit_info)
+        for file_path, record in records.items():
+            if record["type"] == "rename":
+                state = self.states.pop(record["old_path"], None) or _FileState(record["old_path"])
+            elif record["type"] == "copy":
+                # the lines the range added to the source are added to the copy too, by the same commits
+                source = self.states.get(record["old_path"])
+                state = source.copy() if source else _FileState(record["old_path"])
+                state.copied = state.origin_path is not None
+            elif record["type"] == "add":
+                if file_path in self.states:
+                    self.removed_states.append(self.states.pop(file_path))
+                state = _FileState(None)
+            else:
+                state = self.states.get(file_path) or _FileState(file_path)
+            state.apply(commit_info["commit"], record)
+            if record["type"] == "delete":
+                state.deleted = True
+            self.states[file_path] = state
+            if file_path not in self.order:
+                self.order.append(file_path)
+
+    def get_diff_info(self):
+        '''
+        return the diff of A..B like Local.get_diff, the added lines are numbered as in B and the deleted lines as in A
+        '''
+        result = {}
+        for file_path, state in self._final_states():
+            if state.deleted:
+                if state.origin_path is not None and not state.copied:
+                    result[state.origin_path] = {"add":DiffLines(),"del":self._deleted_lines(state),"type":"delete","old_path":state.origin_path}
+                continue
+            add_lines = DiffLines((x, state.lines[x][1]) for x in sorted(state.lines))
+            if state.origin_path is None:
+                result[file_path] = {"add":add_lines,"del":DiffLines(),"type":"add","old_path":""}
+            else:
+                if state.copied:
+                    change_type = "copy"
+                else:
+                    change_type = "modify" if state.origin_path == file_path else "rename"
+                result[file_path] = {"add":add_lines,"del":self._deleted_lines(state),"type":change_type,"old_path":state.origin_path}
+        return result
+
+    def get_line_commits(self):
+        '''
+        return {file path: {line number in B: commit}} of the lines added in the range
+        '''
+        return {x: {y: z[0] for y, z in state.lines.items()} for x, state in self._final_states() if not state.deleted}
+
+    def get_add_or_changed_files(self):
+        return tuple(x for x, state in self._final_states() if not state.deleted)
+
+    def get_add_files(self):
+        return tuple(x for x, state in self._final_states() if not state.deleted and state.origin_path is None)
+
+    def _final_states(self):
+        for state in self.removed_states:
+            yield state.origin_path, state
+        for file_path in self.order:
+            if file_path in self.states:
+                yield file_path, self.states[file_path]
+
+    def _deleted_lines(self, state):
+        return DiffLines(sorted(state.deleted_lines, key=lambda x: x[0]))
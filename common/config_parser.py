@@ -2,18 +2,13 @@
 #
 # Copyright 2023-2025 Enflame. All Rights Reserved.
 #
-from ntpath import isfile
 import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
 # Get the directory containing this file (common directory)
 COMMON_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
@@ -21,19 +16,6 @@ REPO_DIR = COMMON_DIR.parent
 import time
 import codecs
 
-try:
-    import requests
-except ImportError as e:
-    ORANGE = '\033[38;5;172m'
-    RED = '\033[31m'
-    ENDC = '\033[0m'
-    print(RED+str(e)+ENDC)
-    matchObj = re.match( r'No module named \'(.*)\'', str(e))
-    if matchObj:
-        print (RED+"may you install with command:"+ENDC)
-        print (ORANGE+"\tpython3 -m pip install {}".format(matchObj.group(1))+ENDC)
-    exit(1)
-
 CONFIG_FILE = str(REPO_DIR / 'config/sast.json')
 JSON_DICT = dict()
 
@@ -61,12 +43,36 @@ SAST_ITENS_DICT = JSON_DICT.get("sast_items_dict")
 
 CHECKS_GROUP = JSON_DICT.get("checks_group") or {}
 
+def reload_config(directory):
+    '''
+    Load config/sast.json and the .sast_config.json of directory again, used by the sast server
+    which serves many repos from one process.
+    The dicts are updated in place, so modules that did "from common.config_parser import *" see the new values.
+    '''
+    global custom_config
+    json_dict = CommonUtil().load_json(CONFIG_FILE)
+    custom_config = os.path.join(directory, ".sast_config.json")
+    if os.path.isfile(custom_config):
+        json_dict.update(CommonUtil().load_json(custom_config))
+    SAST_ITENS_DICT.clear()
+    SAST_ITENS_DICT.update(json_dict.get("sast_items_dict") or {})
+    CHECKS_GROUP.clear()
+    CHECKS_GROUP.update(json_dict.get("checks_group") or {})
+    json_dict["sast_items_dict"] = SAST_ITENS_DICT
+    json_dict["checks_group"] = CHECKS_GROUP
+    JSON_DICT.clear()
+    JSON_DICT.update(json_dict)
+
 
 API_TYPE_LOCALGIT = "localgit"
 
 DIFF_TYPE_FULL="full"
 DIFF_TYPE_INCREMENT = "increment"
 DIFF_TYPE_WORKSPACE = "workspace"
+# the index against HEAD, what git commit would commit
+DIFF_TYPE_STAGED = "staged"
+# set by --range A..B, the commits of the range are folded into one diff and every file is checked once as it is in B
+DIFF_TYPE_RANGE = "range"
 
 GIT_NULL_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
 
@@ -88,15 +94,44 @@ else:
     CLIGHT = "\033[2m"
 
 SERIALIZED_FILE_NAME = ".static_check_cache"
+# bump it when the content of the serialized run context changes
+SERIALIZED_FILE_VERSION = 2
 
 FILE_CHANGE_TYPE_ADD = "add"
 FILE_CHANGE_TYPE_DELETE = "delete"
 FILE_CHANGE_TYPE_RENAME = "rename"
 FILE_CHANGE_TYPE_MODIFY = "modify"
+FILE_CHANGE_TYPE_COPY = "copy"
+
+# percent of similarity for git to take a moved file for a rename, so only its changed lines are checked, 0 disables it
+RENAME_SIMILARITY=int(os.getenv("SAST_RENAME_SIMILARITY",50))
+# also take a new file that is similar to a changed one for a copy of it
+COPY_DETECTION=os.getenv("SAST_COPY_DETECTION","true") == "true"
 
 CHECK_LEVEL=os.getenv("CHECK_LEVEL","Fail")
 
+SAST_SOCKET=os.getenv("SAST_SOCKET",os.path.join("/tmp","sast-{}.sock".format(os.getuid())))
+
 LINES_LIMIT=int(os.getenv("LINES_LIMIT",2000))
 
+# seconds an external command may run before it is killed, 0 means no limit
+COMMAND_TIMEOUT=int(os.getenv("COMMAND_TIMEOUT",600))
+# bytes of output kept per external command, the rest is read and dropped
+COMMAND_MAX_OUTPUT=int(os.getenv("COMMAND_MAX_OUTPUT",256*1024*1024))
+
+# per-file findings of the lint tools, shared by every repo and CI workspace of the user, 0 size disables it
+FINDINGS_CACHE_DIR=os.getenv("SAST_FINDINGS_CACHE",os.path.join(os.path.expanduser("~"),".cache","sast","findings"))
+FINDINGS_CACHE_SIZE=int(os.getenv("SAST_FINDINGS_CACHE_SIZE",64*1024*1024))
+# bump it when the content of a findings cache entry changes
+FINDINGS_CACHE_VERSION = 1
+
+# cpplint checks a changed file of at least this many bytes only around its added lines, such findings are not cached, 0 turns it off
+CPPLINT_DIFF_SCOPE_SIZE=int(os.getenv("SAST_CPPLINT_DIFF_SCOPE_SIZE",128*1024))
+
+# "python" reads git objects from the .git directory without starting git, "cli" asks git cat-file for every object
+GIT_OBJECT_READER=os.getenv("SAST_GIT_OBJECT_READER","python")
+# bytes of delta bases the python git object reader keeps resolved
+GIT_DELTA_CACHE_SIZE=int(os.getenv("SAST_GIT_DELTA_CACHE_SIZE",32*1024*1024))
+
 CI_USER = os.getenv("CI_ARTIFACT_username")
 CI_PWD = os.getenv("CI_ARTIFACT")
\ No newline at end of file
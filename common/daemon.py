@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import io
+import os
+import sys
+import json
+import stat
+import signal
+import socket
+import struct
+import importlib
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.config_parser import reload_config
+from common import registry
+
+# a frame is 1 byte type, 4 bytes big-endian length, then the payload
+FRAME_OUTPUT = b"o"
+FRAME_EXIT = b"x"
+FRAME_HEADER = struct.Struct(">cI")
+
+
+def _send_frame(conn, frame_type, payload):
+    conn.sendall(FRAME_HEADER.pack(frame_type, len(payload)) + payload)
+
+def _recv_exactly(conn, size):
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def _socket_in_use(socket_path):
+    '''
+    return True if a server answers on socket_path, a socket left by a killed server refuses the connection
+    '''
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        conn.close()
+    return True
+
+
+class _FrameWriter(io.TextIOBase):
+    '''
+    stdout/stderr of a request, every write is sent to the client as an output frame
+    '''
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, text):
+        if text:
+            _send_frame(self.conn, FRAME_OUTPUT, text.encode("utf-8", errors="ignore"))
+        return len(text)
+
+    def isatty(self):
+        return False
+
+
+class SastServer():
+    '''
+    Resident sast process for pre-commit hooks and IDE on-save checks.
+    Interpreter, config, checker modules, codespell dictionaries and cpplint are loaded once at start,
+    every request is then served in a forked child, so it starts warm and can not leak state into the next one.
+    Output of the check is forwarded to the client, tool subprocesses are captured by run_command.
+    Colors follow NO_COLOR of the server environment.
+    '''
+    def __init__(self, socket_path, handler):
+        '''
+        handler(argv) runs one check like the command line and returns the exit code
+        '''
+        self.socket_path = socket_path
+        self.handler = handler
+
+    def warm_up(self):
+        from common.static_check_common import import_tool
+        checkers_dir = str(registry.CHECKERS_DIR)
+        if checkers_dir not in sys.path:
+            sys.path.append(checkers_dir)
+        for entry in registry.get_checkers():
+            importlib.import_module(entry["module"])
+        import_tool("codespell").load_builtin_dicts()
+        import_tool("cpplint")
+
+    def serve_forever(self):
+        if os.path.lexists(self.socket_path):
+            if not stat.S_ISSOCK(os.lstat(self.socket_path).st_mode):
+                print("{} exists and is not a socket, the sast server is not started".format(self.socket_path), flush=True)
+                sys.exit(1)
+            if _socket_in_use(self.socket_path):
+                print("another sast server is listening on {}, the sast server is not started".format(self.socket_path), flush=True)
+                sys.exit(1)
+            # left by a server that was killed
+            os.remove(self.socket_path)
+        self.warm_up()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(16)
+        # children are never waited for
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        # remove the socket on kill too
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        print("sast server is listening on {}".format(self.socket_path), flush=True)
+        try:
+            while True:
+                conn, _ = server.accept()
+                pid = os.fork()
+                if pid == 0:
+                    server.close()
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    exit_code = 1
+                    try:
+                        exit_code = self._handle(conn)
+                    finally:
+                        conn.close()
+                        os._exit(exit_code)
+                conn.close()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def _handle(self, conn):
+        request = json.loads(conn.makefile("rb").readline().decode("utf-8"))
+        os.chdir(request["cwd"])
+        reload_config(request["cwd"])
+        writer = _FrameWriter(conn)
+        sys.stdout = writer
+        sys.stderr = writer
+        try:
+            exit_code = self.handler(request["argv"])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            print(e)
+            exit_code = 1
+        finally:
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+        _send_frame(conn, FRAME_EXIT, str(exit_code).encode("utf-8"))
+        return 0
+
+
+def request(socket_path, argv, cwd = None):
+    '''
+    Send one check to the sast server and print its output
+    return the exit code of the check, None if the server is not reachable
+    '''
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        return None
+    try:
+        message = {"cwd": cwd or os.getcwd(), "argv": list(argv)}
+        conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        while True:
+            header = _recv_exactly(conn, FRAME_HEADER.size)
+            if header is None:
+                print("sast server closed the connection")
+                return 1
+            frame_type, size = FRAME_HEADER.unpack(header)
+            payload = _recv_exactly(conn, size) if size else b""
+            if payload is None:
+                print("sast server closed the connection")
+                return 1
+            if frame_type == FRAME_EXIT:
+                sys.stdout.flush()
+                return int(payload.decode("utf-8"))
+            sys.stdout.write(payload.decode("utf-8", errors="ignore"))
+    finally:
+        conn.close()
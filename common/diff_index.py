@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+HUNK_HEADER_PATTERN = re.compile(rb"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# escapes of the C style quoted paths of git, the rest are octal
+QUOTED_PATH_ESCAPES = {ord("a"): 7, ord("b"): 8, ord("t"): 9, ord("n"): 10, ord("v"): 11, ord("f"): 12, ord("r"): 13,
+                       ord('"'): 34, ord("\\"): 92}
+
+
+def _unquote_diff_path(path):
+    '''
+    return the path of a "--- " or "+++ " line as str, such as "a/src/x.cc".
+    git quotes paths with special characters like C strings and ends paths with spaces with a tab.
+    '''
+    if path.endswith(b"\t"):
+        path = path[:-1]
+    if not (len(path) > 1 and path.startswith(b'"') and path.endswith(b'"')):
+        return path.decode("utf-8", errors="ignore")
+    result = bytearray()
+    index = 1
+    while index < len(path) - 1:
+        char = path[index]
+        index += 1
+        if char != ord("\\"):
+            result.append(char)
+        elif path[index:index + 3].isdigit():
+            result.append(int(path[index:index + 3], 8) & 0xff)
+            index += 3
+        else:
+            result.append(QUOTED_PATH_ESCAPES.get(path[index], path[index]))
+            index += 1
+    return result.decode("utf-8", errors="ignore")
+
+
+class DiffLines(object):
+    '''
+    The added or deleted lines of one file of a diff, the "add" and "del" of a diff record.
+    The line numbers are a sorted array('I'), the texts are kept as utf-8 bytes in one buffer and decoded when
+    they are read, so a large diff holds no tuple, int or str per line.
+    It reads like the list of (line number, text) tuples it replaces, iterating, indexing and len() work as before,
+    and adds has_line() in constant time and lines_in_range().
+    '''
+    __slots__ = ("numbers", "_offsets", "_buffer", "_bitset")
+
+    def __init__(self, lines = None):
+        self.numbers = array("I")
+        # text i is _buffer[_offsets[i]:_offsets[i + 1]]
+        self._offsets = array("I", [0])
+        self._buffer = bytearray()
+        self._bitset = None
+        for number, text in lines or []:
+            self.append(number, text)
+
+    def append(self, number, text):
+        '''
+        add a line, the numbers must come in ascending order like they do in a diff, text is bytes or str
+        '''
+        if self.numbers and number < self.numbers[-1]:
+            raise ValueError("line {} added after line {}".format(number, self.numbers[-1]))
+        self.numbers.append(number)
+        self._buffer += text if isinstance(text, bytes) else text.encode("utf-8")
+        self._offsets.append(len(self._buffer))
+        self._bitset = None
+
+    def text(self, index):
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].decode("utf-8", errors="ignore")
+
+    def has_line(self, number):
+        '''
+        return True if line number is in the lines, a bitset of the numbers is built on the first call
+        '''
+        if self._bitset is None:
+            bitset = bytearray((self.numbers[-1] >> 3) + 1 if self.numbers else 0)
+            for line_number in self.numbers:
+                bitset[line_number >> 3] |= 1 << (line_number & 7)
+            self._bitset = bitset
+        return 0 <= number < len(self._bitset) * 8 and bool(self._bitset[number >> 3] & (1 << (number & 7)))
+
+    def lines_in_range(self, first, last):
+        '''
+        return the (line number, text) of the lines from first to last, both included
+        '''
+        start = bisect_left(self.numbers, first)
+        end = bisect_right(self.numbers, last)
+        return [(self.numbers[x], self.text(x)) for x in range(start, end)]
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __iter__(self):
+        for index, number in enumerate(self.numbers):
+            yield number, self.text(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [(self.numbers[x], self.text(x)) for x in range(*index.indices(len(self.numbers)))]
+        if index < 0:
+            index += len(self.numbers)
+        return self.numbers[index], self.text(index)
+
+    def __eq__(self, other):
+        if isinstance(other, DiffLines):
+            return self.numbers == other.numbers and self._buffer == other._buffer and self._offsets == other._offsets
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "DiffLines({!r})".format(list(self))
+
+    def __getstate__(self):
+        # the bitset is rebuilt when it is needed, it is not worth pickling with the run context
+        return {"numbers": self.numbers, "_offsets": self._offsets, "_buffer": self._buffer}
+
+    def __setstate__(self, state):
+        self.numbers = state["numbers"]
+        self._offsets = state["_offsets"]
+        self._buffer = state["_buffer"]
+        self._bitset = None
+
+
+def get_diff_lines(diff_info, file_path, side = "add"):
+    '''
+    return the DiffLines of file_path in diff_info, side is "add" or "del", empty if the file did not change
+    '''
+    lines = diff_info.get(file_path, {}).get(side)
+    return lines if isinstance(lines, DiffLines) else DiffLines(lines)
+
+
+def iter_diff_records(lines):
+    '''
+    Parse the output of git diff or git show in one pass.
+    lines: the byte lines, such as the stdout pipe of git, it is read as the records are consumed
+    yield (file_path, record) when the last line of a file was read, record is like a value of Local.get_diff,
+    its "add" and "del" are DiffLines that keep the text undecoded until it is read.
+    The line counts of each hunk header tell where the hunk ends, so a content line such as "--- a" is not a header.
+    A rename or copy is a record of type "rename" or "copy" with the old path, its "add" has only the lines that differ
+    from the old file, none if the file was moved as it is.
+    Other files without a "+++ " line, such as binary files, have no record.
+    '''
+    file_path = None
+    record = None
+    in_file = False
+    minus_path = None
+    del_number = add_number = 0
+    del_left = add_left = 0
+    for line in lines:
+        if line.endswith(b"\n"):
+            line = line[:-1]
+        if del_left > 0 or add_left > 0:
+            tag = line[:1]
+            if tag == b"+":
+                if record is not None:
+                    record["add"].append(add_number, line[1:])
+                add_number += 1
+                add_left -= 1
+            elif tag == b"-":
+                if record is not None:
+                    record["del"].append(del_number, line[1:])
+                del_number += 1
+                del_left -= 1
+            elif tag != b"\\":
+                # a context line, "\ No newline at end of file" is no line of either side
+                add_number += 1
+                del_number += 1
+                add_left -= 1
+                del_left -= 1
+            continue
+        if line.startswith(b"diff --git "):
+            if record is not None:
+                yield file_path, record
+            file_path = None
+            record = None
+            in_file = True
+            minus_path = None
+            continue
+        if not in_file:
+            continue
+        if line.startswith(b"rename from ") or line.startswith(b"copy from "):
+            minus_path = "a/" + _unquote_diff_path(line.split(b" from ", 1)[1])
+        elif line.startswith(b"rename to ") or line.startswith(b"copy to "):
+            # the headers of a moved file come before its "--- " and "+++ " lines, a file moved as it is has none
+            file_path = _unquote_diff_path(line.split(b" to ", 1)[1])
+            record = {"add":DiffLines(),"del":DiffLines(),"type":"rename" if line.startswith(b"rename") else "copy",
+                      "old_path":minus_path[2:] if minus_path else ""}
+        elif line.startswith(b"--- "):
+            minus_path = _unquote_diff_path(line[4:])
+        elif line.startswith(b"+++ ") and minus_path is not None and record is None:
+            plus_path = _unquote_diff_path(line[4:])
+            if plus_path == "/dev/null":
+                if minus_path.startswith("a/"):
+                    file_path = minus_path[2:]
+                    record = {"add":DiffLines(),"del":DiffLines(),"type":"delete","old_path":file_path}
+            elif plus_path.startswith("b/"):
+                file_path = plus_path[2:]
+                if minus_path == "/dev/null":
+                    record = {"add":DiffLines(),"del":DiffLines(),"type":"add","old_path":""}
+                elif minus_path.startswith("a/"):
+                    old_path = minus_path[2:]
+                    record = {"add":DiffLines(),"del":DiffLines(),"type":"modify" if old_path == file_path else "rename","old_path":old_path}
+        elif line.startswith(b"@@ "):
+            match = HUNK_HEADER_PATTERN.match(line)
+            if match:
+                del_number = int(match.group(1))
+                add_number = int(match.group(3))
+                del_left = int(match.group(2) or 1)
+                add_left = int(match.group(4) or 1)
+    if record is not None:
+        yield file_path, record
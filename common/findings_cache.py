@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.config_parser import FINDINGS_CACHE_DIR, FINDINGS_CACHE_SIZE, FINDINGS_CACHE_VERSION
+from common.command import run_command
+
+# "<tool> --version" output of this process, the tools do not change during a run
+_command_versions = {}
+
+
+def get_blob_sha(file_path):
+    '''
+    return the git blob SHA of the file in the working tree, same as "git hash-object <file_path>"
+    None if the file can not be read
+    '''
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    blob_sha = hashlib.sha1()
+    blob_sha.update("blob {}\0".format(len(content)).encode("utf-8"))
+    blob_sha.update(content)
+    return blob_sha.hexdigest()
+
+def get_file_version(*file_paths):
+    '''
+    return the hash of the content of the files, for tools and configs that live in files
+    a missing file hashes differently from an empty one
+    '''
+    file_version = hashlib.sha1()
+    for file_path in file_paths:
+        file_version.update(str(file_path).encode("utf-8") + b"\0")
+        if file_path and os.path.isfile(str(file_path)):
+            with open(str(file_path), 'rb') as f:
+                file_version.update(f.read())
+        else:
+            file_version.update(b"missing\0")
+    return file_version.hexdigest()
+
+def get_command_version(argv):
+    '''
+    return the output of a version command such as ["shellcheck", "--version"]
+    None if the command fails, such as the tool is not installed
+    '''
+    command = tuple(argv)
+    if command not in _command_versions:
+        command_result = run_command(argv)
+        _command_versions[command] = command_result.output.strip() if command_result.returncode == 0 else None
+    return _command_versions[command]
+
+
+class FindingsCache():
+    '''
+    Per-file findings of a lint tool on disk, addressed by content instead of by commit.
+    An entry is keyed by checker name, hash of the checker's sast_items_dict entry, tool version,
+    file path and git blob SHA, so rebases, cherry-picks and CI reruns reuse the findings of blobs
+    seen before. Checkers still filter the cached findings against the added lines of the current diff.
+    Every entry is one JSON file, the least recently used ones are removed when the directory
+    grows over max_size bytes.
+    '''
+    def __init__(self, check_name, check_config, tool_version, cache_dir = None, max_size = None):
+        '''
+        tool_version None disables the cache, such as when the tool is not installed
+        '''
+        self.check_name = check_name
+        self.tool_version = tool_version
+        self.cache_dir = cache_dir or FINDINGS_CACHE_DIR
+        self.max_size = FINDINGS_CACHE_SIZE if max_size is None else max_size
+        self.enabled = tool_version is not None and self.max_size > 0
+        self.config_hash = hashlib.sha1(json.dumps(check_config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        self.blob_shas = {}
+        self.written = False
+
+    def _entry_path(self, file_path, extra):
+        if not self.enabled:
+            return None
+        # a miss is followed by a put of the same file, hash it once
+        if file_path not in self.blob_shas:
+            self.blob_shas[file_path] = get_blob_sha(file_path)
+        blob_sha = self.blob_shas[file_path]
+        if blob_sha is None:
+            return None
+        # the path is part of the key, tools like cpplint report differently by path, such as header guards
+        key = json.dumps([FINDINGS_CACHE_VERSION, self.check_name, self.config_hash, self.tool_version, file_path, blob_sha, extra])
+        key_hash = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key_hash[:2], key_hash + ".json")
+
+    def get(self, file_path, extra = None):
+        '''
+        return the cached findings of the file, None on a miss
+        extra is any other input of the tool for this file, such as the hash of its CPPLINT.cfg files
+        '''
+        entry_path = self._entry_path(file_path, extra)
+        if not entry_path:
+            return None
+        try:
+            with open(entry_path, mode='r', encoding='utf-8') as f:
+                findings = json.load(f)["findings"]
+            # mark it as recently used for eviction
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return findings
+
+    def put(self, file_path, findings, extra = None):
+        '''
+        findings must be JSON serializable, written to a temp file and renamed, so concurrent checkers never read a partial entry
+        '''
+        entry_path = self._entry_path(file_path, extra)
+        if not entry_path:
+            return
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".findings", dir=os.path.dirname(entry_path))
+            with os.fdopen(fd, mode='w', encoding='utf-8') as f:
+                json.dump({"check_name": self.check_name, "file": file_path, "findings": findings}, f)
+            os.replace(tmp_path, entry_path)
+            self.written = True
+        except OSError:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        '''
+        Remove the least recently used entries until the cache fits in max_size, only after this instance wrote something
+        '''
+        if not self.written or not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        total_size = 0
+        for sub_dir in os.scandir(self.cache_dir):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _mtime, size, entry_path in entries:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                # another checker removed it first
+                pass
+            total_size -= size
+            if total_size <= self.max_size:
+                break
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import re
+import sys
+import mmap
+import zlib
+import struct
+from collections import OrderedDict
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+from common.config_parser import GIT_DELTA_CACHE_SIZE
+
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+# trees parsed by path lookups, a run reads the same few directories for every file
+TREE_CACHE_COUNT = 256
+# bytes inflated at a time from a pack
+INFLATE_CHUNK = 64 * 1024
+# the first bytes of an object hold its header or the sizes of a delta
+HEADER_PEEK = 64
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+REVISION_SUFFIX_PATTERN = re.compile(r"([~^])(\d*)")
+
+
+def _read_varint(data, index):
+    '''
+    return (index after, value) of a size in the header of a delta, 7 bits per byte, the low bits first
+    '''
+    value = shift = 0
+    while True:
+        byte = data[index]
+        index += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return index, value
+
+def apply_delta(base, delta):
+    '''
+    return the object a git delta makes of its base, a delta is copies from the base and inserted bytes
+    '''
+    index, base_size = _read_varint(delta, 0)
+    index, result_size = _read_varint(delta, index)
+    if base_size != len(base):
+        raise ValueError("delta base is {} bytes, expect {}".format(len(base), base_size))
+    result = bytearray()
+    while index < len(delta):
+        op = delta[index]
+        index += 1
+        if op & 0x80:
+            offset = size = 0
+            for shift in range(4):
+                if op & (1 << shift):
+                    offset |= delta[index] << (8 * shift)
+                    index += 1
+            for shift in range(3):
+                if op & (0x10 << shift):
+                    size |= delta[index] << (8 * shift)
+                    index += 1
+            result += base[offset:offset + (size or 0x10000)]
+        elif op:
+            result += delta[index:index + op]
+            index += op
+        else:
+            raise ValueError("delta opcode 0 is reserved")
+    if len(result) != result_size:
+        raise ValueError("delta gives {} bytes, expect {}".format(len(result), result_size))
+    return bytes(result)
+
+def _inflate(buffer, offset, size = None):
+    '''
+    return the zlib stream of buffer at offset inflated, only the first size bytes if size is given
+    '''
+    decompressor = zlib.decompressobj()
+    result = bytearray()
+    while not decompressor.eof and offset < len(buffer) and (size is None or len(result) < size):
+        chunk = buffer[offset:offset + INFLATE_CHUNK]
+        offset += len(chunk)
+        result += decompressor.decompress(chunk)
+    if size is None and not decompressor.eof:
+        raise ValueError("truncated zlib stream")
+    return bytes(result) if size is None else bytes(result[:size])
+
+
+class Pack(object):
+    '''
+    One packfile and its index, both mapped into memory, the index is binary searched per object
+    '''
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-len(".idx")] + ".pack"
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:4] == b"\377tOc":
+            if struct.unpack(">I", self.idx[4:8])[0] != 2:
+                raise ValueError("pack index version {} is not supported".format(struct.unpack(">I", self.idx[4:8])[0]))
+            self.version = 2
+            fanout_start = 8
+        else:
+            self.version = 1
+            fanout_start = 0
+        self.fanout = struct.unpack(">256I", self.idx[fanout_start:fanout_start + 1024])
+        self.count = self.fanout[255]
+        self.table_start = fanout_start + 1024
+
+    def find(self, sha):
+        '''
+        return the offset in the pack of the binary sha, None if the pack does not have it
+        '''
+        low = self.fanout[sha[0] - 1] if sha[0] else 0
+        high = self.fanout[sha[0]]
+        # v1 entries are a 4 byte offset and the sha, v2 has a table of shas
+        entry_size, sha_start = (20, self.table_start) if self.version == 2 else (24, self.table_start + 4)
+        while low < high:
+            middle = (low + high) // 2
+            position = sha_start + middle * entry_size
+            current = self.idx[position:position + 20]
+            if current < sha:
+                low = middle + 1
+            elif current > sha:
+                high = middle
+            else:
+                return self._offset(middle)
+        return None
+
+    def _offset(self, position):
+        if self.version == 1:
+            start = self.table_start + position * 24
+            return struct.unpack(">I", self.idx[start:start + 4])[0]
+        start = self.table_start + self.count * 24 + position * 4
+        offset = struct.unpack(">I", self.idx[start:start + 4])[0]
+        if offset & 0x80000000:
+            # the large offsets of packs over 2 GB are in a table of 8 byte offsets
+            start = self.table_start + self.count * 28 + (offset & 0x7fffffff) * 8
+            offset = struct.unpack(">Q", self.idx[start:start + 8])[0]
+        return offset
+
+    def read_header(self, offset):
+        '''
+        return (type number, size, data offset, delta base) of the entry at offset,
+        the base is an offset in this pack for OFS_DELTA and a binary sha for REF_DELTA
+        '''
+        entry_offset = offset
+        byte = self.pack[offset]
+        offset += 1
+        type_number = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = self.pack[offset]
+            offset += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        base = None
+        if type_number == OFS_DELTA:
+            byte = self.pack[offset]
+            offset += 1
+            distance = byte & 0x7f
+            while byte & 0x80:
+                byte = self.pack[offset]
+                offset += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7f)
+            base = entry_offset - distance
+        elif type_number == REF_DELTA:
+            base = self.pack[offset:offset + 20]
+            offset += 20
+        return type_number, size, offset, base
+
+    def close(self):
+        self.idx.close()
+        self.pack.close()
+
+
+class ObjectStore(object):
+    '''
+    Read objects straight from the .git directory without starting git: loose objects, packfiles with their
+    deltas, and names such as "HEAD:a.cc", "HEAD^:a.cc" or a full object id.
+    Anything it does not support, such as the index (":a.cc"), abbreviated ids, SHA-256 repositories or objects a
+    partial clone has not fetched yet, gives None, the caller falls back to git cat-file then.
+    '''
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self.common_dir = git_dir
+        self.supported = True
+        self.object_dirs = []
+        self.packs = None
+        self.packs_mtime = None
+        # resolved delta bases keyed by (pack path, offset), bounded by GIT_DELTA_CACHE_SIZE bytes
+        self.delta_cache = OrderedDict()
+        self.delta_cache_size = 0
+        self.tree_cache = OrderedDict()
+        # the tree of a commit and the parsed packed-refs, commits never change and packed-refs is parsed again when it does
+        self.commit_trees = {}
+        self.packed_refs = None
+        self.packed_refs_stat = None
+        self._open()
+
+    def _open(self):
+        try:
+            if os.path.isfile(os.path.join(self.git_dir, "commondir")):
+                with open(os.path.join(self.git_dir, "commondir"), encoding="utf-8") as f:
+                    self.common_dir = os.path.join(self.git_dir, f.read().strip())
+            with open(os.path.join(self.common_dir, "config"), encoding="utf-8", errors="ignore") as f:
+                # other object formats and ref storages are for git to read
+                if re.search(r"^\s*(objectformat|refstorage)\s*=", f.read(), re.M | re.I):
+                    self.supported = False
+        except OSError:
+            self.supported = False
+        object_dir = os.path.join(self.common_dir, "objects")
+        self.object_dirs = [object_dir]
+        try:
+            with open(os.path.join(object_dir, "info", "alternates"), encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        self.object_dirs.append(line if os.path.isabs(line) else os.path.normpath(os.path.join(object_dir, line)))
+        except OSError:
+            pass
+
+    def __getstate__(self):
+        # mapped packs can not be pickled with the run context, the unpickled store maps them again
+        return {"git_dir": self.git_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state["git_dir"])
+
+    def _get_packs(self, refresh = False):
+        if self.packs is not None and not refresh:
+            return self.packs
+        mtime = []
+        for object_dir in self.object_dirs:
+            try:
+                mtime.append(os.stat(os.path.join(object_dir, "pack")).st_mtime_ns)
+            except OSError:
+                mtime.append(None)
+        if self.packs is not None and mtime == self.packs_mtime:
+            return self.packs
+        # git gc or a fetch wrote new packs
+        self.close()
+        self.packs = []
+        self.packs_mtime = mtime
+        for object_dir in self.object_dirs:
+            pack_dir = os.path.join(object_dir, "pack")
+            if not os.path.isdir(pack_dir):
+                continue
+            for name in sorted(os.listdir(pack_dir)):
+                if name.endswith(".idx"):
+                    try:
+                        self.packs.append(Pack(os.path.join(pack_dir, name)))
+                    except (OSError, ValueError):
+                        pass
+        return self.packs
+
+    def _find_packed(self, sha, refresh = False):
+        for pack in self._get_packs(refresh):
+            offset = pack.find(sha)
+            if offset is not None:
+                return pack, offset
+        return None
+
+    def _loose_path(self, sha_hex):
+        for object_dir in self.object_dirs:
+            path = os.path.join(object_dir, sha_hex[:2], sha_hex[2:])
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def read_object(self, sha_hex, header_only = False):
+        '''
+        return (type, size, content) of an object id, content is None if header_only, None if the object is not found
+        '''
+        sha = bytes.fromhex(sha_hex)
+        found = self._find_packed(sha)
+        if found is None:
+            path = self._loose_path(sha_hex)
+            if path:
+                with open(path, "rb") as f:
+                    data = f.read(HEADER_PEEK if header_only else -1)
+                data = _inflate(data, 0, HEADER_PEEK) if header_only else zlib.decompress(data)
+                header, _, content = data.partition(b"\0")
+                object_type, _, size = header.decode("ascii").partition(" ")
+                return object_type, int(size), None if header_only else content
+            # git gc or a fetch may have packed it since the packs were mapped
+            found = self._find_packed(sha, True)
+        if found is None:
+            return None
+        return self._read_packed(found[0], found[1], header_only)
+
+    def _read_packed(self, pack, offset, header_only = False):
+        type_number, size, data_offset, base = pack.read_header(offset)
+        if type_number in OBJECT_TYPES:
+            return OBJECT_TYPES[type_number], size, None if header_only else _inflate(pack.pack, data_offset)
+        if header_only:
+            # the size of the result is in the header of the delta, the type is the type of the last base
+            delta_header = _inflate(pack.pack, data_offset, HEADER_PEEK)
+            result_size = _read_varint(delta_header, _read_varint(delta_header, 0)[0])[1]
+            base_info = self._read_base(pack, base, True)
+            return base_info and (base_info[0], result_size, None)
+        # walk down the chain to a base that is an object or cached, then apply the deltas back up
+        chain = []
+        while type_number in [OFS_DELTA, REF_DELTA]:
+            chain.append((pack, offset, data_offset))
+            if type_number == REF_DELTA:
+                found = self._find_packed(base, True)
+                if found is None:
+                    # the base of a thin pack can be a loose object
+                    base_info = self.read_object(base.hex())
+                    if base_info is None:
+                        return None
+                    object_type, content = base_info[0], base_info[2]
+                    break
+                pack, offset = found
+            else:
+                offset = base
+            cached = self.delta_cache.get((pack.pack_path, offset))
+            if cached:
+                self.delta_cache.move_to_end((pack.pack_path, offset))
+                object_type, content = cached
+                break
+            type_number, size, data_offset, base = pack.read_header(offset)
+        else:
+            object_type, content = OBJECT_TYPES[type_number], _inflate(pack.pack, data_offset)
+            self._cache_base(pack, offset, object_type, content)
+        for index, (delta_pack, delta_offset, delta_data_offset) in enumerate(reversed(chain)):
+            content = apply_delta(content, _inflate(delta_pack.pack, delta_data_offset))
+            if index < len(chain) - 1:
+                self._cache_base(delta_pack, delta_offset, object_type, content)
+        return object_type, len(content), content
+
+    def _read_base(self, pack, base, header_only):
+        if isinstance(base, int):
+            return self._read_packed(pack, base, header_only)
+        return self.read_object(base.hex(), header_only)
+
+    def _cache_base(self, pack, offset, object_type, content):
+        if len(content) > GIT_DELTA_CACHE_SIZE // 4:
+            return
+        key = (pack.pack_path, offset)
+        if key in self.delta_cache:
+            return
+        self.delta_cache[key] = (object_type, content)
+        self.delta_cache_size += len(content)
+        while self.delta_cache_size > GIT_DELTA_CACHE_SIZE:
+            _key, (_type, evicted) = self.delta_cache.popitem(last=False)
+            self.delta_cache_size -= len(evicted)
+
+    def _read_ref(self, ref):
+        '''
+        return the object id a ref such as "HEAD" or "refs/heads/master" points to, following symbolic refs
+        '''
+        for _ in range(10):
+            value = None
+            # HEAD and the other per worktree refs are in the git dir, the shared ones in the common dir
+            for ref_dir in [self.git_dir, self.common_dir]:
+                try:
+                    with open(os.path.join(ref_dir, ref), encoding="utf-8") as f:
+                        value = f.read().strip()
+                    break
+                except OSError:
+                    continue
+            if value is None:
+                return self._read_packed_ref(ref)
+            if not value.startswith("ref:"):
+                return value if SHA_PATTERN.match(value) else None
+            ref = value[len("ref:"):].strip()
+        return None
+
+    def _read_packed_ref(self, ref):
+        path = os.path.join(self.common_dir, "packed-refs")
+        try:
+            stat_result = os.stat(path)
+            if (stat_result.st_mtime_ns, stat_result.st_size) != self.packed_refs_stat:
+                packed_refs = {}
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        items = line.strip().split(" ")
+                        if len(items) == 2:
+                            packed_refs[items[1]] = items[0]
+                self.packed_refs = packed_refs
+                self.packed_refs_stat = (stat_result.st_mtime_ns, stat_result.st_size)
+        except OSError:
+            return None
+        return self.packed_refs.get(ref)
+
+    def _resolve_base_revision(self, name):
+        if SHA_PATTERN.match(name):
+            return name
+        if not name or name.startswith("-") or ".." in name:
+            return None
+        # the order of git rev-parse, see gitrevisions(7)
+        for ref in [name, "refs/" + name, "refs/tags/" + name, "refs/heads/" + name,
+                    "refs/remotes/" + name, "refs/remotes/{}/HEAD".format(name)]:
+            sha = self._read_ref(ref)
+            if sha:
+                return sha
+        return None
+
+    def _peel(self, sha, object_type):
+        '''
+        return the id of the commit or tree sha is or points to through tags and commits
+        '''
+        for _ in range(10):
+            info = self.read_object(sha)
+            if info is None:
+                return None
+            if info[0] == object_type:
+                return sha
+            if info[0] == "tag":
+                match = re.match(rb"object ([0-9a-f]{40})", info[2])
+            elif info[0] == "commit" and object_type == "tree":
+                match = re.match(rb"tree ([0-9a-f]{40})", info[2])
+            else:
+                return None
+            if not match:
+                return None
+            sha = match.group(1).decode()
+        return None
+
+    def resolve_revision(self, revision):
+        '''
+        return the object id of a revision such as "HEAD", "master~2" or "v1.0^2", None if it is not supported
+        '''
+        match = re.match(r"^(.*?)((?:[~^]\d*)*)$", revision)
+        sha = self._resolve_base_revision(match.group(1))
+        for operator, number in REVISION_SUFFIX_PATTERN.findall(match.group(2)):
+            if sha is None:
+                return None
+            count = int(number) if number else 1
+            sha = self._peel(sha, "commit")
+            if sha is None:
+                return None
+            if operator == "^":
+                if count == 0:
+                    continue
+                parents = self._parents(sha)
+                sha = parents[count - 1] if len(parents) >= count else None
+            else:
+                for _ in range(count):
+                    parents = self._parents(sha)
+                    sha = parents[0] if parents else None
+                    if sha is None:
+                        break
+        return sha
+
+    def _parents(self, commit_sha):
+        info = self.read_object(commit_sha)
+        if info is None or info[0] != "commit":
+            return []
+        header = info[2].split(b"\n\n", 1)[0]
+        return [x[len(b"parent "):].decode() for x in header.split(b"\n") if x.startswith(b"parent ")]
+
+    def read_tree(self, tree_sha):
+        '''
+        return [(mode, type, object id, name)] of a tree, None if it is not found
+        '''
+        entries = self._read_tree_index(tree_sha)
+        return None if entries is None else list(entries.values())
+
+    def _read_tree_index(self, tree_sha):
+        '''
+        return {name: (mode, type, object id, name)} of a tree in the order of git, None if it is not found
+        '''
+        if tree_sha in self.tree_cache:
+            self.tree_cache.move_to_end(tree_sha)
+            return self.tree_cache[tree_sha]
+        info = self.read_object(tree_sha)
+        if info is None or info[0] != "tree":
+            return None
+        entries = OrderedDict()
+        data = info[2]
+        index = 0
+        while index < len(data):
+            space = data.index(b" ", index)
+            nul = data.index(b"\0", space)
+            mode = data[index:space].decode("ascii").rjust(6, "0")
+            object_type = "tree" if mode == "040000" else ("commit" if mode == "160000" else "blob")
+            name = data[space + 1:nul].decode("utf-8", errors="surrogateescape")
+            entries[name] = (mode, object_type, data[nul + 1:nul + 21].hex(), name)
+            index = nul + 21
+        self.tree_cache[tree_sha] = entries
+        if len(self.tree_cache) > TREE_CACHE_COUNT:
+            self.tree_cache.popitem(last=False)
+        return entries
+
+    def resolve(self, object_name):
+        '''
+        return (object id, type) of an object name like git cat-file takes it, None if it is not supported or not found
+        '''
+        if not self.supported:
+            return None
+        revision, colon, path = object_name.partition(":")
+        if not colon:
+            sha = self.resolve_revision(revision)
+            info = sha and self.read_object(sha, True)
+            return info and (sha, info[0])
+        if not revision:
+            # ":path" is the index
+            return None
+        sha = self.resolve_revision(revision)
+        if sha is None:
+            return None
+        if sha not in self.commit_trees:
+            if len(self.commit_trees) > TREE_CACHE_COUNT:
+                self.commit_trees.clear()
+            self.commit_trees[sha] = self._peel(sha, "tree")
+        sha = self.commit_trees[sha]
+        object_type = "tree"
+        for name in [x for x in path.split("/") if x]:
+            entries = sha and self._read_tree_index(sha)
+            if not entries or name not in entries:
+                return None
+            _mode, object_type, sha = entries[name][:3]
+        return sha and (sha, object_type)
+
+    def query(self, object_name, with_content = True):
+        '''
+        return (object id, type, size, content) like CatFile.query, content is None without with_content,
+        None where git has to answer
+        '''
+        try:
+            resolved = self.resolve(object_name)
+            if resolved is None or resolved[1] == "commit" and ":" in object_name:
+                # a submodule entry has no object in this repository
+                return None
+            info = self.read_object(resolved[0], not with_content)
+        except (OSError, ValueError, IndexError, zlib.error):
+            return None
+        if info is None:
+            return None
+        return resolved[0], info[0], info[1], info[2]
+
+    def close(self):
+        for pack in self.packs or []:
+            pack.close()
+        self.packs = None
+        self.delta_cache.clear()
+        self.delta_cache_size = 0
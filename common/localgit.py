@@ -3,220 +3,603 @@
 # Copyright 2022-2025 Enflame. All Rights Reserved.
 #
 
-import subprocess
 import re
 import json
 import os
+import tempfile
+from common import trace
+from common.command import run_command, start_command, finish_command
+from common.diff_index import DiffLines, iter_diff_records
+from common.gitobjects import ObjectStore
+from common.config_parser import GIT_OBJECT_READER, RENAME_SIMILARITY, COPY_DETECTION
 
+# the largest git lfs pointer file, a bigger blob is never a pointer
+LFS_POINTER_MAX_SIZE = 1024
+LFS_POINTER_PREFIX = b"version https://git-lfs.github.com/spec/"
+
+def get_rename_options(copies = True):
+    '''
+    return the rename and copy detection options of git diff, git show and git log, see SAST_RENAME_SIMILARITY.
+    They are given explicitly, so diff.renames of the user config does not change what is a rename.
+    '''
+    if RENAME_SIMILARITY <= 0:
+        return ["--no-renames"]
+    options = ["-M{}%".format(RENAME_SIMILARITY)]
+    if copies and COPY_DETECTION:
+        # git has one similarity score for renames and copies
+        options.append("-C{}%".format(RENAME_SIMILARITY))
+    return options
+
+def get_pathspec_arguments(pathspecs):
+    '''
+    return the arguments that limit a git command to pathspecs, none if there is no pathspec
+    '''
+    return ["--"] + list(pathspecs) if pathspecs else []
+
+def iter_log_commits(lines):
+    '''
+    Split the output of Local.iter_log into commits, a commit starts with a NUL, which no text line of a diff has.
+    yield (commit_info, {file_path: record}) per commit, only the diff of one commit is held at a time.
+    '''
+    lines = iter(lines)
+    line = next(lines, None)
+    while line is not None:
+        if not line.startswith(b"\0"):
+            line = next(lines, None)
+            continue
+        # the header is NUL, id, NUL, author, NUL, message, NUL, the message has line breaks
+        header = line
+        while header.count(b"\0") < 4:
+            line = next(lines, None)
+            if line is None:
+                break
+            header += line
+        fields = [x.decode("utf-8", errors="ignore") for x in header.split(b"\0")]
+        commit_info = {"commit": fields[1], "author": fields[2], "message": fields[3] if len(fields) > 3 else ""}
+        diff_lines = []
+        line = next(lines, None)
+        while line is not None and not line.startswith(b"\0"):
+            diff_lines.append(line)
+            line = next(lines, None)
+        yield commit_info, dict(iter_diff_records(diff_lines))
+
+def iter_status_entries(output):
+    '''
+    Parse the output of git status --porcelain=v2 -z
+    yield {"kind":"1", "xy":".M", "path":"a.cc", "old_path":""} per entry, kind is 1 changed, 2 renamed or copied,
+    u unmerged, ? untracked and ! ignored, xy is the status in the index and in the working tree, "." is unchanged
+    '''
+    items = output.split(b"\0")
+    index = 0
+    while index < len(items):
+        item = items[index].decode("utf-8", errors="ignore")
+        index += 1
+        kind = item[:1]
+        # the fields before the path, the path is last and may have spaces
+        field_count = {"1": 8, "2": 9, "u": 10}.get(kind)
+        if field_count:
+            fields = item.split(" ", field_count)
+            if len(fields) <= field_count:
+                continue
+            xy, path = fields[1], fields[field_count]
+        elif kind in ["?", "!"]:
+            xy, path = kind * 2, item[2:]
+        else:
+            # the branch headers and the empty item after the last NUL
+            continue
+        old_path = ""
+        if kind == "2" and index < len(items):
+            old_path = items[index].decode("utf-8", errors="ignore")
+            index += 1
+        yield {"kind": kind, "xy": xy, "path": path, "old_path": old_path}
+
+
+class CatFile(object):
+    '''
+    One long-lived git cat-file --batch or --batch-check process. Object names such as "HEAD:a.cc" are
+    written to its stdin and the framed answers read from its stdout, so many lookups start git once.
+    '''
+    def __init__(self, root_dir, batch_option = "--batch"):
+        self.root_dir = root_dir
+        self.batch_option = batch_option
+        self.process = None
+        self.pid = None
+
+    def __getstate__(self):
+        # the process can not be pickled with the run context, the unpickled one starts its own
+        return {"root_dir": self.root_dir, "batch_option": self.batch_option, "process": None, "pid": None}
+
+    def _get_process(self):
+        # a forked pool worker must not talk to the process of the main process
+        if self.process and self.pid == os.getpid() and not self.process.stdin.closed and self.process.poll() is None:
+            return self.process
+        self.close()
+        self.process = start_command(["git", "cat-file", self.batch_option], cwd=self.root_dir)
+        self.pid = os.getpid()
+        return self.process
+
+    def query(self, object_name):
+        '''
+        return (object id, type, size, content), content is None for --batch-check
+        return None if the object is missing or git can not be asked, the caller falls back to git show
+        '''
+        if "\n" in object_name:
+            return None
+        try:
+            process = self._get_process()
+            process.stdin.write(object_name.encode("utf-8") + b"\n")
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) != 3:
+                # "<name> missing", "<name> ambiguous" or git is gone
+                if not header:
+                    self.close()
+                return None
+            object_id, object_type, size = header[0].decode(), header[1].decode(), int(header[2])
+            content = None
+            if self.batch_option == "--batch":
+                # the content is followed by a newline
+                content = process.stdout.read(size + 1)[:size]
+                if len(content) != size:
+                    self.close()
+                    return None
+            return object_id, object_type, size, content
+        except (OSError, ValueError):
+            self.close()
+            return None
+
+    def close(self):
+        if self.process and self.pid == os.getpid():
+            finish_command(self.process)
+        self.process = None
+        self.pid = None
+
+
+@trace.traced_methods("git")
 class Local(object):
     def __init__(self, root_dir="./"):
         self.root_dir = root_dir
+        self.cat_files = {}
+
+    def _get_cat_file(self, batch_option):
+        # a Local unpickled from a run context cache of an older version has no cat_files
+        cat_files = self.__dict__.setdefault("cat_files", {})
+        if batch_option not in cat_files:
+            cat_files[batch_option] = CatFile(self.root_dir, batch_option)
+        return cat_files[batch_option]
+
+    def _get_object_store(self):
+        '''
+        return the python object reader of the repository, None with SAST_GIT_OBJECT_READER=cli or outside a git repo
+        '''
+        if GIT_OBJECT_READER != "python":
+            return None
+        if "object_store" not in self.__dict__:
+            git_dir = self.get_git_dir()
+            self.object_store = ObjectStore(git_dir) if git_dir else None
+        return self.object_store
+
+    def _query_object(self, object_name, with_content):
+        '''
+        return (object id, type, size, content) from the python object reader, from git cat-file where it can not answer
+        '''
+        object_store = self._get_object_store()
+        info = object_store.query(object_name, with_content) if object_store else None
+        if info is None:
+            info = self._get_cat_file("--batch" if with_content else "--batch-check").query(object_name)
+        return info
 
-    def get_diff(self, revision1="HEAD~", revision2="HEAD"):
+    def get_diff(self, revision1="HEAD~", revision2="HEAD", pathspecs=None, cached=False):
         '''
         Get changed lines information
         return:
         {
             "common_util/util_func.groovy": {
-                "add":[(6822,"def epkgVerify1")],
-                "del":[(6822,"def epkgVerify2")]
+                "add":DiffLines([(6822,"def epkgVerify1")]),
+                "del":DiffLines([(6822,"def epkgVerify2")])
             }
         }
+        "add" and "del" read like lists of (line number, text), see DiffLines.
+        "type" is add, delete, modify, rename or copy, a renamed or copied file has only its changed lines in "add".
+        pathspecs such as [":(top)*.cc"] limit the diff to the files they match.
+        cached diffs the index against revision1, revision2 is not used.
         '''
         result = {}
-        del_lines = []
-        add_lines = []
-        try:
-            if "{}~".format(revision2) ==  revision1 or "{}^".format(revision2) ==  revision1:
-                output=subprocess.check_output("cd {root_dir};git show --no-commit-id {revision2}".format(root_dir=self.root_dir,revision2=revision2),shell=True)
-            else:
-                output=subprocess.check_output("cd {root_dir};git diff {revision1} {revision2}".format(root_dir=self.root_dir, revision1=revision1,revision2=revision2),shell=True)
-            status = 0
-        except Exception as e:
-            print(e)
-            status = 1
-        if status == 0:
-            flag = False
-            git_diff_lines = output.decode("utf-8",errors="ignore").split("\n")
-            for index,line in enumerate(git_diff_lines):
-                if not flag and re.findall("diff --git a/.* b/.*",line):
-                    flag = True
-                    continue
-                if not flag:
-                    continue
-                ret1 = re.findall("\+\+\+\s+b/(.*)",line)
-                if ret1:
-                    file_path = ret1[0]
-                    ret_ = re.findall("---\s+/dev/null",git_diff_lines[index-1])
-                    if ret_:
-                        result[file_path] = {"add":[],"del":[],"type":"add","old_path":""}
-                    else:
-                        old_path_ret= re.findall("---\s+a/(.*)",git_diff_lines[index-1])
-                        old_path = old_path_ret[0]
-                        if old_path == file_path:
-                            result[file_path] = {"add":[],"del":[],"type":"modify","old_path":old_path}
-                        else:
-                            result[file_path] = {"add":[],"del":[],"type":"rename","old_path":old_path}
-                ret1 = re.findall("\+\+\+\s+/dev/null",line)
-                if ret1:
-                    ret3 = re.findall("---\s+a/(.*)",git_diff_lines[index-1])
-                    if ret3:
-                        file_path = ret3[0]
-                        result[file_path] = {"add":[],"del":[],"type":"delete","old_path":file_path}
-                ret2 = re.findall("@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@",line)
-                if ret2:
-                    status = True
-                    del_number = int(ret2[0][0]) - 1
-                    add_number = int(ret2[0][1]) - 1
-                if not status:
-                    continue
-                if line.startswith("+++ ") or line.startswith("--- "):
-                    continue
-                if line.startswith("-"):
-                    del_lines.append((del_number,line))
-                    result[file_path]["del"].append((del_number,line[1:]))
-                    del_number += 1
-                elif line.startswith("+"):
-                    add_lines.append((add_number,line))
-                    result[file_path]["add"].append((add_number,line[1:]))
-                    add_number += 1
-                else:
-                    add_number += 1
-                    del_number += 1
-        else:
-            raise Exception("git diff error")
+        with trace.span("parse diff", "diff"):
+            for file_path, record in self.iter_diff(revision1, revision2, pathspecs, cached):
+                result[file_path] = record
         return result
 
+    def iter_diff(self, revision1="HEAD~", revision2="HEAD", pathspecs=None, cached=False):
+        '''
+        Like get_diff, but yield (file_path, record) per file while git is still writing the diff,
+        so a caller that handles one file at a time never holds the whole diff
+        '''
+        if cached:
+            argv = ["git", "diff", "--cached"] + get_rename_options() + [revision1]
+        elif "{}~".format(revision2) ==  revision1 or "{}^".format(revision2) ==  revision1:
+            argv = ["git", "show", "--no-commit-id"] + get_rename_options() + [revision2]
+        else:
+            argv = ["git", "diff"] + get_rename_options() + [revision1, revision2]
+        # an empty revision is no argument, such as the diff of the working tree
+        argv = [x for x in argv if x] + get_pathspec_arguments(pathspecs)
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = start_command(argv, cwd=self.root_dir, stdin_pipe=False, stderr=stderr_file)
+            except OSError as e:
+                print("{}: {}".format(argv[0], e.strerror or e))
+                raise Exception("git diff error")
+            try:
+                for item in iter_diff_records(process.stdout):
+                    yield item
+            finally:
+                returncode = finish_command(process)
+            if returncode:
+                stderr_file.seek(0)
+                print(stderr_file.read().decode("utf-8",errors="ignore").strip())
+                print("Command '{}' returned non-zero exit status {}.".format(" ".join(argv), returncode))
+                raise Exception("git diff error")
+
+    def iter_log(self, commit_range):
+        '''
+        Stream git log -p --reverse of commit_range such as "A..B" once, oldest commit first
+        yield ({"commit":..., "author":..., "message":...}, {file_path: record}) per commit, the records are like get_diff.
+        Only the first parent chain is walked and a merge is diffed against its first parent, so the diffs of
+        the commits add up to the diff of the range.
+        '''
+        argv = ["git", "log", "-p", "--reverse", "--first-parent", "-m", "--no-color"] + get_rename_options() + [
+                "--format=%x00%H%x00%ae%x00%B%x00", commit_range]
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                process = start_command(argv, cwd=self.root_dir, stdin_pipe=False, stderr=stderr_file)
+            except OSError as e:
+                print("{}: {}".format(argv[0], e.strerror or e))
+                raise Exception("git log error")
+            try:
+                for item in iter_log_commits(process.stdout):
+                    yield item
+            finally:
+                returncode = finish_command(process)
+            if returncode:
+                stderr_file.seek(0)
+                print(stderr_file.read().decode("utf-8",errors="ignore").strip())
+                print("Command '{}' returned non-zero exit status {}.".format(" ".join(argv), returncode))
+                raise Exception("git log error")
+
+    def get_status(self):
+        '''
+        Read the changes of the index and the working tree from one git status --porcelain=v2 -z
+        return [{"kind":"1", "xy":".M", "path":"a.cc", "old_path":""}], see iter_status_entries
+        '''
+        # git status detects no copies
+        argv = ["git", "status", "--porcelain=v2", "-z"] + get_rename_options(copies=False)
+        command_result = run_command(argv, cwd=self.root_dir, merge_stderr=False)
+        if command_result.returncode:
+            print(command_result.stderr.decode("utf-8",errors="ignore").strip())
+            return []
+        return list(iter_status_entries(command_result.stdout))
+
     def get_current_author(self):
         '''
         return current user.email
         '''
-        pipe = subprocess.Popen("git config --get user.email||git log -1 --pretty=format:\"%ae\" ||echo",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8",errors="ignore").strip()
+        command_result = run_command(["git", "config", "--get", "user.email"])
+        if command_result.returncode:
+            command_result = run_command(["git", "log", "-1", "--pretty=format:%ae"])
+        if command_result.returncode:
+            return ""
+        return command_result.output.strip()
 
     def get_edit_commit_message(self):
         '''
         return edit commit message
         '''
-        if os.path.exists(".git/COMMIT_EDITMSG"):
-            pipe = subprocess.Popen("cat .git/COMMIT_EDITMSG",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-            command_output = pipe.communicate()[0]
-            return command_output.decode("utf-8",errors="ignore").strip()
+        if os.path.exists(".git/COMMIT_EDITMSG") or os.path.isfile(".git"):
+            # .git is a file in a worktree or submodule, the message is in its gitdir
+            commit_editmsg = os.path.join(self.get_git_dir() or ".git", "COMMIT_EDITMSG")
+            try:
+                with open(commit_editmsg, mode='rb') as f:
+                    return f.read().decode("utf-8",errors="ignore").strip()
+            except OSError:
+                return ""
         else:
-            if os.path.isfile(".git"):
-                pipe = subprocess.Popen("cat .git|sed 's/gitdir: //g'|xargs -I {} cat {}/COMMIT_EDITMSG",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                return command_output.decode("utf-8",errors="ignore").strip()
-            else:
-                pipe = subprocess.Popen("git log -1 --pretty=format:%B",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                return command_output.decode("utf-8",errors="ignore").strip()
+            return run_command(["git", "log", "-1", "--pretty=format:%B"]).output.strip()
 
     def get_local_path(self):
         '''
         return local path
         '''
-        pipe = subprocess.Popen("pwd",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8",errors="ignore").strip()
+        return os.getcwd()
 
     def get_current_branch(self):
         '''
         return current branch
         '''
-        pipe = subprocess.Popen("git branch|grep '*'|awk '{print $2}'",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8",errors="ignore").strip()
+        for line in run_command(["git", "branch"]).output.split("\n"):
+            if "*" in line:
+                items = line.split()
+                return items[1] if len(items) > 1 else ""
+        return ""
 
     def update_submodule(self):
-        pipe = subprocess.Popen("git submodule update --init --recursive --depth=2 > /dev/null 2>&1",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8", errors="ignore").strip()
+        run_command(["git", "submodule", "update", "--init", "--recursive", "--depth=2"], timeout=0)
+        return ""
 
     def get_changed_file_size(self, revision1="HEAD~", revision2="HEAD"):
         '''
-        return changed file size
+        return changed file size, with the blob SHA and mode of get_changed_files_meta
         {
             "a.txt":{
                 "size":8773
             }
         }
         '''
+        return self.get_changed_files_meta(revision1, revision2)
+
+    def get_changed_files_meta(self, revision1="HEAD~", revision2="HEAD", pathspecs=None, cached=False):
+        '''
+        Read the added, copied, modified and renamed files from one git diff --raw and their blob sizes
+        from git cat-file --batch-check, the working tree is not read.
+        An empty revision2 is the working tree, git has no blob of a changed file there, its size is
+        taken from the file and its "sha" is None. cached reads the index against revision1 instead, with the
+        blobs of the index. Submodules (mode 160000) are left out, their "blob" is a commit of another repository.
+        return:
+        {
+            "a.txt":{
+                "size":8773,
+                "sha":"3b18e512dba79e4c8300dd08aeb37f8e728b8dad",
+                "mode":"100644"
+            }
+        }
+        '''
         result = {}
-        pipe = subprocess.Popen('git diff {} {} --diff-filter=ACMR --name-only'.format(revision1,revision2),
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        for changed_file in command_output.decode("utf-8", errors="ignore").strip().split("\n"):
-            if changed_file.strip():
-                result[changed_file.strip()] = {"size":int(os.path.getsize(changed_file))}
+        revisions = ["--cached", revision1] if cached else [revision1, revision2]
+        argv = [x for x in ["git", "diff", "--raw", "-z", "--no-abbrev", "--diff-filter=ACMR"] + get_rename_options() + revisions if x]
+        argv += get_pathspec_arguments(pathspecs)
+        command_result = run_command(argv, cwd=self.root_dir, merge_stderr=False)
+        if command_result.returncode:
+            print(command_result.stderr.decode("utf-8",errors="ignore").strip())
+            return result
+        # ":<old mode> <new mode> <old sha> <new sha> <status>\0<path>\0", renames and copies have two paths
+        items = command_result.stdout.split(b"\0")
+        index = 0
+        while index < len(items):
+            header = items[index].decode("utf-8", errors="ignore").split()
+            index += 1
+            if len(header) != 5 or not header[0].startswith(":"):
+                continue
+            path_count = 2 if header[4][:1] in ["R", "C"] else 1
+            if index + path_count > len(items):
+                break
+            file_path = items[index + path_count - 1].decode("utf-8", errors="ignore")
+            index += path_count
+            if header[1] == "160000":
+                continue
+            result[file_path] = {"size": None, "sha": None if set(header[3]) == {"0"} else header[3], "mode": header[1]}
+        sizes = {}
+        for file_path, meta in result.items():
+            if meta["sha"] is None:
+                meta["size"] = self.get_worktree_file_meta(file_path)["size"]
+                continue
+            if meta["sha"] not in sizes:
+                info = self.get_object_info(meta["sha"])
+                sizes[meta["sha"]] = info[2] if info else None
+            meta["size"] = sizes[meta["sha"]]
+            if meta["size"] is None and os.path.isfile(os.path.join(self.root_dir, file_path)):
+                # the blob can not be read, such as in a partial clone, the file of the working tree is the closest size
+                meta["size"] = os.path.getsize(os.path.join(self.root_dir, file_path))
         return result
 
+    def get_worktree_file_meta(self, file_path):
+        '''
+        return the size and mode of a file of the working tree that git has no blob of, such as an untracked file
+        '''
+        stat_result = os.lstat(os.path.join(self.root_dir, file_path))
+        if os.path.islink(os.path.join(self.root_dir, file_path)):
+            mode = "120000"
+        else:
+            # git records only the executable bit of the owner
+            mode = "100755" if stat_result.st_mode & 0o100 else "100644"
+        return {"size": stat_result.st_size, "sha": None, "mode": mode}
+
     def check_out(self, commit_id):
-        pipe = subprocess.Popen('''git checkout {}
-                                git submodule foreach --recursive git reset --hard
-                                git submodule foreach --recursive git clean -fdx
-                                git submodule sync --recursive
-                                git submodule update --init --recursive'''.format(commit_id),
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8", errors="ignore").strip()
+        command_output = ""
+        for argv in [["git", "checkout", commit_id],
+                     ["git", "submodule", "foreach", "--recursive", "git reset --hard"],
+                     ["git", "submodule", "foreach", "--recursive", "git clean -fdx"],
+                     ["git", "submodule", "sync", "--recursive"],
+                     ["git", "submodule", "update", "--init", "--recursive"]]:
+            command_output += run_command(argv, timeout=0).output
+        return command_output.strip()
 
     def get_current_commit_id(self):
-        pipe = subprocess.Popen("git rev-parse HEAD",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8", errors="ignore").strip()
+        '''
+        return "" if HEAD is no commit yet, like in a repository without commits
+        '''
+        result = run_command(["git", "rev-parse", "--verify", "-q", "HEAD"])
+        return result.output.strip() if result.returncode == 0 else ""
 
     def get_old_commit_id(self):
-        pipe = subprocess.Popen("git rev-parse HEAD~",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8", errors="ignore").strip()
+        return run_command(["git", "rev-parse", "HEAD~"]).output.strip()
+
+    def get_git_dir(self):
+        '''
+        return the git directory of root_dir without running git, None if it is not a git repo
+        '''
+        dot_git = os.path.join(self.root_dir, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            # worktree or submodule, .git is a file like "gitdir: ../.git/worktrees/x"
+            with open(dot_git, mode='r', encoding='utf-8', errors="ignore") as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                git_dir = content[len("gitdir:"):].strip()
+                if not os.path.isabs(git_dir):
+                    git_dir = os.path.join(self.root_dir, git_dir)
+                return git_dir
+        return None
+
+    def read_head_commit_id(self):
+        '''
+        return HEAD commit id by reading the git directory, so no process is spawned,
+        fall back to git rev-parse if the refs can not be resolved from files
+        '''
+        git_dir = self.get_git_dir()
+        try:
+            with open(os.path.join(git_dir, "HEAD"), mode='r', encoding='utf-8') as f:
+                head = f.read().strip()
+            if not head.startswith("ref:"):
+                return head
+            ref = head[len("ref:"):].strip()
+            common_dir = git_dir
+            if os.path.isfile(os.path.join(git_dir, "commondir")):
+                with open(os.path.join(git_dir, "commondir"), mode='r', encoding='utf-8') as f:
+                    common_dir = os.path.join(git_dir, f.read().strip())
+            for ref_dir in [git_dir, common_dir]:
+                if os.path.isfile(os.path.join(ref_dir, ref)):
+                    with open(os.path.join(ref_dir, ref), mode='r', encoding='utf-8') as f:
+                        return f.read().strip()
+            with open(os.path.join(common_dir, "packed-refs"), mode='r', encoding='utf-8') as f:
+                for line in f:
+                    items = line.strip().split(" ")
+                    if len(items) == 2 and items[1] == ref:
+                        return items[0]
+        except (OSError, TypeError):
+            pass
+        return self.get_current_commit_id()
 
     def get_current_project_name(self):
-        pipe = subprocess.Popen("git config --get remote.origin.url",
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
         repo_name = ""
-        clone_url = command_output.decode("utf-8", errors="ignore").strip()
+        clone_url = run_command(["git", "config", "--get", "remote.origin.url"]).output.strip()
         if re.findall("git@",clone_url):
             repo_name = clone_url.split("/")[-1].split(".")[0]
         if repo_name.endswith(".git"):
             repo_name = repo_name[:-4]
         return repo_name
 
-    def get_lfs_status(self,file_path):
+    def get_object_info(self, object_name):
         '''
-        return lfs status
+        return (object id, type, size) of an object name such as "HEAD:a.cc", None if it does not exist
         '''
-        pipe = subprocess.Popen("git show --no-commit-id {} | grep 'version https://git-lfs.github.com/'".format(file_path),
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        if command_output.decode("utf-8", errors="ignore").strip():
-            return True
-        else:
+        info = self._query_object(object_name, False)
+        return info[:3] if info else None
+
+    def get_object_content(self, object_name):
+        '''
+        return the content bytes of an object name such as "HEAD:a.cc", None if it does not exist
+        '''
+        info = self._query_object(object_name, True)
+        return info[3] if info else None
+
+    def get_tree_entries(self, revision="HEAD", path=""):
+        '''
+        return [(mode, type, object id, name)] of the directory path in revision, None if it does not exist
+        '''
+        object_name = "{}:{}".format(revision, path.strip("/"))
+        object_store = self._get_object_store()
+        info = object_store.resolve(object_name) if object_store else None
+        if info is not None and info[1] == "tree":
+            entries = object_store.read_tree(info[0])
+            if entries is not None:
+                return entries
+        command_result = run_command(["git", "ls-tree", "-z", object_name], cwd=self.root_dir, merge_stderr=False)
+        if command_result.returncode:
+            return None
+        entries = []
+        # "<mode> <type> <object id>\t<name>\0" per entry
+        for item in command_result.stdout.split(b"\0"):
+            header, _, name = item.partition(b"\t")
+            if len(header.split()) == 3:
+                mode, object_type, object_id = header.decode().split()
+                entries.append((mode, object_type, object_id, name.decode("utf-8", errors="surrogateescape")))
+        return entries
+
+    def get_lfs_status(self,file_path, revision = "HEAD"):
+        '''
+        return lfs status, see get_lfs_statuses
+        '''
+        return self.get_lfs_statuses([file_path], revision)[file_path]
+
+    def get_lfs_statuses(self, file_paths, revision = "HEAD"):
+        '''
+        Classify all files at once, one git check-attr finds the files whose filter attribute is lfs
+        and their blobs in revision are read through the cat-file processes to confirm they are lfs pointers.
+        revision "" reads the blobs of the index, None reads the working tree files.
+        return:
+        {
+            "model.bin": True,
+            "a.cc": False
+        }
+        '''
+        file_paths = list(file_paths)
+        result = {x: False for x in file_paths}
+        if not file_paths:
+            return result
+        paths_input = b"".join(x.encode("utf-8") + b"\0" for x in file_paths)
+        command_result = run_command(["git", "check-attr", "filter", "--stdin", "-z"], cwd=self.root_dir,
+                                     merge_stderr=False, input=paths_input)
+        if command_result.returncode:
+            print(command_result.stderr.decode("utf-8",errors="ignore").strip())
+            return result
+        # -z prints "<path>\0filter\0<value>\0" per path
+        items = command_result.stdout.split(b"\0")
+        for index in range(0, len(items) - 2, 3):
+            file_path = items[index].decode("utf-8", errors="ignore")
+            if items[index + 2] == b"lfs" and file_path in result:
+                if revision is None:
+                    # a file checked out by git lfs is smudged to its content, its index blob is still the pointer
+                    result[file_path] = self._is_lfs_pointer_file(file_path) or self._is_lfs_pointer(file_path, "")
+                else:
+                    result[file_path] = self._is_lfs_pointer(file_path, revision)
+        return result
+
+    def _is_lfs_pointer(self, file_path, revision = "HEAD"):
+        '''
+        return True if the file is a git lfs pointer in revision, "" is the index
+        '''
+        info = self.get_object_info("{}:{}".format(revision, file_path))
+        if info is None:
+            if revision != "HEAD":
+                return False
+            command_output = run_command(["git", "show", "--no-commit-id", file_path], merge_stderr=False).output
+            return "version https://git-lfs.github.com/" in command_output
+        # the size tells most files apart without reading them
+        if info[1] != "blob" or info[2] > LFS_POINTER_MAX_SIZE:
             return False
+        content = self.get_object_content(info[0])
+        return bool(content) and content.startswith(LFS_POINTER_PREFIX)
+
+    def _is_lfs_pointer_file(self, file_path):
+        '''
+        return True if the working tree file is a git lfs pointer
+        '''
+        try:
+            with open(os.path.join(self.root_dir, file_path), "rb") as f:
+                content = f.read(LFS_POINTER_MAX_SIZE + 1)
+        except OSError:
+            return False
+        return len(content) <= LFS_POINTER_MAX_SIZE and content.startswith(LFS_POINTER_PREFIX)
 
     def get_change_file_content(self,file_path, left = False):
         '''
         return file content
         '''
-        if left:
-            pipe = subprocess.Popen("git show HEAD^:{}".format(file_path),
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        else:
-            pipe = subprocess.Popen("git show HEAD:{}".format(file_path),
-                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-        command_output = pipe.communicate()[0]
-        return command_output.decode("utf-8", errors="ignore").strip()
+        object_name = "{}:{}".format("HEAD^" if left else "HEAD", file_path)
+        content = self.get_object_content(object_name)
+        if content is None:
+            # git show prints why the object does not exist, as it always did
+            return run_command(["git", "show", object_name]).output.strip()
+        return content.decode("utf-8", errors="ignore").strip()
+
+    def close(self):
+        '''
+        end the git cat-file processes and unmap the packs, a later lookup starts and maps them again
+        '''
+        for cat_file in self.__dict__.get("cat_files", {}).values():
+            cat_file.close()
+        if self.__dict__.get("object_store"):
+            self.object_store.close()
 
 if __name__ == "__main__":
     local = Local()
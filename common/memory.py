@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import re
+import gc
+import sys
+import signal
+import resource
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+sys.path.append(str(REPO_DIR))
+
+# seconds between two RSS samples of the watchdog
+WATCH_INTERVAL = 0.05
+# allocators kept per checker by --memory-profile
+TOP_ALLOCATORS = 10
+
+# --memory-profile, trace the python allocations of every checker
+_profile = False
+# --max-rss in KB, 0 means no budget
+_max_rss_kb = 0
+# one report per checker run by this process, pool workers hand them to the main process
+_reports = []
+_watchdog = None
+_watchdog_stop = None
+# the watchdog fires once per checker, a checker that was aborted must not abort the next one before it started
+_armed = False
+_current_checker = None
+
+
+class MemoryBudgetExceeded(BaseException):
+    '''
+    Raised in the main thread when the RSS of the process goes over --max-rss.
+    It is not an Exception, so the "except Exception" of the checkers does not swallow it.
+    '''
+    pass
+
+
+def _read_status(field):
+    '''
+    return a field of /proc/self/status in KB, None where there is no procfs
+    '''
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            match = re.search(r"^{}:\s+(\d+)".format(field), f.read(), re.M)
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+def _reset_peak_rss():
+    '''
+    Reset the high water mark of the RSS so the next VmHWM is the peak of one checker, return False where
+    the kernel does not allow it, the peak of the whole process is reported then
+    '''
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_kb():
+    peak = _read_status("VmHWM")
+    # ru_maxrss is in KB on linux
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _on_budget_signal(signum, frame):
+    rss_kb = _read_status("VmRSS") or 0
+    raise MemoryBudgetExceeded("memory budget exceeded: RSS {:.1f} MB > --max-rss {:.1f} MB{}".format(
+        rss_kb / 1024, _max_rss_kb / 1024, " in " + _current_checker if _current_checker else ""))
+
+def _watch(stop, main_thread_id):
+    global _armed
+    while not stop.wait(WATCH_INTERVAL):
+        rss_kb = _read_status("VmRSS")
+        if _armed and rss_kb is not None and rss_kb > _max_rss_kb:
+            _armed = False
+            # a signal also interrupts the main thread while it waits for a tool to finish
+            signal.pthread_kill(main_thread_id, signal.SIGUSR1)
+
+def enabled():
+    return _profile or bool(_max_rss_kb)
+
+def start(profile = False, max_rss_mb = None):
+    '''
+    Start --memory-profile and the --max-rss watchdog of this process, call it from the main thread.
+    '''
+    global _profile, _max_rss_kb
+    _profile = profile
+    _max_rss_kb = int(max_rss_mb * 1024) if max_rss_mb else 0
+    start_watchdog()
+
+def start_watchdog():
+    '''
+    Start the watchdog thread in this process, the forked pool workers call it again because threads do not survive fork
+    '''
+    global _watchdog, _watchdog_stop, _armed
+    if not _max_rss_kb or _watchdog:
+        return
+    if _read_status("VmRSS") is None:
+        print("warning: --max-rss needs /proc/self/status, the memory budget is not enforced")
+        return
+    signal.signal(signal.SIGUSR1, _on_budget_signal)
+    _armed = True
+    _watchdog_stop = threading.Event()
+    _watchdog = threading.Thread(target=_watch, args=(_watchdog_stop, threading.main_thread().ident), daemon=True)
+    _watchdog.start()
+
+def stop():
+    '''
+    Stop the watchdog and forget the reports, the sast server runs many checks in one process
+    '''
+    global _profile, _max_rss_kb, _watchdog, _watchdog_stop, _armed
+    if _watchdog:
+        _watchdog_stop.set()
+        _watchdog.join()
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+    _watchdog = None
+    _watchdog_stop = None
+    _armed = False
+    _profile = False
+    _max_rss_kb = 0
+    del _reports[:]
+
+def forget_worker_state():
+    '''
+    The forked pool worker inherits the reports and the watchdog of the main process but not its thread
+    '''
+    global _watchdog, _watchdog_stop
+    del _reports[:]
+    _watchdog = None
+    _watchdog_stop = None
+
+@contextmanager
+def checker_profile(checker):
+    '''
+    Measure one checker, the peak RSS always and the python allocations with --memory-profile.
+    MemoryBudgetExceeded raised inside is recorded as the abort reason of the checker and raised again.
+    '''
+    global _armed, _current_checker
+    if not enabled():
+        yield
+        return
+    report = {"checker": checker, "pid": os.getpid(), "aborted": None}
+    # the memory of the checkers before is garbage now, the budget of this one starts from a clean heap
+    gc.collect()
+    report["peak_rss_scope"] = "checker" if _reset_peak_rss() else "process"
+    if _profile:
+        # only --memory-profile needs tracemalloc, the other runs do not import it
+        import tracemalloc
+        tracemalloc.start()
+    _current_checker = checker
+    _armed = True
+    try:
+        yield
+    except MemoryBudgetExceeded as e:
+        report["aborted"] = str(e)
+        raise
+    finally:
+        _armed = False
+        _current_checker = None
+        report["peak_rss_kb"] = _peak_rss_kb()
+        if _profile:
+            # the snapshot is taken while the checker is still alive, its findings and hook data are in it
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ])
+            report["traced_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            report["top_allocators"] = [{"location": "{}:{}".format(x.traceback[0].filename, x.traceback[0].lineno),
+                                         "size_kb": x.size // 1024, "count": x.count}
+                                        for x in snapshot.statistics("lineno")[:TOP_ALLOCATORS]]
+            tracemalloc.stop()
+        _reports.append(report)
+
+def take_reports():
+    '''
+    return the checker reports of this process and clear them, pool workers hand them to the main process
+    '''
+    reports = list(_reports)
+    del _reports[:]
+    return reports
+
+def merge_reports(reports):
+    _reports.extend(reports)
+
+def format_reports(reports = None):
+    '''
+    return the memory report, with --memory-profile a table of every checker and its top allocators,
+    otherwise only the checkers aborted by --max-rss
+    '''
+    reports = _reports if reports is None else reports
+    if not _profile:
+        return "\n".join("{}: {}".format(x["checker"], x["aborted"]) for x in reports if x["aborted"])
+    lines = ["{:<28} {:>8} {:>14} {:>14}  {}".format("checker", "pid", "peak RSS MB", "traced MB", "status")]
+    for report in reports:
+        lines.append("{:<28} {:>8} {:>14.1f} {:>14.1f}  {}".format(
+            report["checker"][:28], report["pid"], report["peak_rss_kb"] / 1024, report.get("traced_peak_kb", 0) / 1024,
+            report["aborted"] or ("ok" if report["peak_rss_scope"] == "checker" else "ok, peak RSS of the process")))
+    for report in reports:
+        if not report.get("top_allocators"):
+            continue
+        lines.append("top allocators of {}:".format(report["checker"]))
+        for allocator in report["top_allocators"]:
+            lines.append("    {:>10} KB {:>8} blocks  {}".format(allocator["size_kb"], allocator["count"], allocator["location"]))
+    return "\n".join(lines)
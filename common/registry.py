@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import ast
+import json
+import tempfile
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+CHECKERS_DIR = REPO_DIR / "checkers"
+MANIFEST_FILE = CHECKERS_DIR / ".registry_manifest.json"
+# bump it when the content of a manifest entry changes
+MANIFEST_VERSION = 3
+
+# sast_items_dict keys that select which files a checker looks at
+FILE_FILTER_KEYS = [
+    "suffix", "check_files_suffix", "end_filter", "lineTerminatorsCheckFileType", "need_lfs_list",
+    "check_files_regex", "check_file_type", "check_files", "check_dirs",
+    "skip_files", "exclude_files", "start_filter", "ignorejsoncheck",
+    "attributes_file", "lfs_config_path",
+]
+# how the checkers apply each file filter: (include or exclude, how a value matches a path),
+# "suffix" is str.endswith, "prefix" is str.startswith, "regex" is re.match, "name" is == and "contains" is in
+FILE_FILTER_MATCHES = {
+    "suffix": ("include", "suffix"),
+    "check_files_suffix": ("include", "suffix"),
+    "end_filter": ("include", "suffix"),
+    "lineTerminatorsCheckFileType": ("include", "suffix"),
+    "need_lfs_list": ("include", "suffix"),
+    "check_files_regex": ("include", "regex"),
+    "check_file_type": ("include", "regex"),
+    "check_files": ("include", "regex"),
+    "check_dirs": ("include", "regex"),
+    # some checkers search skip_files anywhere in the path, re.match excludes fewer paths, which is safe
+    "skip_files": ("exclude", "regex"),
+    "exclude_files": ("exclude", "regex"),
+    "start_filter": ("exclude", "prefix"),
+    "ignorejsoncheck": ("exclude", "name"),
+    # git lfs check looks for the .gitattributes of every directory and the .lfsconfig of the root
+    "attributes_file": ("include", "contains"),
+    "lfs_config_path": ("include", "name"),
+}
+# a checker reads the change set through these, one that uses none of them does not look at the changed files
+CHANGE_SET_ATTRIBUTES = [
+    "add_or_changed_files", "add_files", "changed_files", "get_diff_info", "diff_info", "get_diff_lines_info",
+    "get_files_meta", "get_file_size",
+]
+
+
+def _parse_checker(checker_file):
+    '''
+    Read the checker facts from the source without importing it
+    return:
+    {
+        "module":"cpplint_check",
+        "flag":"--cpplint_check",
+        "check_name":"cpplint check",
+        "local_ci_check":true,
+        "local_workspace_check":true,
+        "file_filters":["suffix","skip_files"],
+        "reads_change_set":true
+    }
+    None if the file has no CIChecker class
+    '''
+    with open(checker_file, mode='r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=str(checker_file))
+    checker_class = None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "CIChecker":
+            checker_class = node
+    if checker_class is None:
+        return None
+    module = Path(checker_file).stem
+    # defaults of StaticCheck
+    entry = {
+        "module": module,
+        "flag": "--{}".format(module),
+        "check_name": "",
+        "local_ci_check": True,
+        "local_workspace_check": False,
+        "file_filters": [],
+        "reads_change_set": True,
+    }
+    used_attributes = set()
+    for node in ast.walk(checker_class):
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "self":
+            used_attributes.add(node.attr)
+    for node in checker_class.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "__init__":
+            for statement in node.body:
+                if not isinstance(statement, ast.Assign) or not isinstance(statement.value, ast.Constant):
+                    continue
+                for target in statement.targets:
+                    if isinstance(target, ast.Attribute) and target.attr in ["check_name", "local_ci_check", "local_workspace_check"]:
+                        entry[target.attr] = statement.value.value
+    entry["file_filters"] = [x for x in FILE_FILTER_KEYS if x in used_attributes]
+    entry["reads_change_set"] = any(x in used_attributes for x in CHANGE_SET_ATTRIBUTES)
+    return entry
+
+
+def _checker_files():
+    return sorted(x for x in os.listdir(str(CHECKERS_DIR)) if x.endswith("_check.py"))
+
+
+def _fingerprint(checker_files):
+    '''
+    name, size and mtime of every checker, the manifest is regenerated when it changes
+    '''
+    fingerprint = []
+    for checker_file in checker_files:
+        stat = os.stat(str(CHECKERS_DIR / checker_file))
+        fingerprint.append([checker_file, stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+def generate_manifest(checker_files = None):
+    checker_files = checker_files if checker_files is not None else _checker_files()
+    checkers = []
+    for checker_file in checker_files:
+        entry = _parse_checker(CHECKERS_DIR / checker_file)
+        if entry:
+            checkers.append(entry)
+    return {"version": MANIFEST_VERSION, "fingerprint": _fingerprint(checker_files), "checkers": checkers}
+
+
+def load_manifest():
+    '''
+    return the registry manifest, regenerate and save it when it is missing or stale
+    '''
+    checker_files = _checker_files()
+    try:
+        with open(str(MANIFEST_FILE), mode='r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and manifest.get("fingerprint") == _fingerprint(checker_files):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    manifest = generate_manifest(checker_files)
+    tmp_path = None
+    try:
+        # the sast directory may be read-only, such as in the image, then just use it in memory
+        fd, tmp_path = tempfile.mkstemp(prefix=MANIFEST_FILE.name, dir=str(CHECKERS_DIR))
+        with os.fdopen(fd, mode='w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, str(MANIFEST_FILE))
+    except OSError:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest
+
+
+def get_checkers(enable_attr = None):
+    '''
+    return manifest entries sorted by module name
+    enable_attr such as "local_ci_check" keeps only the checkers enabled for that mode
+    '''
+    checkers = load_manifest()["checkers"]
+    if enable_attr:
+        checkers = [x for x in checkers if x.get(enable_attr)]
+    return checkers
+
+
+def get_file_filters(entry, sast_config):
+    '''
+    return the current config values of the file filters a checker uses
+    {
+        "suffix":[".c", ".cc"],
+        "skip_files":[]
+    }
+    '''
+    check_config = sast_config.get(entry["check_name"], {})
+    return {x: check_config[x] for x in entry["file_filters"] if x in check_config}
+
+
+def _escape_pathspec(text):
+    # a pathspec is a wildmatch pattern, "*" and "?" also match "/" in it
+    return "".join("\\" + x if x in "*?[\\" else x for x in text)
+
+
+def _regex_to_pathspec(regex):
+    '''
+    return the pathspec of the paths re.match(regex, path) matches, None if the regex is more than
+    a literal with an optional leading ".*" and trailing "$", such as ".*\\.cc$"
+    '''
+    body = regex[1:] if regex.startswith("^") else regex
+    prefix = ""
+    if body.startswith(".*"):
+        prefix = "*"
+        body = body[2:]
+    suffix = "*"
+    if body.endswith("$") and not body.endswith("\\$"):
+        suffix = ""
+        body = body[:-1]
+    result = []
+    index = 0
+    while index < len(body):
+        char = body[index]
+        if char == "\\" and index + 1 < len(body) and not body[index + 1].isalnum():
+            result.append(_escape_pathspec(body[index + 1]))
+            index += 2
+        elif char == ".":
+            result.append("?")
+            index += 1
+        elif char in "^$*+?{}[]()|\\":
+            return None
+        else:
+            result.append(_escape_pathspec(char))
+            index += 1
+    return prefix + "".join(result) + suffix
+
+
+def _filter_to_pathspec(match, value):
+    if match == "suffix":
+        return "*" + _escape_pathspec(value)
+    if match == "prefix":
+        return _escape_pathspec(value) + "*"
+    if match == "regex":
+        return _regex_to_pathspec(value)
+    if match == "name":
+        return _escape_pathspec(value)
+    if match == "contains":
+        return "*" + _escape_pathspec(value) + "*"
+    return None
+
+
+def get_pathspecs(modules, sast_config):
+    '''
+    Compile the file filters of the checker modules into git pathspecs, so git leaves out the files no checker looks at.
+    A path is included if one checker may look at it and excluded only if every checker excludes it.
+    return [] if some checker may look at any file and no path is excluded by all
+    [":(top)*.cc", ":(top)*.h", ":(top,exclude)3rdparty/*"]
+    '''
+    includes = set()
+    all_included = False
+    excludes = None
+    for entry in get_checkers():
+        if entry["module"] not in modules or not entry.get("reads_change_set", True):
+            continue
+        entry_includes = []
+        entry_excludes = set()
+        for key, values in get_file_filters(entry, sast_config).items():
+            kind, match = FILE_FILTER_MATCHES.get(key, (None, None))
+            for value in [values] if isinstance(values, str) else values:
+                pathspec = _filter_to_pathspec(match, value) if isinstance(value, str) else None
+                if kind == "include":
+                    entry_includes.append(pathspec)
+                elif kind == "exclude" and pathspec and any(x in pathspec for x in "*?"):
+                    # a pathspec without a wildcard also matches the files under a directory of that name
+                    entry_excludes.add(pathspec)
+        if not entry_includes or None in entry_includes:
+            all_included = True
+        includes.update(entry_includes)
+        excludes = entry_excludes if excludes is None else excludes & entry_excludes
+    if excludes is None:
+        # no checker looks at the changed files
+        return []
+    pathspecs = [] if all_included else [":(top){}".format(x) for x in sorted(includes)]
+    return pathspecs + [":(top,exclude){}".format(x) for x in sorted(excludes)]
+
+
+if __name__ == "__main__":
+    print(json.dumps(generate_manifest(), indent=4))
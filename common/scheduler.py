@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import sys
+import importlib
+from io import StringIO
+from contextlib import redirect_stdout
+from pathlib import Path
+# Get the directory containing this file (common directory)
+COMMON_DIR = Path(__file__).resolve().parent
+# Get the parent directory (workspace root)
+REPO_DIR = COMMON_DIR.parent
+CHECKERS_DIR = REPO_DIR / "checkers"
+sys.path.append(str(REPO_DIR))
+from common import command
+from common import memory
+
+# checker arguments of a pool worker, set once per worker process by _init_worker
+_WORKER_ARGS = None
+
+
+def run_checker(sast_checker, api_init, args, check_api_type, enable_attr = None):
+    '''
+    Import and run one checker with its stdout captured.
+    enable_attr is the checker attribute that must be true for it to run,
+    such as "local_ci_check", None means always run.
+    return:
+    (True, "SC0001:cpplint check....Pass", None)
+    (True, "SC0001:cpplint check....Fail ...", "Failed SC0001")
+    (False, "", None) if the checker is not enabled
+    (True, "...", "memory budget exceeded: RSS ...") if --max-rss aborted it
+    '''
+    if str(CHECKERS_DIR) not in sys.path:
+        sys.path.append(str(CHECKERS_DIR))
+    module = importlib.import_module(sast_checker)
+    if not getattr(module, "CIChecker", None):
+        return False, "", None
+    captured_output = StringIO()
+    error = None
+    with redirect_stdout(captured_output):
+        checker = module.CIChecker(api_init, args, check_api_type)
+        if enable_attr and not getattr(checker, enable_attr):
+            return False, "", None
+        try:
+            with memory.checker_profile(sast_checker):
+                checker.check()
+        except Exception as e:
+            error = str(e)
+        except memory.MemoryBudgetExceeded as e:
+            # only this checker is lost, its memory is freed with it and the next checker runs
+            error = str(e)
+            print(error)
+    return True, captured_output.getvalue().strip(), error
+
+
+def _init_worker(api_init, args, check_api_type, enable_attr):
+    global _WORKER_ARGS
+    # the checkers already share the cores in the pool, a checker of a worker must not start a pool of its own
+    if args is not None:
+        args.jobs = 1
+    _WORKER_ARGS = (api_init, args, check_api_type, enable_attr)
+    # the forked worker inherits the command records of the main process, they are counted there
+    command.take_stats()
+    command.forget_running_commands()
+    memory.forget_worker_state()
+    memory.start_watchdog()
+
+def _run_in_worker(sast_checker):
+    '''
+    return the result of run_checker, the commands the checker ran and its memory report,
+    for --stats and --memory-profile of the main process
+    '''
+    api_init, args, check_api_type, enable_attr = _WORKER_ARGS
+    result = run_checker(sast_checker, api_init, args, check_api_type, enable_attr)
+    # end the git cat-file processes of the checker, so they are accounted with it
+    command.finish_running_commands()
+    return result + (command.take_stats(), memory.take_reports())
+
+
+class CheckerScheduler():
+    '''
+    Run checkers concurrently in a process pool.
+    The output of each checker is printed as one block, in the order the
+    checkers were given, as soon as it and all checkers before it are done.
+    '''
+    def __init__(self, api_init, args, check_api_type, jobs = None):
+        self.api_init = api_init
+        self.args = args
+        self.check_api_type = check_api_type
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def run(self, sast_checkers, enable_attr = None):
+        '''
+        yield (sast_checker, error) for each checker that ran, in order
+        '''
+        sast_checkers = list(sast_checkers)
+        if self.jobs <= 1 or len(sast_checkers) <= 1:
+            for sast_checker in sast_checkers:
+                ran, output, error = run_checker(sast_checker, self.api_init, self.args, self.check_api_type, enable_attr)
+                if ran:
+                    print(output, flush=True)
+                    yield sast_checker, error
+            return
+        # the pool pulls in multiprocessing, only import it when checkers really run in parallel
+        from concurrent.futures import ProcessPoolExecutor
+        run_context = getattr(self.args, "run_context", None)
+        if run_context:
+            # compute the shared diff and files meta before the workers start, so they are done once for all of them
+            run_context.get_diff_info()
+            run_context.get_files_meta()
+        # the arguments carry the run context, hand them to each worker once instead of once per checker
+        with ProcessPoolExecutor(max_workers=min(self.jobs, len(sast_checkers)), initializer=_init_worker,
+                                 initargs=(self.api_init, self.args, self.check_api_type, enable_attr)) as executor:
+            futures = [executor.submit(_run_in_worker, sast_checker) for sast_checker in sast_checkers]
+            for sast_checker, future in zip(sast_checkers, futures):
+                ran, output, error, command_stats, memory_reports = future.result()
+                command.merge_stats(command_stats)
+                memory.merge_reports(memory_reports)
+                if ran:
+                    print(output, flush=True)
+                    yield sast_checker, error
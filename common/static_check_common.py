@@ -2,21 +2,18 @@
 #
 # Copyright 2023-2025 Enflame. All Rights Reserved.
 #
-import subprocess
 import os
-import argparse
 import re
 import sys
 import json
 from io import StringIO
-from contextlib import redirect_stdout
-import getpass
+from contextlib import redirect_stdout, redirect_stderr
 from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
 import pickle
-import xml.dom.minidom
+import importlib.util
+import hashlib
+import tempfile
 # Get the directory containing this file (common directory)
 COMMON_DIR = Path(__file__).resolve().parent
 # Get the parent directory (workspace root)
@@ -25,143 +22,186 @@ REPO_DIR = COMMON_DIR.parent
 sys.path.append(str(REPO_DIR))
 from common.config_parser import *
 from common import localgit
+from common import trace
+from common.command import run_command
+from common.findings_cache import FindingsCache
+from common.diff_index import DiffLines
+from common.commit_range import CommitRange, parse_commit_range
+
+def import_tool(tool_name):
+    '''
+    Import tools/<tool_name>.py once per process, an installed package of the same name can not shadow it
+    '''
+    module_name = "sast_tools_{}".format(tool_name)
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, str(REPO_DIR / "tools" / "{}.py".format(tool_name)))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
 
 class DefaultArgs():
-    def __init__(self,diff_type = DIFF_TYPE_INCREMENT,check_file = None):
+    def __init__(self,diff_type = DIFF_TYPE_INCREMENT,check_file = None,commit_range = None):
         self.diff_type = diff_type
         self.check_file = check_file
+        self.commit_range = commit_range
 
-class StaticCheck():
+class RunContext():
     '''
-    1.Abstract away platform-specific details, such as code from localgit.
-    2.Encapsulate common operations, such as getting the diff lines, getting the check lines, etc.
-    3.Provide base information,like commit hash,change url,etc.
+    Change set information shared by all checkers of one run.
+    1.Probe git once: commit ids, branch, project name, changed files, commit message and author.
+    2.Compute the diff lazily on first use and share it between checkers.
+      In range mode the log of the range is read once at init, it gives the diff, the commits and the commit of every added line.
+    run.py builds it once and injects it through args.run_context, it is read-only after init.
     '''
-    def __init__(self, api_init, args, check_api_type, cache_file = SERIALIZED_FILE_NAME):
-        self.timestamp = datetime.now()
-        if os.path.exists(cache_file):
-            with open(cache_file, 'rb') as load_file:
-                self.cache = pickle.load(load_file, encoding='utf-8')
-                self.cache.timestamp = datetime.now()
+    def __init__(self, api_init = None, args = None, check_api_type = None):
+        if not api_init or not args or not check_api_type:
+            api_init = localgit.Local()
+            args = DefaultArgs(diff_type=DIFF_TYPE_INCREMENT)
+            check_api_type = API_TYPE_LOCALGIT
+        self.check_api_type = check_api_type
+        self.diff_type = args.diff_type
+        self.check_file = args.check_file
+        self.commit_range = getattr(args, "commit_range", None)
+        # git pathspecs of the files the active checkers may look at, set by run.py, see registry.get_pathspecs
+        self.pathspecs = tuple(getattr(args, "pathspecs", None) or ())
+        self.api_init = api_init
+        self.add_files = ()
+        self.changed_files = ()
+        self.add_or_changed_files = ()
+        # range mode: the commits of the range oldest first, and {file path: {line number: commit}} of the added lines
+        self.range_commits = ()
+        self.line_commits = {}
+        self._diff_info = None
+        if check_api_type == API_TYPE_LOCALGIT:
+            self.patchset_revision = self.api_init.get_current_commit_id()
+            self.patchset_revision_old = self.api_init.get_old_commit_id()
+            self.change_url = self.api_init.get_local_path()
+            self.branch = self.api_init.get_current_branch()
+            self.project_name = self.api_init.get_current_project_name()
         else:
-            if not api_init or not args or not check_api_type:
-                api_init = localgit.Local()
-                args = DefaultArgs(diff_type=DIFF_TYPE_INCREMENT)
-                check_api_type = API_TYPE_LOCALGIT
-            self.check_api_type = check_api_type
-            self.default_check = False
-            self.local_ci_check = True
-            self.local_workspace_check = False
-            self.pass_flag = True
-            self.permission_flag = False
-            self.diff_type = args.diff_type
-            self.check_file = args.check_file
-            self.api_init = api_init
-            self.add_files = list()
-            self.renamed_files = list()
-            self.modified_files = list()
-            self.add_or_changed_files = list()
-            self.files_static_check_status = dict()
-            self.hook_data = []
-            self.tools_path = "{}/tools".format(REPO_DIR)
-            self.default_config_path = "{}/config".format(REPO_DIR)
-            if check_api_type == API_TYPE_LOCALGIT:
-                self.patchset_revision = self.api_init.get_current_commit_id()
-                self.patchset_revision_old = self.api_init.get_old_commit_id()
-                self.change_url = self.api_init.get_local_path()
-                self.branch = self.api_init.get_current_branch()
-                self.project_name = self.api_init.get_current_project_name()
-            else:
-                print("Check type input error")
-                exit(1)
+            print("Check type input error")
+            exit(1)
+
+        self._patchset_files()
 
-            self._patchset_files()
+        if self.range_commits:
+            self.commit_message = self.range_commits[-1]["message"]
+            self.commit_author = self.range_commits[-1]["author"]
+        else:
+            self.commit_message = self.api_init.get_edit_commit_message()
+            self.commit_author = self.api_init.get_current_author()
+        self._files_meta = None
+        self._cache = None
+        self._frozen = True
 
-            self.commit_message = self.get_last_commit_messages()
-            self.commit_author = self.get_last_commit_owner()
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("RunContext is read-only, can not set {}".format(name))
+        super().__setattr__(name, value)
 
-            if self.check_api_type != API_TYPE_LOCALGIT:
-                with open(SERIALIZED_FILE_NAME, 'wb') as dump_file:
-                    pickle.dump(self, dump_file, protocol=pickle.DEFAULT_PROTOCOL)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        return state
 
+    def attach_cache(self, cache):
+        '''
+        Save the context to cache again once the lazy diff is computed
+        '''
+        object.__setattr__(self, "_cache", cache)
 
     def _patchset_files(self):
         if  self.check_api_type == API_TYPE_LOCALGIT:
             if self.diff_type == DIFF_TYPE_WORKSPACE:
-                pipe = subprocess.Popen("git status -s | grep -P '^\s*M' |awk '{print $2}'",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                self.changed_files = command_output.decode('utf-8').splitlines()
-                pipe = subprocess.Popen("git status -s | grep -P '^\?\?' |awk '{print $2}'",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                self.add_files = command_output.decode('utf-8').splitlines()
+                # not limited to the pathspecs, git would list the matching files of an untracked directory instead of "dir/"
+                status = self.api_init.get_status()
+                # modified in the index or in the working tree, an untracked directory is one "dir/" entry
+                self.changed_files = tuple(x["path"] for x in status if x["kind"] == "1" and (x["xy"][0] == "M" or x["xy"] == ".M"))
+                self.add_files = tuple(x["path"] for x in status if x["kind"] == "?")
                 if self.check_file:
                     if self.check_file in self.add_files or any([self.check_file.startswith(x) for x in self.add_files]):
-                        self.add_files = [self.check_file]
-                        self.add_or_changed_files = [self.check_file]
+                        self.add_files = (self.check_file,)
+                        self.add_or_changed_files = (self.check_file,)
                     elif self.check_file in self.changed_files:
-                        self.add_files = []
-                        self.add_or_changed_files = [self.check_file]
+                        self.add_files = ()
+                        self.add_or_changed_files = (self.check_file,)
                     else:
-                        self.add_files = []
-                        self.add_or_changed_files = []
+                        self.add_files = ()
+                        self.add_or_changed_files = ()
                 else:
                     self.add_or_changed_files = self.changed_files
             elif self.diff_type == DIFF_TYPE_INCREMENT:
                 # if git depth is 1, 'git diff' will not work,so we use 'git show' instead
-                pipe = subprocess.Popen("git show --no-commit-id --name-only --diff-filter=ACMR HEAD",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                self.add_or_changed_files = command_output.decode('utf-8').splitlines()
-                pipe = subprocess.Popen("git show --no-commit-id --name-only --diff-filter=A HEAD",
-                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-                command_output = pipe.communicate()[0]
-                self.add_files = command_output.decode('utf-8').splitlines()
-
+                # the same rename detection as the diff, a moved file is no added file
+                rename_options = localgit.get_rename_options()
+                pathspec_arguments = localgit.get_pathspec_arguments(self.pathspecs)
+                command_output = run_command(["git", "show", "--no-commit-id", "--name-only", "--diff-filter=ACMR"] + rename_options + ["HEAD"] + pathspec_arguments).output
+                self.add_or_changed_files = tuple(command_output.splitlines())
+                command_output = run_command(["git", "show", "--no-commit-id", "--name-only", "--diff-filter=A"] + rename_options + ["HEAD"] + pathspec_arguments).output
+                self.add_files = tuple(command_output.splitlines())
+            elif self.diff_type == DIFF_TYPE_RANGE:
+                self._range_files()
+            elif self.diff_type == DIFF_TYPE_STAGED:
+                self._staged_files()
 
-    def ignore_checker(self, ignore_type, ignore_admin):
+    def _staged_files(self):
         '''
-        skip check if the commit message contains the ignore keyword
+        The files of the index that differ from HEAD, the diff and the sizes are read from the index blobs.
+        The tools read the working tree, so a file with changes that are not staged fails the run, its findings
+        would be on the wrong lines or in code that is not committed.
         '''
-        return False
+        staged = [x for x in self.api_init.get_status() if x["kind"] in ["1", "2"] and x["xy"][0] in "AMRC"]
+        if self.check_file:
+            staged = [x for x in staged if x["path"] == self.check_file]
+        partially_staged = [x["path"] for x in staged if x["xy"][1] != "."]
+        if partially_staged:
+            for file_path in partially_staged:
+                print("{} has changes that are not staged".format(file_path))
+            print("--diff-type staged checks the files as they are in the index, stage or stash the changes first", flush=True)
+            sys.exit(1)
+        self.add_or_changed_files = tuple(x["path"] for x in staged)
+        self.add_files = tuple(x["path"] for x in staged if x["xy"][0] == "A")
+        self.changed_files = tuple(x["path"] for x in staged if x["xy"][0] == "M")
 
-    def is_binary(self, file_path):
+    def _staged_base(self):
+        # the index of a repository without commits is diffed against the empty tree
+        return "HEAD" if self.api_init.read_head_commit_id() else GIT_NULL_TREE
+
+    def _range_files(self):
         '''
-        Check if the file is binary
-        return False if file is directory or text file
+        Fold the commits of the range into its diff, the tools then run once on the files of B instead of once per commit
         '''
-        _TEXT_BOMS = (
-            codecs.BOM_UTF16_BE,
-            codecs.BOM_UTF16_LE,
-            codecs.BOM_UTF32_BE,
-            codecs.BOM_UTF32_LE,
-            codecs.BOM_UTF8,
-        )
-        if os.path.isfile(file_path):
-            with open(file_path, 'rb') as source_file:
-                initial_bytes = source_file.read(8192)
-                return not any(initial_bytes.startswith(bom) for bom in _TEXT_BOMS) and b'\0' in initial_bytes
-        else:
-            return False
+        revision_new = parse_commit_range(self.commit_range)[1]
+        if run_command(["git", "rev-parse", "--verify", "-q", revision_new + "^{commit}"]).output.strip() != self.patchset_revision:
+            print("warning: {} is not checked out, the files are checked as they are in the working tree".format(revision_new))
+        commit_range = CommitRange()
+        with trace.span("parse log", "diff", commit_range=self.commit_range):
+            for commit_info, records in self.api_init.iter_log(self.commit_range):
+                commit_range.add_commit(commit_info, records)
+        self.range_commits = tuple(commit_range.commits)
+        self.line_commits = commit_range.get_line_commits()
+        self._diff_info = commit_range.get_diff_info()
+        self.add_or_changed_files = commit_range.get_add_or_changed_files()
+        self.add_files = commit_range.get_add_files()
 
-    def get_diff_lines_info(self):
+    def get_diff_lines_info(self, pathspecs=None):
         '''
         Get the deleted lines and added lines from the commit
         return:
         {
             "common_util/util_func.groovy": {
-                "add":[(6822,"def epkgVerify1")],
-                "del":[(6822,"def epkgVerify2")],
+                "add":DiffLines([(6822,"def epkgVerify1")]),
+                "del":DiffLines([(6822,"def epkgVerify2")]),
                 "type":"modify",
                 "old_path":"common_util/util_func.groovy"
             }
         }
         '''
-        result = self.api_init.get_diff()
+        result = self.api_init.get_diff(pathspecs=pathspecs)
         return result
 
-    def get_diff_lines_info_for_local(self, revision1=GIT_NULL_TREE, revision2="HEAD", directory = "./"):
+    def get_diff_lines_info_for_local(self, revision1=GIT_NULL_TREE, revision2="HEAD", directory = "./", pathspecs=None):
         '''
         Use the diff between the current commit and an empty tree to obtain the full code
         '''
@@ -169,41 +209,270 @@ class StaticCheck():
             print("get_diff_lines_info_for_local only support local git")
             exit(1)
         local = localgit.Local(directory)
-        result = local.get_diff(revision1, revision2)
+        result = local.get_diff(revision1, revision2, pathspecs)
         return result
 
-    def get_diff_lines_for_workspace(self,check_file):
+    def get_diff_lines_for_workspace(self,check_file,pathspecs=None):
         '''
         '''
         if check_file:
             if check_file in list(set(self.add_or_changed_files) - set(self.add_files)):
                 return self.get_diff_lines_info_for_local(revision1=check_file,revision2="",directory = "./")
             else:
-                add_info = []
+                add_info = DiffLines()
                 with open(check_file,'r',encoding='utf-8',errors='ignore') as f:
-                    for index,content in enumerate(f.readlines()):
-                         add_info.append((index+1, content))
+                    for index,content in enumerate(f):
+                         add_info.append(index+1, content)
                 return {
                      check_file: {
                         "add":add_info,
-                        "del":[],
+                        "del":DiffLines(),
                         "type":"add",
                         "old_path":""
                     }
                 }
         else:
-            return self.get_diff_lines_info_for_local(revision1="",revision2="HEAD",directory = "./")
+            return self.get_diff_lines_info_for_local(revision1="",revision2="HEAD",directory = "./",pathspecs=pathspecs)
+
+    def get_diff_lines_for_index(self, pathspecs=None):
+        '''
+        Get the deleted lines and added lines of the index against HEAD
+        '''
+        result = self.api_init.get_diff(self._staged_base(), "", pathspecs, cached=True)
+        if self.check_file:
+            result = {x: y for x, y in result.items() if x in self.add_or_changed_files}
+        return result
 
     def get_diff_info(self,*args,**kwargs):
         '''
         Get the deleted lines and added lines
+        The default diff of this run is computed once and shared, treat the result as read-only,
+        it leaves out the files outside of pathspecs, which no active checker looks at.
+        '''
+        if args or kwargs:
+            return self._compute_diff_info(*args,**kwargs)
+        if self._diff_info is None:
+            with trace.span("compute diff", "diff", diff_type=self.diff_type, pathspecs=len(self.pathspecs)):
+                object.__setattr__(self, "_diff_info", self._compute_diff_info(pathspecs=self.pathspecs))
+            if self._cache:
+                self._cache.save(self)
+        return self._diff_info
+
+    def get_files_meta(self):
+        '''
+        return the size, blob SHA and mode of add_or_changed_files, computed once and shared like the diff
+        {
+            "a.txt":{
+                "size":8773,
+                "sha":"3b18e512dba79e4c8300dd08aeb37f8e728b8dad",
+                "mode":"100644"
+            }
+        }
         '''
-        if self.diff_type == DIFF_TYPE_FULL:
+        if getattr(self, "_files_meta", None) is None:
+            if self.diff_type == DIFF_TYPE_FULL:
+                files_meta = self.api_init.get_changed_files_meta(GIT_NULL_TREE, "HEAD", self.pathspecs)
+            elif self.diff_type == DIFF_TYPE_WORKSPACE:
+                files_meta = self.api_init.get_changed_files_meta("HEAD", "", self.pathspecs)
+            elif self.diff_type == DIFF_TYPE_RANGE:
+                files_meta = self.api_init.get_changed_files_meta(*parse_commit_range(self.commit_range), self.pathspecs)
+            elif self.diff_type == DIFF_TYPE_STAGED:
+                files_meta = self.api_init.get_changed_files_meta(self._staged_base(), "", self.pathspecs, cached=True)
+            else:
+                files_meta = self.api_init.get_changed_files_meta(pathspecs=self.pathspecs)
+            # untracked files of the workspace are in no diff
+            for file_path in self.add_or_changed_files:
+                if file_path not in files_meta and os.path.isfile(file_path):
+                    files_meta[file_path] = self.api_init.get_worktree_file_meta(file_path)
+            object.__setattr__(self, "_files_meta", files_meta)
+            if self._cache:
+                self._cache.save(self)
+        return self._files_meta
+
+    def _compute_diff_info(self,*args,**kwargs):
+        # the diff of a range is computed with the commits at init, only a diff of other revisions gets here
+        if self.diff_type in [DIFF_TYPE_FULL, DIFF_TYPE_RANGE]:
             return self.get_diff_lines_info_for_local(*args,**kwargs)
         elif self.diff_type == DIFF_TYPE_INCREMENT:
-            return self.get_diff_lines_info()
+            return self.get_diff_lines_info(*args,**kwargs)
         elif self.diff_type == DIFF_TYPE_WORKSPACE:
-            return self.get_diff_lines_for_workspace(self.check_file)
+            return self.get_diff_lines_for_workspace(self.check_file,*args,**kwargs)
+        elif self.diff_type == DIFF_TYPE_STAGED:
+            return self.get_diff_lines_for_index(*args,**kwargs)
+
+class RunContextCache():
+    '''
+    Keep the RunContext in SERIALIZED_FILE_NAME under the git directory, so checkers run as
+    separate processes (such as a pre-push hook calling checkers/x_check.py one by one) probe git once.
+    The cache is keyed by HEAD commit id, diff type, check file, the commits of --range, pathspecs and config hash, a mismatch of key or
+    SERIALIZED_FILE_VERSION invalidates it. Workspace and staged modes are never cached, the working tree and the index change without HEAD.
+    '''
+    def __init__(self, api_init = None, args = None, cache_file = None):
+        self.api_init = api_init or localgit.Local()
+        self.args = args
+        git_dir = self.api_init.get_git_dir()
+        if cache_file is None and git_dir:
+            cache_file = os.path.join(git_dir, SERIALIZED_FILE_NAME)
+        self.cache_file = cache_file
+        self.key = self._make_key()
+
+    def _make_key(self):
+        diff_type = getattr(self.args, "diff_type", DIFF_TYPE_INCREMENT)
+        if not self.cache_file or diff_type in [DIFF_TYPE_WORKSPACE, DIFF_TYPE_STAGED]:
+            return None
+        head = self.api_init.read_head_commit_id()
+        if not head:
+            return None
+        commit_range = None
+        if diff_type == DIFF_TYPE_RANGE:
+            # a branch name of the range may move while HEAD does not
+            commit_range = run_command(["git", "rev-parse"] + list(parse_commit_range(self.args.commit_range))).output.split()
+        pathspecs = tuple(getattr(self.args, "pathspecs", None) or ())
+        return (head, diff_type, getattr(self.args, "check_file", None), commit_range, pathspecs, self._config_hash())
+
+    def _config_hash(self):
+        config_hash = hashlib.sha1()
+        custom_config_file = os.path.join(os.getcwd(), ".sast_config.json")
+        for config_file in [CONFIG_FILE, custom_config_file, getattr(self.args, "config_path", None)]:
+            if config_file and os.path.isfile(config_file):
+                with open(config_file, 'rb') as f:
+                    config_hash.update(f.read())
+        return config_hash.hexdigest()
+
+    def load(self):
+        '''
+        return the cached RunContext, None if there is no valid cache
+        '''
+        if not self.key or not os.path.isfile(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'rb') as load_file:
+                data = pickle.load(load_file, encoding='utf-8')
+        except Exception:
+            return None
+        if not isinstance(data, dict) or data.get("version") != SERIALIZED_FILE_VERSION or data.get("key") != self.key:
+            return None
+        context = data.get("context")
+        context.attach_cache(self)
+        return context
+
+    def save(self, context):
+        '''
+        write to a temp file and rename it, so a concurrent reader never sees a partial file
+        '''
+        if not self.key:
+            return
+        data = {"version": SERIALIZED_FILE_VERSION, "key": self.key, "context": context}
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=SERIALIZED_FILE_NAME, dir=os.path.dirname(os.path.abspath(self.cache_file)))
+            with os.fdopen(fd, 'wb') as dump_file:
+                pickle.dump(data, dump_file, protocol=pickle.DEFAULT_PROTOCOL)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_run_context(self, check_api_type):
+        '''
+        return the cached RunContext, or build and cache a new one
+        '''
+        context = self.load()
+        if context is None:
+            context = RunContext(self.api_init, self.args, check_api_type)
+            context.attach_cache(self)
+            self.save(context)
+        return context
+
+class StaticCheck():
+    '''
+    1.Abstract away platform-specific details, such as code from localgit.
+    2.Encapsulate common operations, such as getting the diff lines, getting the check lines, etc.
+    3.Provide base information,like commit hash,change url,etc.
+    The change set information comes from a RunContext, taken from args.run_context when run.py
+    provides one, otherwise loaded from RunContextCache for a standalone checker run.
+    '''
+    def __init__(self, api_init, args, check_api_type, cache_file = None):
+        self.timestamp = datetime.now()
+        context = getattr(args, "run_context", None)
+        if context is None:
+            context = RunContextCache(api_init, args, cache_file).get_run_context(check_api_type)
+        self.context = context
+        self.check_api_type = context.check_api_type
+        self.default_check = False
+        self.local_ci_check = True
+        self.local_workspace_check = False
+        self.pass_flag = True
+        self.permission_flag = False
+        self.diff_type = context.diff_type
+        self.check_file = context.check_file
+        self.api_init = context.api_init
+        self.add_files = list(context.add_files)
+        self.renamed_files = list()
+        self.modified_files = list()
+        self.changed_files = list(context.changed_files)
+        self.add_or_changed_files = list(context.add_or_changed_files)
+        self.files_static_check_status = dict()
+        self.hook_data = []
+        self.tools_path = "{}/tools".format(REPO_DIR)
+        self.default_config_path = "{}/config".format(REPO_DIR)
+        self.patchset_revision = context.patchset_revision
+        self.patchset_revision_old = context.patchset_revision_old
+        self.change_url = context.change_url
+        self.branch = context.branch
+        self.project_name = context.project_name
+
+        self.commit_message = context.commit_message
+        self.commit_author = context.commit_author
+        self.commit_range = context.commit_range
+        self.range_commits = list(context.range_commits)
+        self.line_commits = context.line_commits
+
+    def ignore_checker(self, ignore_type, ignore_admin):
+        '''
+        skip check if the commit message contains the ignore keyword
+        '''
+        return False
+
+    def is_binary(self, file_path):
+        '''
+        Check if the file is binary
+        return False if file is directory or text file
+        '''
+        _TEXT_BOMS = (
+            codecs.BOM_UTF16_BE,
+            codecs.BOM_UTF16_LE,
+            codecs.BOM_UTF32_BE,
+            codecs.BOM_UTF32_LE,
+            codecs.BOM_UTF8,
+        )
+        if os.path.isfile(file_path):
+            with open(file_path, 'rb') as source_file:
+                initial_bytes = source_file.read(8192)
+                return not any(initial_bytes.startswith(bom) for bom in _TEXT_BOMS) and b'\0' in initial_bytes
+        else:
+            return False
+
+    def get_diff_lines_info(self):
+        '''
+        Get the deleted lines and added lines from the commit
+        '''
+        return self.context.get_diff_lines_info()
+
+    def get_diff_lines_info_for_local(self, revision1=GIT_NULL_TREE, revision2="HEAD", directory = "./"):
+        '''
+        Use the diff between the current commit and an empty tree to obtain the full code
+        '''
+        return self.context.get_diff_lines_info_for_local(revision1, revision2, directory)
+
+    def get_diff_lines_for_workspace(self,check_file):
+        return self.context.get_diff_lines_for_workspace(check_file)
+
+    def get_diff_info(self,*args,**kwargs):
+        '''
+        Get the deleted lines and added lines, shared by all checkers of the run
+        '''
+        return self.context.get_diff_info(*args,**kwargs)
 
     def upload_sonarqube(self):
         '''
@@ -255,14 +524,28 @@ class StaticCheck():
             }
         }
         '''
-        result = {}
-        result = self.api_init.get_changed_file_size()
-        return result
+        return self.context.get_files_meta()
+
+    def get_files_meta(self):
+        '''
+        return the size, blob SHA and mode of the changed files, shared by all checkers of the run
+        '''
+        return self.context.get_files_meta()
 
 
     def get_lfs_status(self,file_path):
-        flag = self.api_init.get_lfs_status(file_path)
-        return flag
+        return self.get_lfs_statuses([file_path])[file_path]
+
+    def get_lfs_statuses(self, file_paths):
+        '''
+        return {file path: True if it is stored in git lfs} of all file_paths, with one git check-attr
+        the files are read from what the run checks, the index in staged mode and the working tree in workspace mode
+        '''
+        if self.diff_type == DIFF_TYPE_STAGED:
+            return self.api_init.get_lfs_statuses(file_paths, "")
+        if self.diff_type == DIFF_TYPE_WORKSPACE:
+            return self.api_init.get_lfs_statuses(file_paths, None)
+        return self.api_init.get_lfs_statuses(file_paths)
 
     def get_file_content(self, file_path ,left):
         '''
@@ -312,13 +595,17 @@ class CICheckerCommon():
             sast_config = CommonUtil().load_json(args.config_path).get("sast_items_dict")
         else:
             sast_config = SAST_ITENS_DICT
+        self.check_config = sast_config.get(check_name)
         for property in sast_config.get(check_name):
             setattr(self, property, sast_config.get(self.check_name).get(property))
 
     def check(self):
+        if trace.enabled():
+            # check_report is called from inside check_func of each checker, trace it on the instance
+            self.check_report = trace.traced("report", "check_report")(self.check_report)
         try:
             captured_output = StringIO()
-            with redirect_stdout(captured_output):
+            with redirect_stdout(captured_output), trace.checker_span(self.check_name):
                 if not self.ignore_checker(self.check_name, self.ignore_admin):
                     self.check_func()
                 else:
@@ -328,10 +615,43 @@ class CICheckerCommon():
                     msg = str(self.id) + ":"+self.check_name  + "." * (cols - len(self.check_name) -len(self.id)- len(pass_word) - len(ignore_word) -1 ) + ignore_word + pass_word
                     print(msg)
         finally:
-            sys.stdout = sys.__stdout__
             captured_output.seek(0)
             content = captured_output.read().strip()
             print(content)
+            if self.diff_type == DIFF_TYPE_RANGE and self.hook_data:
+                findings = self.format_findings_by_commit()
+                if findings:
+                    print(findings)
+
+    def format_findings_by_commit(self):
+        '''
+        return the failed messages of hook_data grouped by the commit of the range that added their line,
+        a message without a "file:line:" prefix or on a line the range did not add is under the range as a whole
+        '''
+        subjects = {x["commit"]: x["message"].strip().split("\n")[0] for x in self.range_commits}
+        groups = {}
+        for item in self.hook_data:
+            if item.get("result") != "fail":
+                continue
+            line_commits = self.line_commits.get(item.get("file"), {})
+            # only the line of the file the checkers put first, not a number in the text like "column 8"
+            line_prefix = re.compile(r"(?:\./)?{}:(\d+):".format(re.escape(item.get("file") or "")))
+            for message in item.get("message") or []:
+                match = line_prefix.match(message.strip())
+                commit = line_commits.get(int(match.group(1))) if match else None
+                message = message.strip()
+                if not message.startswith(item.get("file") or ""):
+                    message = "{}: {}".format(item.get("file"), message)
+                groups.setdefault(commit, []).append(message)
+        if not groups:
+            return ""
+        lines = ["\tFindings by commit of {}:".format(self.commit_range)]
+        for commit in [x["commit"] for x in self.range_commits] + [None]:
+            if commit not in groups:
+                continue
+            lines.append("\t\t" + ("{} {}".format(commit[:12], subjects[commit]) if commit else "(the range as a whole)"))
+            lines.extend("\t\t\t" + x for x in groups[commit])
+        return "\n".join(lines)
 
     def __getattr__(self, item):
         '''
@@ -341,6 +661,12 @@ class CICheckerCommon():
             return getattr(self.static_check.cache, item)
         return getattr(self.static_check, item)
 
+    def get_findings_cache(self, tool_version):
+        '''
+        return the findings cache of this checker, keyed by its sast_items_dict entry and tool_version
+        '''
+        return FindingsCache(self.check_name, self.check_config, tool_version)
+
     def get_filepaths(self, top, exclude_hidden_files = False):
         filepaths = []
         if exclude_hidden_files:
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Enflame. All Rights Reserved.
+#
+import os
+import json
+import time
+import functools
+import types
+import threading
+from contextlib import contextmanager
+
+# checker worker processes and standalone checkers find the events file of the run here
+TRACE_EVENTS_ENV = "SAST_TRACE_EVENTS"
+
+_events_file = os.environ.get(TRACE_EVENTS_ENV)
+# name of the checker running in this process, added to every span
+_current_checker = None
+
+
+def enabled():
+    return bool(_events_file)
+
+def _write_event(event):
+    '''
+    Every process appends complete events as json lines to the same file, one short O_APPEND write per event,
+    so spans of pool workers and of the main process do not interleave
+    '''
+    line = (json.dumps(event, default=str) + "\n").encode("utf-8")
+    fd = os.open(_events_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+def add_span(name, category, start, end, **args):
+    '''
+    record a finished span, start and end are time.time() values
+    '''
+    if not _events_file:
+        return
+    if _current_checker and "checker" not in args:
+        args["checker"] = _current_checker
+    _write_event({
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": int(start * 1000000),
+        "dur": int((end - start) * 1000000),
+        "pid": os.getpid(),
+        "tid": threading.get_ident() % 1000000,
+        "args": args,
+    })
+
+@contextmanager
+def span(name, category, **args):
+    '''
+    with trace.span("parse diff", "diff", file="a.cc"):
+    '''
+    if not _events_file:
+        yield
+        return
+    start = time.time()
+    try:
+        yield
+    finally:
+        add_span(name, category, start, time.time(), **args)
+
+@contextmanager
+def checker_span(checker):
+    '''
+    span of one checker, spans inside it carry the checker attribute
+    '''
+    global _current_checker
+    previous_checker = _current_checker
+    _current_checker = checker
+    try:
+        with span(checker, "checker"):
+            yield
+    finally:
+        _current_checker = previous_checker
+
+def traced(category, name = None):
+    '''
+    decorator, record a span for every call with the arguments of the call as attributes
+    '''
+    def decorator(func):
+        span_name = name or func.__qualname__
+        signature = []
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _events_file:
+                return func(*args, **kwargs)
+            if not signature:
+                # inspect is imported on the first traced call, a run without --trace does not pay for it
+                import inspect
+                signature.append(inspect.signature(func))
+            bound = signature[0].bind_partial(*args, **kwargs)
+            attributes = {x: str(y) for x, y in bound.arguments.items() if x != "self"}
+            with span(span_name, category, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_methods(category):
+    '''
+    class decorator, trace every public method of the class
+    '''
+    def decorator(cls):
+        for attr_name, attr in list(vars(cls).items()):
+            if not attr_name.startswith("_") and isinstance(attr, types.FunctionType):
+                setattr(cls, attr_name, traced(category)(attr))
+        return cls
+    return decorator
+
+def start(trace_file):
+    '''
+    Start tracing the run into trace_file, the events are collected next to it until finish()
+    '''
+    global _events_file
+    _events_file = os.path.abspath(trace_file) + ".events"
+    if os.path.exists(_events_file):
+        os.remove(_events_file)
+    os.environ[TRACE_EVENTS_ENV] = _events_file
+
+def finish(trace_file):
+    '''
+    Write the collected events to trace_file in Chrome trace event format, load it in chrome://tracing or Perfetto
+    '''
+    global _events_file
+    if not _events_file:
+        return
+    events = []
+    if os.path.exists(_events_file):
+        with open(_events_file, mode='r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    events.append(json.loads(line))
+        os.remove(_events_file)
+    for pid in sorted(set(x["pid"] for x in events)):
+        process_name = "sast main" if pid == os.getpid() else "sast worker {}".format(pid)
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": process_name}})
+    with open(trace_file, mode='w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    _events_file = None
+    os.environ.pop(TRACE_EVENTS_ENV, None)
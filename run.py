@@ -5,42 +5,51 @@
 # Version 1.0.0
 # Date 2025年8月19日
 
-import subprocess
 import os
 import argparse
-import re
 import sys
-import json
-from datetime import datetime
-from pprint import pprint
 from pathlib import Path
-from xml.dom.minidom import parse
-import xml.dom.minidom
-import importlib
 REPO_DIR = Path(sys.argv[0]).resolve().parent
 sys.path.append(str(REPO_DIR / 'common'))
 sys.path.append(str('{}/sast'.format(REPO_DIR)))
 sys.path.append('{}/checkers'.format(REPO_DIR))
 from common import localgit
-import time
-import codecs
+from common import registry
+from common.scheduler import CheckerScheduler
+from common.static_check_common import RunContextCache
+from common.commit_range import parse_commit_range
 
-from common.config_parser import DIFF_TYPE_INCREMENT,DIFF_TYPE_FULL,DIFF_TYPE_WORKSPACE, CHECKS_GROUP
+from common import trace
+from common import command
+from common import memory
+from common.command import run_command
 
-try:
-    import requests
-except ImportError as e:
-    ORANGE = '\033[38;5;172m'
-    RED = '\033[31m'
-    ENDC = '\033[0m'
-    print(RED+str(e)+ENDC)
-    matchObj = re.match( r'No module named \'(.*)\'', str(e))
-    if matchObj:
-        print (RED+"may you install with command:"+ENDC)
-        print (ORANGE+"\tpython3 -m pip install {}".format(matchObj.group(1))+ENDC)
-    exit(1)
+from common.config_parser import DIFF_TYPE_INCREMENT,DIFF_TYPE_FULL,DIFF_TYPE_WORKSPACE,DIFF_TYPE_RANGE,DIFF_TYPE_STAGED, CHECKS_GROUP, SAST_SOCKET, SAST_ITENS_DICT, CommonUtil
 
 
+def get_sast_checkers(enable_attr = None):
+    '''
+    return the names of the checker modules from the registry manifest, sorted so the report order is fixed
+    enable_attr such as "local_ci_check" skips the checkers disabled for that mode without importing them
+    '''
+    return [x["module"] for x in registry.get_checkers(enable_attr)]
+
+def get_active_checkers(args):
+    '''
+    return the checker modules run_checks runs for args
+    '''
+    if args.all_ci_check:
+        return get_sast_checkers("local_ci_check")
+    if args.all_workspace_check:
+        return get_sast_checkers("local_workspace_check")
+    if args.checks_group:
+        return [x for x in get_sast_checkers("local_ci_check") if x in CHECKS_GROUP.get(args.checks_group, [])]
+    return [x for x in get_sast_checkers() if getattr(args, x)]
+
+def get_sast_config(args):
+    if getattr(args, "config_path", ""):
+        return CommonUtil().load_json(args.config_path).get("sast_items_dict")
+    return SAST_ITENS_DICT
 
 class AllCICheck():
     def __init__(self, api_init, args, check_api_type):
@@ -50,18 +59,11 @@ class AllCICheck():
 
     def fully_check(self):
         exit_flag = 0
-        for sast_file in os.listdir("{}/checkers".format(REPO_DIR)):
-            if re.match(".*_check.py",sast_file):
-                sast_checker = sast_file.replace(".py","")
-                module = importlib.import_module(sast_checker)
-                if getattr(module, "CIChecker", None):
-                    checker = module.CIChecker(self.api_init, self.args, self.check_api_type)
-                    if checker.local_ci_check:
-                        try:
-                            checker.check()
-                        except Exception as e:
-                            print(sast_checker,e)
-                            exit_flag = 1
+        scheduler = CheckerScheduler(self.api_init, self.args, self.check_api_type, self.args.jobs)
+        for sast_checker, error in scheduler.run(get_sast_checkers("local_ci_check"), "local_ci_check"):
+            if error is not None:
+                print(sast_checker,error)
+                exit_flag = 1
         sys.exit(exit_flag)
 
 class AllWorkspaceCheck():
@@ -71,17 +73,9 @@ class AllWorkspaceCheck():
         self.check_api_type = check_api_type
 
     def fully_check(self):
-        for sast_file in os.listdir("{}/checkers".format(REPO_DIR)):
-            if re.match(".*_check.py",sast_file):
-                sast_checker = sast_file.replace(".py","")
-                module = importlib.import_module(sast_checker)
-                if getattr(module, "CIChecker", None):
-                    checker = module.CIChecker(self.api_init, self.args, self.check_api_type)
-                    if checker.local_workspace_check:
-                        try:
-                            checker.check()
-                        except Exception as e:
-                            pass
+        scheduler = CheckerScheduler(self.api_init, self.args, self.check_api_type, self.args.jobs)
+        for sast_checker, error in scheduler.run(get_sast_checkers("local_workspace_check"), "local_workspace_check"):
+            pass
 
 class ChecksGroupCheck():
     def __init__(self, api_init, args, check_api_type, checks_group):
@@ -94,22 +88,14 @@ class ChecksGroupCheck():
 
     def fully_check(self):
         exit_flag = 0
-        for sast_file in os.listdir("{}/checkers".format(REPO_DIR)):
-            if re.match(".*_check.py",sast_file):
-                sast_checker = sast_file.replace(".py","")
-                if sast_checker not in self.checks_group:
-                    continue
-                module = importlib.import_module(sast_checker)
-                if getattr(module, "CIChecker", None):
-                    checker = module.CIChecker(self.api_init, self.args, self.check_api_type)
-                    if checker.local_ci_check:
-                        try:
-                            checker.check()
-                        except Exception as e:
-                            exit_flag = 1
+        sast_checkers = [x for x in get_sast_checkers("local_ci_check") if x in self.checks_group]
+        scheduler = CheckerScheduler(self.api_init, self.args, self.check_api_type, self.args.jobs)
+        for sast_checker, error in scheduler.run(sast_checkers, "local_ci_check"):
+            if error is not None:
+                exit_flag = 1
         sys.exit(exit_flag)
 
-def script_parse_args():
+def script_parse_args(argv = None):
     parser = argparse.ArgumentParser(
         description='script command line interface description')
     parser.add_argument("--all_ci_check", dest="all_ci_check", action='store_true',
@@ -120,35 +106,65 @@ def script_parse_args():
                         required=False, help="Run a set of checks defined in the configuration file")
     parser.add_argument("--api-type",  type=str, dest="api_type",
                         required=False, help="What api you use? localgit.")
-    parser.add_argument("--diff-type",  type=str, dest="diff_type",default=DIFF_TYPE_INCREMENT, choices=[DIFF_TYPE_INCREMENT,DIFF_TYPE_FULL,DIFF_TYPE_WORKSPACE],
-                        required=False, help="What content you check? increment or full.")
+    parser.add_argument("--diff-type",  type=str, dest="diff_type",default=DIFF_TYPE_INCREMENT, choices=[DIFF_TYPE_INCREMENT,DIFF_TYPE_FULL,DIFF_TYPE_WORKSPACE,DIFF_TYPE_STAGED],
+                        required=False, help="What content you check? increment, full, workspace or staged (the index, for a pre-commit hook).")
+    parser.add_argument("--range",  type=str, dest="commit_range",
+                        required=False, help="Check the lines A..B adds, folded into one diff and checked once in the files as they are in B, findings are grouped by the commit that added them, it overrides --diff-type.")
     parser.add_argument("--check-file",  type=str, dest="check_file",
                         required=False, help="What file you check?")
     parser.add_argument("--root-path", type=str, dest="root_path",
                         required=False, help="workspace")
     parser.add_argument("-c", "--config" ,type=str, dest="config_path",
                         required=False, help="config_path")
-    for sast_check in os.listdir("{}/checkers".format(REPO_DIR)):
-        if re.match(".*_check.py",sast_check):
-            sast_check = sast_check.replace(".py","")
-            parser.add_argument("--{}".format(sast_check), dest=sast_check, action='store_true',
-                    default=False, help='This option is to do {}'.format(sast_check))
+    parser.add_argument("-j", "--jobs", type=int, dest="jobs", default=os.cpu_count(),
+                        required=False, help="How many checkers run at the same time, default is the number of cores.")
+    parser.add_argument("--serve", dest="serve", action='store_true',
+                        required=False, help="Run as a resident server on --socket, keep imports, config and tool dictionaries warm.")
+    parser.add_argument("--connect", dest="connect", action='store_true',
+                        required=False, help="Send the check to the server on --socket, run it locally if no server is listening.")
+    parser.add_argument("--socket", type=str, dest="socket_path", default=SAST_SOCKET,
+                        required=False, help="Unix socket of the sast server, default is $SAST_SOCKET or {}".format(SAST_SOCKET))
+    parser.add_argument("--trace", type=str, dest="trace_file",
+                        required=False, help="Write Chrome trace events of the run to this file, open it in chrome://tracing or Perfetto.")
+    parser.add_argument("--stats", dest="stats", action='store_true',
+                        required=False, help="Print calls, total and p95 time of the external commands per kind at the end.")
+    parser.add_argument("--memory-profile", dest="memory_profile", action='store_true',
+                        required=False, help="Print the peak RSS and the top python allocators of every checker at the end.")
+    parser.add_argument("--max-rss", type=float, dest="max_rss",
+                        required=False, help="Memory budget in MB of each sast process, a checker going over it is aborted and reported.")
+    for sast_check in get_sast_checkers():
+        parser.add_argument("--{}".format(sast_check), dest=sast_check, action='store_true',
+                default=False, help='This option is to do {}'.format(sast_check))
 
-    args = parser.parse_args()
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
     if args.root_path:
         os.chdir(args.root_path)
-    if len(sys.argv) == 1:
+    if args.commit_range:
+        args.diff_type = DIFF_TYPE_RANGE
+    if len(argv) == 0:
         parser.print_help()
         sys.exit(0)
     return args
 
+def check_commit_range(commit_range):
+    '''
+    return the error of a --range that is not like A..B or whose ends are no commits, None if it is fine
+    '''
+    try:
+        revisions = parse_commit_range(commit_range)
+    except Exception as e:
+        return str(e)
+    for revision in revisions:
+        if run_command(["git", "rev-parse", "--verify", "-q", revision + "^{commit}"]).returncode != 0:
+            return "--range {}: {} is not a commit".format(commit_range, revision)
+    return None
+
 def get_project_name_local():
-    project_name = ''
-    cmd = 'git ls-remote --get-url | xargs basename -s .git'
-    pipe = subprocess.Popen(cmd,stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True, executable="/bin/bash")
-    stdout, _stderr = pipe.communicate()
-    project_name = stdout
-    return project_name.decode('utf-8').strip("\n")
+    project_name = os.path.basename(run_command(["git", "ls-remote", "--get-url"]).output.strip())
+    if project_name.endswith(".git"):
+        project_name = project_name[:-4]
+    return project_name
 
 def parse_args_check(args):
     api_init = None
@@ -157,10 +173,80 @@ def parse_args_check(args):
 
     return check_api_type, api_init
 
-def main():
-    args = script_parse_args()
+def strip_server_args(argv):
+    '''
+    remove the options of the client, the server runs the rest as a normal check in the client's root path
+    '''
+    result = []
+    skip_next = False
+    for arg in argv:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ["--serve", "--connect"]:
+            continue
+        if arg in ["--socket", "--root-path"]:
+            skip_next = True
+            continue
+        if arg.startswith("--socket=") or arg.startswith("--root-path="):
+            continue
+        result.append(arg)
+    return result
+
+def serve_request(argv):
+    try:
+        main(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+def main(argv = None):
+    args = script_parse_args(argv)
+    if args.serve:
+        # the socket module of the daemon is only imported by --serve and --connect
+        from common.daemon import SastServer
+        SastServer(args.socket_path, lambda request_argv: serve_request(strip_server_args(request_argv))).serve_forever()
+        sys.exit(0)
+    if args.connect:
+        from common.daemon import request
+        exit_code = request(args.socket_path, strip_server_args(sys.argv[1:] if argv is None else argv))
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    if args.trace_file:
+        trace.start(args.trace_file)
+    if args.memory_profile or args.max_rss:
+        memory.start(args.memory_profile, args.max_rss)
+    try:
+        run_checks(args)
+    except memory.MemoryBudgetExceeded as e:
+        # over the budget outside of a checker, nothing is left to degrade to
+        print("{}, the run is aborted".format(e), flush=True)
+        sys.exit(1)
+    finally:
+        command.finish_running_commands()
+        if args.trace_file:
+            trace.finish(args.trace_file)
+        if args.stats:
+            print(command.format_stats(), flush=True)
+        if memory.enabled():
+            memory_report = memory.format_reports()
+            if memory_report:
+                print(memory_report, flush=True)
+        memory.stop()
 
+def run_checks(args):
     check_api_type, api_init = parse_args_check(args)
+    if args.commit_range:
+        error = check_commit_range(args.commit_range)
+        if error:
+            print(error, flush=True)
+            sys.exit(1)
+    # git leaves out the files no active checker looks at
+    args.pathspecs = registry.get_pathspecs(get_active_checkers(args), get_sast_config(args))
+    # probe git once and share the change set with every checker
+    with trace.span("run context", "context"):
+        args.run_context = RunContextCache(api_init, args).get_run_context(check_api_type)
     if args.all_ci_check:
         fully_checker = AllCICheck(api_init, args, check_api_type)
         fully_checker.fully_check()
@@ -172,17 +258,11 @@ def main():
         checks_group.fully_check()
     else:
         exit_flag = 0
-        for sast_file in os.listdir("{}/checkers".format(REPO_DIR)):
-            if re.match(".*_check.py",sast_file):
-                sast_checker = sast_file.replace(".py","")
-                if getattr(args, sast_checker):
-                    module = importlib.import_module(sast_checker)
-                    if getattr(module, "CIChecker", None):
-                        checker = module.CIChecker(api_init, args, check_api_type)
-                        try:
-                            checker.check()
-                        except Exception as e:
-                            exit_flag = 1
+        sast_checkers = [x for x in get_sast_checkers() if getattr(args, x)]
+        scheduler = CheckerScheduler(api_init, args, check_api_type, args.jobs)
+        for sast_checker, error in scheduler.run(sast_checkers):
+            if error is not None:
+                exit_flag = 1
         sys.exit(exit_flag)
                         
 if __name__ == '__main__':
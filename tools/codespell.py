@@ -657,6 +657,28 @@ def build_dict(
                         add_misspelling(alt_key, alt_data, misspellings)
 
 
+# parsed dictionaries, kept for the life of the process so a resident sast server parses them once
+_dict_cache: Dict[Tuple[str, int], Dict[str, Misspelling]] = {}
+
+
+def load_dict(filename: str) -> Dict[str, Misspelling]:
+    """Parse a dictionary without ignore words, cached by path and mtime."""
+    key = (os.path.realpath(filename), os.stat(filename).st_mtime_ns)
+    if key not in _dict_cache:
+        misspellings: Dict[str, Misspelling] = {}
+        build_dict(filename, misspellings, set())
+        _dict_cache[key] = misspellings
+    return _dict_cache[key]
+
+
+def load_builtin_dicts() -> None:
+    """Parse every builtin dictionary ahead of time."""
+    for builtin in _builtin_dictionaries:
+        filename = os.path.join(_data_root, "dictionary{}.txt".format(builtin[2]))
+        if os.path.isfile(filename):
+            load_dict(filename)
+
+
 def is_hidden(filename: str, check_hidden: bool) -> bool:
     bfilename = os.path.basename(filename)
 
@@ -1100,7 +1122,12 @@ def main(*args: str) -> int:
             use_dictionaries.append(dictionary)
     misspellings = {}
     for dictionary in use_dictionaries:
-        build_dict(dictionary, misspellings, ignore_words)
+        misspellings.update(load_dict(dictionary))
+    for ignore_word in ignore_words:
+        misspellings.pop(ignore_word, None)
+    if options.interactive:
+        # interactive answers change the entries, keep the cached ones untouched
+        misspellings = {k: Misspelling(v.data, v.fix, v.reason) for k, v in misspellings.items()}
     colors = TermColors()
     if not options.colors or sys.platform == "win32":
         colors.disable()
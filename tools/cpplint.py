@@ -46,9 +46,11 @@ from __future__ import annotations  # PEP 604 not in 3.9
 import codecs
 import collections
 import copy
+import functools
 import getopt
 import glob
 import itertools
+import json
 import math  # for log
 import os
 import re
@@ -57,6 +59,7 @@ import sys
 import sysconfig
 import unicodedata
 import subprocess
+import time
 import xml.etree.ElementTree
 
 # if empty, use defaults
@@ -76,6 +79,8 @@ Syntax: cpplint.py [--verbose=#] [--output=emacs|eclipse|vs7|junit|sed|gsed]
                    [--includeorder=default|standardcfirst]
                    [--config=filename]
                    [--quiet]
+                   [--jobs=#]
+                   [--timing=filename]
                    [--version]
                    [--diff]
         <file> [file] ...
@@ -125,6 +130,19 @@ Syntax: cpplint.py [--verbose=#] [--output=emacs|eclipse|vs7|junit|sed|gsed]
     quiet
       Don't print anything if no errors are found.
 
+    jobs=#
+      Lint the files in this many processes, 1 by default.  The output and
+      the error counts are the same as with one process and come in the same
+      order, except that settings a CPPLINT.cfg changes do not carry over
+      to the files linted after it.
+
+    timing=filename
+      Time every check function and write a JSON table of the cumulative
+      and self time, the calls and the errors raised by category of each
+      check, and of the errors of each category with the checks raising
+      them, to filename.  Self time excludes the checks a check calls.
+      Errors are counted before --filter and NOLINT drop them.
+
     filter=-x,+y,...
       Specify a comma-separated list of category-filters to apply: only
       error messages whose category names pass the filters will be printed.
@@ -963,6 +981,14 @@ _include_order = "default"
 # This allows different config files to be used
 _config_filename = "CPPLINT.cfg"
 
+# Number of processes the files are linted in.
+# This is set by --jobs flag.
+_jobs = 1
+
+# The file the check timings are written to.
+# This is set by --timing flag.
+_timing_filename = None
+
 # Treat all headers starting with 'h' equally: .h, .hpp, .hxx etc.
 # This is set by --headers flag.
 _hpp_headers: set[str] = set()
@@ -1416,6 +1442,9 @@ class _CppLintState:
         self._junit_errors = []
         self._junit_failures = []
 
+        # A _CheckTimings with --timing
+        self.check_timings = None
+
     def SetOutputFormat(self, output_format):
         """Sets the output format for errors."""
         self.output_format = output_format
@@ -1488,6 +1517,16 @@ class _CppLintState:
                 self.errors_by_category[category] = 0
             self.errors_by_category[category] += 1
 
+    def Merge(self, other):
+        """Adds the errors and check timings of the _CppLintState of a --jobs worker."""
+        self.error_count += other.error_count
+        for category, count in other.errors_by_category.items():
+            self.errors_by_category[category] = self.errors_by_category.get(category, 0) + count
+        self._junit_errors.extend(other._junit_errors)
+        self._junit_failures.extend(other._junit_failures)
+        if self.check_timings is not None:
+            self.check_timings.Merge(other.check_timings)
+
     def PrintErrorCounts(self):
         """Print a summary of errors by category, and the total."""
         for category, count in sorted(dict.items(self.errors_by_category)):
@@ -1554,6 +1593,88 @@ class _CppLintState:
         return xml_decl + xml.etree.ElementTree.tostring(testsuite, "utf-8").decode("utf-8")
 
 
+class _CheckTimings:
+    """Cumulative time, calls and errors of the check functions, for --timing."""
+
+    def __init__(self):
+        # check name to {"calls", "cumulative", "self", "errors": {category: count}}
+        self.checks = {}
+        # [check name, seconds spent in the checks it called] of the running checks
+        self._running = []
+
+    def _Check(self, name):
+        if name not in self.checks:
+            self.checks[name] = {"calls": 0, "cumulative": 0.0, "self": 0.0, "errors": {}}
+        return self.checks[name]
+
+    def Call(self, name, function, args, kwargs):
+        """Calls a check function and accounts its time to name."""
+        running = [name, 0.0]
+        self._running.append(running)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._running.pop()
+            check = self._Check(name)
+            check["calls"] += 1
+            check["self"] += elapsed - running[1]
+            # A recursive call is already in the time of the outer one.
+            if all(x[0] != name for x in self._running):
+                check["cumulative"] += elapsed
+            if self._running:
+                self._running[-1][1] += elapsed
+
+    def CountingErrors(self, error):
+        """Returns an error function that counts the errors of the running check and calls error."""
+
+        def CountError(filename, linenum, category, confidence, message):
+            if self._running:
+                errors = self._Check(self._running[-1][0])["errors"]
+                errors[category] = errors.get(category, 0) + 1
+            error(filename, linenum, category, confidence, message)
+
+        return CountError
+
+    def Merge(self, other):
+        """Adds the timings of a --jobs worker."""
+        for name, other_check in other.checks.items():
+            check = self._Check(name)
+            for key in ("calls", "cumulative", "self"):
+                check[key] += other_check[key]
+            for category, count in other_check["errors"].items():
+                check["errors"][category] = check["errors"].get(category, 0) + count
+
+    def ToJSON(self):
+        """Returns the checks by self time and the categories by errors, times in milliseconds."""
+        checks = []
+        categories = {}
+        for name, check in self.checks.items():
+            checks.append(
+                {
+                    "name": name,
+                    "calls": check["calls"],
+                    "cumulative_ms": round(check["cumulative"] * 1000, 3),
+                    "self_ms": round(check["self"] * 1000, 3),
+                    "errors": sum(check["errors"].values()),
+                    "categories": dict(sorted(check["errors"].items())),
+                }
+            )
+            for category, count in check["errors"].items():
+                category_row = categories.setdefault(category, {"errors": 0, "checks": {}})
+                category_row["errors"] += count
+                category_row["checks"][name] = count
+        checks.sort(key=lambda x: (-x["self_ms"], x["name"]))
+        return {
+            "checks": checks,
+            "categories": [
+                {"name": name, "errors": row["errors"], "checks": dict(sorted(row["checks"].items()))}
+                for name, row in sorted(categories.items(), key=lambda x: (-x[1]["errors"], x[0]))
+            ],
+        }
+
+
 _cpplint_state = _CppLintState()
 
 
@@ -1813,66 +1934,42 @@ class FileInfo:
 global diff_info
 diff_info = {}
 
+
 def GetDiffInfo(root_directory):
-    """Returns diff line numbers for the given file."""
+    """Returns diff line numbers of the working tree, {} if git diff fails.
+
+    The diff is parsed by iter_diff_records of common/diff_index.py, the parser
+    of the sast tree this cpplint is shipped in, so renames and copies are keyed
+    under their new path like the checkers key them.
+    """
+    sast_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if sast_dir not in sys.path:
+        sys.path.append(sast_dir)
+    try:
+        from common.diff_index import iter_diff_records
+    except ImportError:
+        sys.exit(f"FATAL ERROR: --verbose=-1 and -2 need common/diff_index.py in {sast_dir}")
     result = {}
-    del_lines = []
-    add_lines = []
+    cwd = root_directory if root_directory and os.path.isdir(root_directory) else None
     try:
-      output = subprocess.check_output("cd {};git diff".format(root_directory),shell=True)
-      status = 0
-    except Exception as e:
-      status = 1
-    if status == 0:
-      flag = False
-      git_diff_lines = output.decode("utf-8",errors="ignore").split("\n")
-      for index,line in enumerate(git_diff_lines):
-          if not flag and re.findall("diff --git a/.* b/.*",line):
-              flag = True
-              continue
-          if not flag:
-              continue
-          ret1 = re.findall("\+\+\+\s+b/(.*)",line)
-          if ret1:
-              file_path = ret1[0]
-              ret_ = re.findall("---\s+/dev/null",git_diff_lines[index-1])
-              if ret_:
-                  result[file_path] = {"add":[],"del":[],"type":"add","old_path":""}
-              else:
-                  old_path_ret= re.findall("---\s+a/(.*)",git_diff_lines[index-1])
-                  old_path = old_path_ret[0]
-                  if old_path == file_path:
-                      result[file_path] = {"add":[],"del":[],"type":"modify","old_path":old_path}
-                  else:
-                      result[file_path] = {"add":[],"del":[],"type":"rename","old_path":old_path}
-          ret1 = re.findall("\+\+\+\s+/dev/null",line)
-          if ret1:
-              ret3 = re.findall("---\s+a/(.*)",git_diff_lines[index-1])
-              if ret3:
-                  file_path = ret3[0]
-                  result[file_path] = {"add":[],"del":[],"type":"delete","old_path":file_path}
-          ret2 = re.findall("@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@",line)
-          if ret2:
-              status = True
-              del_number = int(ret2[0][0]) - 1
-              add_number = int(ret2[0][1]) - 1
-          if not status:
-              continue
-          if line.startswith("+++ ") or line.startswith("--- "):
-              continue
-          if line.startswith("-"):
-              del_lines.append((del_number,line))
-              result[file_path]["del"].append((del_number,line[1:]))
-              del_number += 1
-          elif line.startswith("+"):
-              add_lines.append((add_number,line))
-              result[file_path]["add"].append((add_number,line[1:]))
-              add_number += 1
-          else:
-              add_number += 1
-              del_number += 1
+        process = subprocess.Popen(["git", "diff"], cwd=cwd, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return result
+    with process:
+        for file_path, record in iter_diff_records(process.stdout):
+            result[file_path] = record
+    if process.returncode:
+        return {}
     return result
 
+
+def _IsAddedLine(file_path, linenum):
+    """Returns whether linenum of file_path is added in diff_info."""
+    record = diff_info.get(file_path)
+    return record is not None and record["add"].has_line(linenum)
+
+
 def _ShouldPrintError(category, confidence, filename, linenum):
     """If confidence >= verbose, category passes filter and is not suppressed."""
 
@@ -1941,8 +2038,7 @@ def Error(filename, linenum, category, confidence, message):
                 file_path = filename.replace(_root,"")
               else:
                 file_path = filename
-              add_line_nums = [ x[0] for x in diff_info.get(file_path,{}).get("add",[]) ]
-              if linenum in add_line_nums:
+              if _IsAddedLine(file_path, linenum):
                 msg_level = "warning"
                 if _cpplint_state.verbose_level == -2:
                   msg_level = "error"
@@ -1972,8 +2068,7 @@ def Error(filename, linenum, category, confidence, message):
         else:
             final_message = f"{filename}:{linenum}:  {message}  [{category}] [{confidence}]\n"
             if diff_info:
-              add_line_nums = [ x[0] for x in diff_info.get(filename,{}).get("add",[]) ]
-              if linenum in add_line_nums:
+              if _IsAddedLine(filename, linenum):
                 sys.stderr.write(final_message)
               else:
                 increment_flag = False
@@ -2049,6 +2144,10 @@ def CleanseRawStrings(raw_lines):
     delimiter = None
     lines_without_raw_strings = []
     for line in raw_lines:
+        if delimiter is None and 'R"' not in line:
+            # No raw string starts on the line, the common case.
+            lines_without_raw_strings.append(line)
+            continue
         if delimiter:
             # Inside a raw string, look for the end
             end = line.find(delimiter)
@@ -2187,35 +2286,78 @@ def ReplaceAlternateTokens(line):
     return line
 
 
+class _LazyCleansedLines:
+    """A read-only list of lines, each cleansed on first access.
+
+    Only lines that contain one of the characters the cleansing depends on are
+    cleansed, every other line is kept as the string of the source itself.
+    """
+
+    def __init__(self, source, cleanse, chars):
+        self._source = source
+        self._cleanse = cleanse
+        self._may_change = re.compile("[" + re.escape(chars) + "]").search
+        # None until the line is first accessed
+        self._lines = [None] * len(source)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        line = self._lines[index]
+        if line.__class__ is str:
+            return line
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._lines)))]
+        line = self._source[index]
+        if self._may_change(line):
+            line = self._cleanse(line)
+        self._lines[index] = line
+        return line
+
+    def __iter__(self):
+        for index in range(len(self._lines)):
+            yield self[index]
+
+
 class CleansedLines:
-    """Holds 4 copies of all lines with different preprocessing applied to them.
+    """Holds 4 views of all lines with different preprocessing applied to them.
 
     1) elided member contains lines without strings and comments.
     2) lines member contains lines without comments.
     3) raw_lines member contains all the lines without processing.
     4) lines_without_raw_strings member is same as raw_lines, but with C++11 raw
        strings removed.
-    All these members are of <type 'list'>, and of the same length.
+    raw_lines and lines_without_raw_strings are lists, the latter is raw_lines
+    itself when the file has no raw strings.  elided and lines are read-only
+    sequences that cleanse a line when it is first accessed, so lines that are
+    never checked cost nothing.  All members are of the same length.
     """
 
     def __init__(self, lines):
         if "-readability/alt_tokens" in _cpplint_state.filters:
             for i, line in enumerate(lines):
                 lines[i] = ReplaceAlternateTokens(line)
-        self.elided = []
-        self.lines = []
         self.raw_lines = lines
         self.num_lines = len(lines)
-        self.lines_without_raw_strings = CleanseRawStrings(lines)
-        for line in self.lines_without_raw_strings:
-            self.lines.append(CleanseComments(line))
-            elided = self._CollapseStrings(line)
-            self.elided.append(CleanseComments(elided))
+        lines_without_raw_strings = CleanseRawStrings(lines)
+        if any(x is not y for x, y in zip(lines_without_raw_strings, lines)):
+            self.lines_without_raw_strings = lines_without_raw_strings
+        else:
+            self.lines_without_raw_strings = lines
+        # Comments start with a slash, strings and chars with a quote or a backslash.
+        self.lines = _LazyCleansedLines(self.lines_without_raw_strings, CleanseComments, "/")
+        self.elided = _LazyCleansedLines(self.lines_without_raw_strings, self._ElideLine, "/'\"\\")
 
     def NumLines(self):
         """Returns the number of lines represented."""
         return self.num_lines
 
+    @staticmethod
+    def _ElideLine(line):
+        """Returns the line without strings and comments."""
+        return CleanseComments(CleansedLines._CollapseStrings(line))
+
     @staticmethod
     def _CollapseStrings(elided):
         """Collapses strings and chars on a line to simple "" or '' blocks.
@@ -7053,7 +7195,57 @@ def FilesBelongToSameModule(filename_cc, filename_h):
     return files_belong_to_same_module, common_path
 
 
-def CheckForIncludeWhatYouUse(filename, clean_lines, include_state, error, io=codecs):
+def _MatchIncludeWhatYouUse(line, linenum, required, headers=None):
+    """Records the headers a line uses in required, for CheckForIncludeWhatYouUse.
+
+    Args:
+      line: The elided line.
+      linenum: The number of the line.
+      required: A map of header name to linenumber and the template entity, a
+                later line replaces the entry of an earlier one.
+      headers: Only look for these headers, None for all of them.
+    """
+    if not line or line[0] == "#" or headers == set():
+        return
+
+    _re_patterns = []
+    _re_patterns.extend(_re_pattern_types_or_objs)
+    _re_patterns.extend(_re_pattern_functions)
+    for pattern, item, header in _re_patterns:
+        if headers is not None and header not in headers:
+            continue
+        matched = pattern.search(line)
+        if matched:
+            # Don't warn about strings in non-STL namespaces:
+            # (We check only the first match per line; good enough.)
+            prefix = line[: matched.start()]
+            if prefix.endswith("std::") or not prefix.endswith("::"):
+                required[header] = (linenum, item)
+
+    for pattern, template, header in _re_pattern_headers_maybe_templates:
+        if headers is not None and header not in headers:
+            continue
+        if pattern.search(line):
+            required[header] = (linenum, template)
+
+    # The following function is just a speed up, no semantics are changed.
+    if "<" not in line:  # Reduces the cpu time usage by skipping lines.
+        return
+
+    for pattern, template, header in _re_pattern_templates:
+        if headers is not None and header not in headers:
+            continue
+        matched = pattern.search(line)
+        if matched:
+            # Don't warn about IWYU in non-STL namespaces:
+            # (We check only the first match per line; good enough.)
+            prefix = line[: matched.start()]
+            if prefix.endswith("std::") or not prefix.endswith("::"):
+                required[header] = (linenum, template)
+
+
+def CheckForIncludeWhatYouUse(filename, clean_lines, include_state, error, io=codecs,
+                              changed_lines=None):
     """Reports for missing stl includes.
 
     This function will output warnings to make sure you are including the headers
@@ -7069,43 +7261,26 @@ def CheckForIncludeWhatYouUse(filename, clean_lines, include_state, error, io=co
       error: The function to call with any errors found.
       io: The IO factory to use to read the header file. Provided for unittest
           injection.
+      changed_lines: Like ProcessFileData.  The error of a header is on the last
+                     line that uses it, so only the headers a changed line uses
+                     are looked for after the first changed line.
     """
     required = {}  # A map of header name to linenumber and the template entity.
     # Example of required: { '<functional>': (1219, 'less<>') }
 
-    for linenum in range(clean_lines.NumLines()):
-        line = clean_lines.elided[linenum]
-        if not line or line[0] == "#":
-            continue
-
-        _re_patterns = []
-        _re_patterns.extend(_re_pattern_types_or_objs)
-        _re_patterns.extend(_re_pattern_functions)
-        for pattern, item, header in _re_patterns:
-            matched = pattern.search(line)
-            if matched:
-                # Don't warn about strings in non-STL namespaces:
-                # (We check only the first match per line; good enough.)
-                prefix = line[: matched.start()]
-                if prefix.endswith("std::") or not prefix.endswith("::"):
-                    required[header] = (linenum, item)
-
-        for pattern, template, header in _re_pattern_headers_maybe_templates:
-            if pattern.search(line):
-                required[header] = (linenum, template)
-
-        # The following function is just a speed up, no semantics are changed.
-        if "<" not in line:  # Reduces the cpu time usage by skipping lines.
-            continue
-
-        for pattern, template, header in _re_pattern_templates:
-            matched = pattern.search(line)
-            if matched:
-                # Don't warn about IWYU in non-STL namespaces:
-                # (We check only the first match per line; good enough.)
-                prefix = line[: matched.start()]
-                if prefix.endswith("std::") or not prefix.endswith("::"):
-                    required[header] = (linenum, template)
+    if changed_lines is None:
+        for linenum in range(clean_lines.NumLines()):
+            _MatchIncludeWhatYouUse(clean_lines.elided[linenum], linenum, required)
+    else:
+        changed_lines = set(changed_lines)
+        first_changed = min(changed_lines, default=clean_lines.NumLines())
+        for linenum in range(max(first_changed, 0), clean_lines.NumLines()):
+            _MatchIncludeWhatYouUse(
+                clean_lines.elided[linenum],
+                linenum,
+                required,
+                None if linenum in changed_lines else set(required),
+            )
 
     # Let's flatten the include_state include_list and copy it into a dictionary.
     include_dict = dict([item for sublist in include_state.include_list for item in sublist])
@@ -7412,6 +7587,45 @@ def ProcessLine(
             check_fn(filename, clean_lines, line, error)
 
 
+# The lines around a changed line that ProcessFileData checks in full, a margin
+# for checks that look at the lines next to the one they process.
+_CHANGED_LINES_CONTEXT = 3
+
+
+def ProcessLineState(filename, clean_lines, line, include_state, function_state, nesting_state, error):
+    """Processes a line that ProcessFileData does not check in full.
+
+    Only what carries state to the following lines (NOLINT, nesting, function
+    lengths, includes) and the checks that may report the error on a later
+    line than the one they process are run.
+
+    Args:
+      filename: Filename of the file that is being processed.
+      clean_lines: A CleansedLines instance containing the file.
+      line: Number of line being processed.
+      include_state: An _IncludeState instance in which the headers are inserted.
+      function_state: A _FunctionState instance which counts function lines, etc.
+      nesting_state: A NestingState instance which maintains information about
+                     the current stack of nested blocks being parsed.
+      error: The function to call with any errors found.
+    """
+    ParseNolintSuppressions(filename, clean_lines.raw_lines[line], line, error)
+    nesting_state.Update(filename, clean_lines, line, error)
+    if nesting_state.InAsmBlock():
+        return
+    CheckForFunctionLengths(filename, clean_lines, line, function_state, error)
+    CheckTrailingSemicolon(filename, clean_lines, line, error)
+    CheckEmptyBlockBody(filename, clean_lines, line, error)
+    # The include part of CheckLanguage
+    elided = clean_lines.elided[line]
+    if _RE_PATTERN_INCLUDE.search(elided):
+        CheckIncludeLine(filename, clean_lines, line, include_state, error)
+        return
+    match = re.match(r"^\s*#\s*(if|ifdef|ifndef|elif|else|endif)\b", elided)
+    if match:
+        include_state.ResetSection(match.group(1))
+
+
 def FlagCxxHeaders(filename, clean_lines, linenum, error):
     """Flag C++ headers that the styleguide restricts.
 
@@ -7444,7 +7658,8 @@ def FlagCxxHeaders(filename, clean_lines, linenum, error):
         error(filename, linenum, "build/c++17", 5, "<filesystem> is an unapproved C++17 header.")
 
 
-def ProcessFileData(filename, file_extension, lines, error, extra_check_functions=None):
+def ProcessFileData(filename, file_extension, lines, error, extra_check_functions=None,
+                    changed_lines=None):
     """Performs lint checks and reports any errors to the given error function.
 
     Args:
@@ -7457,6 +7672,12 @@ def ProcessFileData(filename, file_extension, lines, error, extra_check_function
       extra_check_functions: An array of additional check functions that will be
                              run on each source line. Each function takes 4
                              arguments: filename, clean_lines, line, error
+      changed_lines: The numbers of the lines whose errors the caller keeps, such
+                     as the added lines of a diff, None for all lines.  Only these
+                     lines and the _CHANGED_LINES_CONTEXT lines around them are
+                     checked in full, the other lines go through ProcessLineState,
+                     so the errors on the changed lines are the same as without it.
+                     Errors on the other lines may be missing.
     """
     lines = (
         ["// marker so line numbers and indices both start at 1"]
@@ -7480,7 +7701,20 @@ def ProcessFileData(filename, file_extension, lines, error, extra_check_function
         cppvar = GetHeaderGuardCPPVariable(filename)
         CheckForHeaderGuard(filename, clean_lines, error, cppvar)
 
+    checked_lines = None
+    if changed_lines is not None:
+        checked_lines = set()
+        for linenum in changed_lines:
+            checked_lines.update(
+                range(linenum - _CHANGED_LINES_CONTEXT, linenum + _CHANGED_LINES_CONTEXT + 1)
+            )
+
     for line in range(clean_lines.NumLines()):
+        if checked_lines is not None and line not in checked_lines:
+            ProcessLineState(
+                filename, clean_lines, line, include_state, function_state, nesting_state, error
+            )
+            continue
         ProcessLine(
             filename,
             file_extension,
@@ -7503,7 +7737,9 @@ def ProcessFileData(filename, file_extension, lines, error, extra_check_function
             "NONLINT block never ended",
         )
 
-    CheckForIncludeWhatYouUse(filename, clean_lines, include_state, error)
+    CheckForIncludeWhatYouUse(
+        filename, clean_lines, include_state, error, changed_lines=changed_lines
+    )
 
     # Check that the .cc file has included its header if it exists.
     if _IsSourceExtension(file_extension):
@@ -7607,7 +7843,7 @@ def ProcessConfigOverrides(filename):
     return True
 
 
-def ProcessFile(filename, vlevel, extra_check_functions=None):
+def ProcessFile(filename, vlevel, extra_check_functions=None, error=Error, changed_lines=None):
     """Does google-lint on a single file.
 
     Args:
@@ -7619,11 +7855,21 @@ def ProcessFile(filename, vlevel, extra_check_functions=None):
       extra_check_functions: An array of additional check functions that will be
                              run on each source line. Each function takes 4
                              arguments: filename, clean_lines, line, error
+
+      error: The function errors are reported to, Error by default.
+
+      changed_lines: Like ProcessFileData.
     """
 
     _SetVerboseLevel(vlevel)
     _BackupFilters()
     old_errors = _cpplint_state.error_count
+    if _cpplint_state.check_timings is not None:
+        error = _cpplint_state.check_timings.CountingErrors(error)
+        if extra_check_functions:
+            extra_check_functions = [
+                _TimedCheck(getattr(x, "__qualname__", repr(x)), x) for x in extra_check_functions
+            ]
 
     if not ProcessConfigOverrides(filename):
         _RestoreFilters()
@@ -7670,7 +7916,7 @@ def ProcessFile(filename, vlevel, extra_check_functions=None):
             f"Ignoring {filename}; not a valid file name ({(', '.join(GetAllExtensions()))})\n"
         )
     else:
-        ProcessFileData(filename, file_extension, lines, Error, extra_check_functions)
+        ProcessFileData(filename, file_extension, lines, error, extra_check_functions, changed_lines)
 
         # If end-of-line sequences are a mix of LF and CR-LF, issue
         # warnings on the lines with CR.
@@ -7687,7 +7933,7 @@ def ProcessFile(filename, vlevel, extra_check_functions=None):
             # check whether the file is mostly CRLF or just LF, and warn on the
             # minority, we bias toward LF here since most tools prefer LF.
             for linenum in crlf_lines:
-                Error(
+                error(
                     filename,
                     linenum,
                     "whitespace/newline",
@@ -7702,6 +7948,173 @@ def ProcessFile(filename, vlevel, extra_check_functions=None):
     _RestoreFilters()
 
 
+# Functions timed with --timing besides the Check functions: the others
+# ProcessLine and ProcessFileData call, and ProcessFile for the rest.
+_TIMED_FUNCTIONS = (
+    "ParseNolintSuppressions",
+    "ProcessGlobalSuppressions",
+    "RemoveMultiLineComments",
+    "FlagCxxHeaders",
+    "ProcessFile",
+)
+
+
+def _TimedCheck(name, function):
+    """Returns function timed as name when _cpplint_state has check timings."""
+
+    @functools.wraps(function)
+    def Timed(*args, **kwargs):
+        if _cpplint_state.check_timings is None:
+            return function(*args, **kwargs)
+        return _cpplint_state.check_timings.Call(name, function, args, kwargs)
+
+    return Timed
+
+
+def _InstallCheckTimers():
+    """Replaces the check functions of the module with timed ones, for --timing."""
+    module = globals()
+    for name, value in list(module.items()):
+        if not callable(value) or isinstance(value, type) or hasattr(value, "__wrapped__"):
+            continue
+        if name.startswith("Check") or name in _TIMED_FUNCTIONS:
+            module[name] = _TimedCheck(name, value)
+    if not hasattr(NestingState.Update, "__wrapped__"):
+        NestingState.Update = _TimedCheck("NestingState.Update", NestingState.Update)
+
+
+def LintFile(filename, filters="", vlevel=1, extra_check_functions=None, changed_lines=None):
+    """Lints a single file in this process and returns its errors.
+
+    A fresh _CppLintState is used for every file and the settings a CPPLINT.cfg
+    may change (linelength, root, extensions, headers, includeorder) are put back
+    afterwards, so the result does not depend on the files linted before.
+
+    Args:
+      filename: The name of the file to parse.
+      filters: A string of comma-separated filters, like --filter.
+      vlevel: The level of errors to report, like --verbose.
+      extra_check_functions: Like ProcessFile.
+      changed_lines: Like ProcessFileData.
+
+    Returns:
+      A list of (filename, linenum, category, confidence, message) tuples in the
+      order the errors were found, filtered like Error filters them.
+    """
+    global _cpplint_state, _root, _line_length, _valid_extensions, _hpp_headers, _include_order
+    settings = (_root, _line_length, _valid_extensions, _hpp_headers, _include_order)
+    last_state = _cpplint_state
+    _cpplint_state = _CppLintState()
+    # junit keeps the messages that are no lint errors instead of writing them
+    _cpplint_state.SetOutputFormat("junit")
+    _cpplint_state.SetQuiet(True)
+    _cpplint_state.SetFilters(filters)
+    errors = []
+
+    def CollectError(filename, linenum, category, confidence, message):
+        if _ShouldPrintError(category, confidence, filename, linenum):
+            _cpplint_state.IncrementErrorCount(category)
+            errors.append((filename, linenum, category, confidence, message))
+
+    try:
+        ProcessFile(filename, vlevel, extra_check_functions, CollectError, changed_lines)
+    finally:
+        _cpplint_state = last_state
+        _root, _line_length, _valid_extensions, _hpp_headers, _include_order = settings
+    return errors
+
+
+# Module settings of the command line a --jobs worker starts with.
+_WORKER_SETTINGS = (
+    "_root",
+    "_repository",
+    "_line_length",
+    "_valid_extensions",
+    "_hpp_headers",
+    "_include_order",
+    "_config_filename",
+    "diff_info",
+)
+
+
+class _RecordedStream:
+    """Stands in for sys.stdout or sys.stderr and records what is written to it."""
+
+    def __init__(self, name, writes):
+        self.name = name
+        self._writes = writes
+
+    def write(self, text):
+        self._writes.append((self.name, text))
+
+    def flush(self):
+        pass
+
+
+def _InitWorker(settings, state):
+    """Starts a --jobs worker with the settings and the _CppLintState of the command line."""
+    global _cpplint_state
+    globals().update(settings)
+    _cpplint_state = state
+    if state.check_timings is not None:
+        _InstallCheckTimers()
+
+
+def _ProcessFileInWorker(filename):
+    """Lints a file of --jobs in a worker, like ProcessFile.
+
+    The file gets a fresh copy of the _CppLintState of the command line and the
+    settings a CPPLINT.cfg may change are put back afterwards, so the result does
+    not depend on the files the worker linted before.
+
+    Args:
+      filename: The name of the file to parse.
+
+    Returns:
+      (writes, state): the (stream name, text) written to stdout and stderr in
+      order and the _CppLintState with the errors of the file.
+    """
+    global _cpplint_state, _root, _line_length, _valid_extensions, _hpp_headers, _include_order
+    settings = (_root, _line_length, _valid_extensions, _hpp_headers, _include_order)
+    last_state = _cpplint_state
+    _cpplint_state = copy.deepcopy(last_state)
+    state = _cpplint_state
+    writes = []
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = _RecordedStream("stdout", writes)
+    sys.stderr = _RecordedStream("stderr", writes)
+    try:
+        ProcessFile(filename, state.verbose_level)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        _cpplint_state = last_state
+        _root, _line_length, _valid_extensions, _hpp_headers, _include_order = settings
+    return writes, state
+
+
+def ProcessFilesInParallel(filenames, jobs):
+    """Lints the files in a pool of jobs processes, for --jobs.
+
+    The output of every file is written and its errors are added to
+    _cpplint_state in the order of filenames, as if they were linted one
+    after another.
+
+    Args:
+      filenames: The names of the files to parse.
+      jobs: The number of processes.
+    """
+    import multiprocessing
+
+    settings = {name: globals()[name] for name in _WORKER_SETTINGS}
+    with multiprocessing.Pool(
+        min(jobs, len(filenames)), _InitWorker, (settings, _cpplint_state)
+    ) as pool:
+        for writes, state in pool.imap(_ProcessFileInWorker, filenames):
+            for name, text in writes:
+                getattr(sys, name).write(text)
+            _cpplint_state.Merge(state)
+
+
 def PrintUsage(message):
     """Prints a brief usage string and exits, optionally with an error message.
 
@@ -7773,6 +8186,8 @@ def ParseArguments(args):
                 "includeorder=",
                 "config=",
                 "quiet",
+                "jobs=",
+                "timing=",
                 "diff"
             ],
         )
@@ -7799,6 +8214,17 @@ def ParseArguments(args):
             output_format = val
         elif opt == "--quiet":
             quiet = True
+        elif opt == "--jobs":
+            global _jobs
+            try:
+                _jobs = int(val)
+            except ValueError:
+                PrintUsage("Jobs must be digits.")
+            if _jobs < 1:
+                PrintUsage("Jobs must be at least 1.")
+        elif opt == "--timing":
+            global _timing_filename
+            _timing_filename = val
         elif opt in {"--verbose", "--v"}:
             verbosity = int(val)
         elif opt == "--filter":
@@ -7857,6 +8283,9 @@ def ParseArguments(args):
     _SetVerboseLevel(verbosity)
     _SetFilters(filters)
     _SetCountingStyle(counting_style)
+    if _timing_filename:
+        _cpplint_state.check_timings = _CheckTimings()
+        _InstallCheckTimers()
 
     filenames.sort()
     return filenames
@@ -7961,8 +8390,12 @@ def main():
         sys.stderr = codecs.StreamReader(sys.stderr, "replace")
 
         _cpplint_state.ResetErrorCounts()
-        for filename in filenames:
-            ProcessFile(filename, _cpplint_state.verbose_level)
+        # stdin can only be read by this process
+        if _jobs > 1 and len(filenames) > 1 and "-" not in filenames:
+            ProcessFilesInParallel(filenames, _jobs)
+        else:
+            for filename in filenames:
+                ProcessFile(filename, _cpplint_state.verbose_level)
         # If --quiet is passed, suppress printing error count unless there are errors.
         if not _cpplint_state.quiet or _cpplint_state.error_count > 0:
             _cpplint_state.PrintErrorCounts()
@@ -7970,6 +8403,10 @@ def main():
         if _cpplint_state.output_format == "junit":
             sys.stderr.write(_cpplint_state.FormatJUnitXML())
 
+        if _timing_filename:
+            with open(_timing_filename, "w", encoding="utf8") as timing_file:
+                json.dump(_cpplint_state.check_timings.ToJSON(), timing_file, indent=2)
+
     finally:
         sys.stderr = backup_err
 